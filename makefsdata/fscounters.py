@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Decodifica dumps dos contadores de acesso gerados por `makefsdata -counters`.
+
+Uso básico:
+    python fscounters.py <dump> -m <fsdata.c.manifest.json> [--json] [--sort hits]
+
+- <dump>: arquivo com a saída de `fsdataCountersExport()` do firmware, em
+          binário ou em texto hexadecimal (ex.: copiado de um console serial;
+          espaços, vírgulas e prefixos `0x` são ignorados).
+- -m / --manifest: manifesto gravado pelo makefsdata ao lado do fsdata.c,
+          que associa cada índice de contador ao nome qualificado do arquivo.
+
+Formato de exportação (little-endian):
+    magic u32 ("FSCT") | versão u8 | reservado u8 | arquivos u16 |
+    image id u32 | (hits u32, bytes u32) por arquivo
+
+O image id do dump deve coincidir com o do manifesto; caso contrário o dump
+veio de um firmware com outra imagem de arquivos (use --force para ignorar).
+
+O script trata SIGINT/SIGTERM para encerramento gracioso.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import signal
+import struct
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+COUNTERS_MAGIC = 0x54435346
+COUNTERS_VERSION = 1
+COUNTERS_HEADER_SIZE = 12
+
+_stop_requested = False
+
+
+def _signal_handler(signum, _frame) -> None:
+    """Sinaliza encerramento gracioso do script."""
+
+    global _stop_requested
+    _stop_requested = True
+    sys.stderr.write(f"\nInterrupção solicitada (signal {signum}). Encerrando...\n")
+    sys.stderr.flush()
+
+
+@dataclass
+class FileCounter:
+    """Contagem de um arquivo do fsdata, já associada ao nome qualificado."""
+
+    index: int
+    name: str
+    hits: int
+    bytes: int
+    size: int
+
+
+def load_dump(path: Path) -> bytes:
+    """Lê o dump em binário ou em texto hexadecimal."""
+
+    raw = path.read_bytes()
+    if raw[:4] == struct.pack("<I", COUNTERS_MAGIC):
+        return raw
+    text = raw.decode("ascii", errors="ignore")
+    text = re.sub(r"0x", "", text, flags=re.IGNORECASE)
+    digits = re.sub(r"[^0-9a-fA-F]", "", text)
+    try:
+        return bytes.fromhex(digits)
+    except ValueError as exc:
+        raise SystemExit(f"Dump inválido em {path}: {exc}")
+
+
+def parse_dump(data: bytes) -> Tuple[int, List[Tuple[int, int]]]:
+    """Valida o cabeçalho e retorna (image_id, [(hits, bytes), ...])."""
+
+    if len(data) < COUNTERS_HEADER_SIZE:
+        raise SystemExit("Dump truncado: cabeçalho incompleto.")
+    magic, version, _reserved, count, image_id = struct.unpack("<IBBHI", data[:COUNTERS_HEADER_SIZE])
+    if magic != COUNTERS_MAGIC:
+        raise SystemExit(f"Dump inválido: magic 0x{magic:08x} (esperado 0x{COUNTERS_MAGIC:08x}).")
+    if version != COUNTERS_VERSION:
+        raise SystemExit(f"Versão de dump não suportada: {version}.")
+    expected = COUNTERS_HEADER_SIZE + 8 * count
+    if len(data) < expected:
+        raise SystemExit(f"Dump truncado: {len(data)} bytes, esperado {expected}.")
+    counters = [
+        struct.unpack_from("<II", data, COUNTERS_HEADER_SIZE + 8 * i)
+        for i in range(count)
+    ]
+    return image_id, counters
+
+
+def decode(data: bytes, manifest: Dict, force: bool = False) -> List[FileCounter]:
+    """Associa cada contador do dump ao arquivo correspondente do manifesto."""
+
+    image_id, counters = parse_dump(data)
+    manifest_id = int(str(manifest.get("image_id", "0")), 16)
+    if image_id != manifest_id:
+        msg = (
+            f"image id do dump (0x{image_id:08x}) difere do manifesto "
+            f"(0x{manifest_id:08x}): firmware gerado a partir de outra imagem."
+        )
+        if not force:
+            raise SystemExit(msg)
+        sys.stderr.write(f"Aviso: {msg}\n")
+
+    files = {int(f["index"]): f for f in manifest.get("files", [])}
+    result: List[FileCounter] = []
+    for index, (hits, nbytes) in enumerate(counters):
+        entry = files.get(index, {})
+        result.append(
+            FileCounter(
+                index=index,
+                name=entry.get("name", f"<índice {index}>"),
+                hits=hits,
+                bytes=nbytes,
+                size=int(entry.get("size", 0)),
+            )
+        )
+    return result
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    """Interpreta parâmetros de linha de comando."""
+
+    parser = argparse.ArgumentParser(description="Decodifica dumps de contadores de acesso do fsdata.")
+    parser.add_argument("dump", help="Dump de fsdataCountersExport() (binário ou hexadecimal)")
+    parser.add_argument("-m", "--manifest", required=True, help="Manifesto <fsdata>.manifest.json")
+    parser.add_argument("--sort", choices=["hits", "bytes", "name", "index"], default="hits",
+                        help="Ordenação da tabela (padrão: hits)")
+    parser.add_argument("--json", action="store_true", help="Emite JSON em vez de tabela")
+    parser.add_argument("--force", action="store_true", help="Ignora divergência de image id")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    signal.signal(signal.SIGINT, _signal_handler)
+    try:
+        signal.signal(signal.SIGTERM, _signal_handler)
+    except AttributeError:
+        pass
+
+    args = parse_args(argv)
+
+    try:
+        manifest = json.loads(Path(args.manifest).read_text(encoding="utf-8"))
+    except Exception as exc:
+        sys.stderr.write(f"Erro ao ler/parsear manifesto: {exc}\n")
+        return 1
+
+    counters = decode(load_dump(Path(args.dump)), manifest, force=args.force)
+
+    if args.sort == "name":
+        counters.sort(key=lambda c: c.name)
+    elif args.sort != "index":
+        counters.sort(key=lambda c: (-getattr(c, args.sort), c.index))
+
+    if args.json:
+        payload = [c.__dict__ for c in counters]
+        sys.stdout.write(json.dumps(payload, indent=2, ensure_ascii=False) + "\n")
+    else:
+        total_hits = sum(c.hits for c in counters) or 1
+        sys.stdout.write(f"{'hits':>10} {'%':>6} {'bytes':>12} {'tamanho':>9}  arquivo\n")
+        for c in counters:
+            share = (c.hits * 100.0) / total_hits
+            sys.stdout.write(f"{c.hits:>10} {share:>6.2f} {c.bytes:>12} {c.size:>9}  {c.name}\n")
+        unused = [c.name for c in counters if c.hits == 0]
+        if unused:
+            sys.stdout.write(f"\nArquivos sem nenhum acesso: {len(unused)}\n")
+
+    if _stop_requested:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main(sys.argv[1:]))
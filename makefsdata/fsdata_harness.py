@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""Harness de host para validar e medir um fsdata.c gerado pelo makefsdata.
+
+Uso básico:
+    python fsdata_harness.py <fsdata.c> [--fs <targetdir>] [-o resultado.json]
+
+O harness compila o arquivo gerado com o gcc do host contra um stub mínimo de
+`lwip/apps/fs.h` e produz um JSON com:
+
+- compile: tempo de compilação, pico de memória do compilador e tamanho das
+  seções do objeto (quando o utilitário `size` estiver disponível);
+- check: verificação de cada `fsdata_file` percorrendo as structs (nome,
+  cabeçalho HTTP, Content-Length, Content-Encoding e, com --fs, o corpo
+  comparado ao arquivo de origem). Arquivos vindos de fragmentos -frag
+  (linhas `fsdata-fragment:`, ex.: respostas x-static do swagger2rest) não
+  existem no diretório de origem: o corpo é conferido com o tamanho
+  declarado no fragmento;
+- lookup: microbenchmark da busca linear de `fs_open` sobre os nomes reais.
+
+O formato é estável (campo `schema`) para acompanhar regressões entre versões
+do makefsdata e combinações de opções (use --label para identificá-las).
+
+O script trata SIGINT/SIGTERM para encerramento gracioso.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import re
+import shutil
+import signal
+import struct
+import subprocess
+import sys
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SCHEMA_VERSION = 1
+
+FS_FILE_FLAGS_HEADER_INCLUDED = 0x01
+FS_FILE_FLAGS_HEADER_HTTPVER_1_1 = 0x04
+
+# Arquivos de fragmentos -frag embutidos pelo makefsdata (mesmo formato de
+# _FRAGMENT_FILE_RE em makefsdata.py): "fsdata-fragment: <nome> <var> <bytes>".
+_FRAGMENT_FILE_RE = re.compile(r"fsdata-fragment:\s+(\S+)\s+(\w+)\s+(\d+)")
+
+_stop_requested = False
+
+# Stub mínimo de lwip/apps/fs.h: apenas o necessário para compilar o fsdata.c
+# gerado (struct fsdata_file e flags), com o mesmo layout do lwIP 2.x.
+STUB_FS_H = """\
+#ifndef LWIP_HDR_APPS_FS_H
+#define LWIP_HDR_APPS_FS_H
+#include <stdint.h>
+typedef uint8_t u8_t;
+typedef uint16_t u16_t;
+typedef uint32_t u32_t;
+#define FS_FILE_FLAGS_HEADER_INCLUDED     0x01
+#define FS_FILE_FLAGS_HEADER_PERSISTENT   0x02
+#define FS_FILE_FLAGS_HEADER_HTTPVER_1_1  0x04
+#define FS_FILE_FLAGS_SSI                 0x08
+struct fsdata_file {
+  const struct fsdata_file *next;
+  const unsigned char *name;
+  const unsigned char *data;
+  int len;
+  u8_t flags;
+};
+#endif
+"""
+
+STUB_DEF_H = """\
+#ifndef LWIP_HDR_DEF_H
+#define LWIP_HDR_DEF_H
+#include <stddef.h>
+#define LWIP_UNUSED_ARG(x) (void)(x)
+#endif
+"""
+
+# Programa de teste: inclui o fsdata.c, grava um dump binário de todas as
+# structs (nome, flags, len, dados) e mede a busca com o mesmo laço de
+# strcmp usado por fs_open em src/apps/http/fs.c.
+HARNESS_C = r"""
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+#include FSDATA_SOURCE
+
+static const struct fsdata_file *harnessLookup(const char *name)
+{
+    const struct fsdata_file *f;
+    for (f = FS_ROOT; f != NULL; f = f->next) {
+        if (!strcmp(name, (const char *)f->name)) {
+            return f;
+        }
+    }
+    return NULL;
+}
+
+static double harnessNow(void)
+{
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (double)ts.tv_sec * 1e9 + (double)ts.tv_nsec;
+}
+
+int main(int argc, char **argv)
+{
+    const struct fsdata_file *f;
+    FILE *dump;
+    char **names;
+    long iterations;
+    unsigned count = 0;
+    unsigned i;
+    long it;
+    volatile uintptr_t sink = 0;
+    double t0, hitNs, missNs;
+
+    if (argc < 3) {
+        return 2;
+    }
+    iterations = atol(argv[2]);
+    dump = fopen(argv[1], "wb");
+    if (dump == NULL) {
+        return 2;
+    }
+    for (f = FS_ROOT; f != NULL; f = f->next) {
+        uint32_t len = (uint32_t)f->len;
+        fputs((const char *)f->name, dump);
+        fputc(0, dump);
+        fputc(f->flags, dump);
+        fwrite(&len, sizeof(len), 1, dump);
+        fwrite(f->data, 1, len, dump);
+        count++;
+    }
+    fclose(dump);
+
+    /* Cópias dos nomes: evita comparar o ponteiro da própria struct. */
+    names = (char **)calloc(count ? count : 1, sizeof(char *));
+    i = 0;
+    for (f = FS_ROOT; f != NULL; f = f->next) {
+        names[i++] = strdup((const char *)f->name);
+    }
+
+    t0 = harnessNow();
+    for (it = 0; it < iterations; it++) {
+        for (i = 0; i < count; i++) {
+            sink ^= (uintptr_t)harnessLookup(names[i]);
+        }
+    }
+    hitNs = harnessNow() - t0;
+
+    t0 = harnessNow();
+    for (it = 0; it < iterations; it++) {
+        sink ^= (uintptr_t)harnessLookup("/__fsdata_harness_miss__");
+    }
+    missNs = harnessNow() - t0;
+
+    printf("{\"files\": %u, \"numfiles\": %u, \"hit_ns_total\": %.0f, \"miss_ns_total\": %.0f, \"sink\": %u}\n",
+           count, (unsigned)FS_NUMFILES, hitNs, missNs, (unsigned)(sink & 1u));
+    return 0;
+}
+"""
+
+# Processo auxiliar que executa o compilador e informa o próprio
+# RUSAGE_CHILDREN: cada medição roda em um processo novo, então o pico de
+# memória não se mistura com compilações anteriores.
+_MEASURE_CHILD = (
+    "import subprocess, sys, time\n"
+    "t = time.perf_counter()\n"
+    "rc = subprocess.run(sys.argv[1:]).returncode\n"
+    "elapsed = time.perf_counter() - t\n"
+    "try:\n"
+    "    import resource\n"
+    "    rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss\n"
+    "except ImportError:\n"
+    "    rss = -1\n"
+    "print(rc, elapsed, rss)\n"
+)
+
+
+def _signal_handler(signum, _frame) -> None:
+    """Sinaliza encerramento gracioso do script."""
+
+    global _stop_requested
+    _stop_requested = True
+    sys.stderr.write(f"\nInterrupção solicitada (signal {signum}). Encerrando...\n")
+    sys.stderr.flush()
+
+
+def write_stubs(include_dir: Path) -> None:
+    """Cria os headers stub `lwip/apps/fs.h` e `lwip/def.h`."""
+
+    apps = include_dir / "lwip" / "apps"
+    apps.mkdir(parents=True, exist_ok=True)
+    (apps / "fs.h").write_text(STUB_FS_H, encoding="ascii")
+    (include_dir / "lwip" / "def.h").write_text(STUB_DEF_H, encoding="ascii")
+
+
+def measure_compile(cmd: List[str]) -> Tuple[int, float, Optional[int]]:
+    """Executa o compilador medindo tempo e pico de memória (KiB)."""
+
+    proc = subprocess.run(
+        [sys.executable, "-c", _MEASURE_CHILD] + cmd,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    lines = proc.stdout.strip().splitlines()
+    if not lines:
+        return 1, 0.0, None
+    rc_str, elapsed_str, rss_str = lines[-1].split()
+    rss = int(rss_str)
+    if rss < 0:
+        return int(rc_str), float(elapsed_str), None
+    # ru_maxrss é informado em bytes no macOS e em KiB no Linux.
+    if sys.platform == "darwin":
+        rss //= 1024
+    return int(rc_str), float(elapsed_str), rss
+
+
+def object_sections(obj: Path) -> Dict[str, int]:
+    """Tamanhos text/data/bss do objeto via `size` (formato Berkeley)."""
+
+    sections: Dict[str, int] = {"file_bytes": obj.stat().st_size}
+    size_tool = shutil.which("size")
+    if size_tool is None:
+        return sections
+    proc = subprocess.run([size_tool, str(obj)], stdout=subprocess.PIPE, text=True)
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode == 0 and len(lines) >= 2:
+        fields = lines[1].split()
+        try:
+            sections.update(text=int(fields[0]), data=int(fields[1]), bss=int(fields[2]))
+        except (IndexError, ValueError):
+            pass
+    return sections
+
+
+def parse_dump(raw: bytes) -> List[Tuple[str, int, bytes]]:
+    """Interpreta o dump binário gravado pelo programa de teste."""
+
+    records: List[Tuple[str, int, bytes]] = []
+    pos = 0
+    while pos < len(raw):
+        end = raw.index(b"\0", pos)
+        name = raw[pos:end].decode("latin-1")
+        flags = raw[end + 1]
+        (length,) = struct.unpack("=I", raw[end + 2:end + 6])
+        data = raw[end + 6:end + 6 + length]
+        pos = end + 6 + length
+        records.append((name, flags, data))
+    return records
+
+
+def fragment_files(source: str) -> Dict[str, int]:
+    """Arquivos de fragmentos -frag descritos no fsdata: nome -> bytes do corpo."""
+
+    return {m.group(1): int(m.group(3)) for m in _FRAGMENT_FILE_RE.finditer(source)}
+
+
+def check_records(records: List[Tuple[str, int, bytes]], fs_dir: Optional[Path],
+                  fragments: Optional[Dict[str, int]] = None) -> List[str]:
+    """Valida nome, cabeçalho e corpo de cada arquivo embutido.
+
+    Arquivos listados em `fragments` não são procurados em `fs_dir`; o corpo
+    (já descompactado) é comparado ao tamanho declarado no fragmento.
+    Retorna a lista de erros encontrados (vazia quando tudo confere).
+    """
+
+    fragments = fragments or {}
+
+    errors: List[str] = []
+    seen = set()
+    for name, flags, data in records:
+        if not name.startswith("/"):
+            errors.append(f"{name}: nome não inicia com '/'")
+        if name in seen:
+            errors.append(f"{name}: nome duplicado na lista")
+        seen.add(name)
+
+        body = data
+        encoding = None
+        if flags & FS_FILE_FLAGS_HEADER_INCLUDED:
+            sep = data.find(b"\r\n\r\n")
+            if sep < 0:
+                errors.append(f"{name}: cabeçalho HTTP sem terminador CRLFCRLF")
+                continue
+            header_lines = data[:sep].decode("latin-1").split("\r\n")
+            body = data[sep + 4:]
+            status = header_lines[0]
+            if not status.startswith(("HTTP/1.0 ", "HTTP/1.1 ")):
+                errors.append(f"{name}: linha de status inválida: {status!r}")
+            if flags & FS_FILE_FLAGS_HEADER_HTTPVER_1_1 and not status.startswith("HTTP/1.1 "):
+                errors.append(f"{name}: flag HTTP/1.1 com status {status!r}")
+            fields = {}
+            for line in header_lines[1:]:
+                key, _, value = line.partition(":")
+                fields[key.strip().lower()] = value.strip()
+            if "content-length" in fields and fields["content-length"] != str(len(body)):
+                errors.append(
+                    f"{name}: Content-Length {fields['content-length']} difere do corpo ({len(body)})"
+                )
+            encoding = fields.get("content-encoding")
+
+        if encoding == "deflate":
+            try:
+                body = zlib.decompress(body)
+            except zlib.error as exc:
+                errors.append(f"{name}: corpo deflate inválido: {exc}")
+                continue
+
+        if name in fragments:
+            if len(body) != fragments[name]:
+                errors.append(f"{name}: corpo com {len(body)} bytes, fragmento declara {fragments[name]}")
+        elif fs_dir is not None:
+            source = fs_dir / name.lstrip("/")
+            if not source.is_file():
+                errors.append(f"{name}: arquivo não encontrado em {fs_dir}")
+            elif source.read_bytes() != body:
+                errors.append(f"{name}: corpo difere de {source}")
+    return errors
+
+
+def run_harness(args: argparse.Namespace) -> Dict:
+    """Compila, verifica e mede o fsdata informado, retornando o resultado."""
+
+    fsdata = Path(args.fsdata).resolve()
+    if not fsdata.is_file():
+        raise SystemExit(f"Arquivo fsdata não encontrado: {fsdata}")
+    cc = shutil.which(args.cc)
+    if cc is None:
+        raise SystemExit(f"Compilador não encontrado: {args.cc}")
+    cflags = args.cflags.split()
+
+    result: Dict = {
+        "schema": SCHEMA_VERSION,
+        "tool": "fsdata_harness",
+        "label": args.label,
+        "fsdata": str(fsdata),
+        "fsdata_bytes": fsdata.stat().st_size,
+        "host": {"platform": platform.platform(), "python": platform.python_version()},
+        "compiler": {"cc": cc, "cflags": args.cflags},
+    }
+    version = subprocess.run([cc, "--version"], stdout=subprocess.PIPE, text=True)
+    result["compiler"]["version"] = (version.stdout.splitlines() or [""])[0]
+
+    with tempfile.TemporaryDirectory(prefix="fsdata_harness_") as tmp:
+        work = Path(tmp)
+        write_stubs(work / "include")
+        include = ["-I", str(work / "include")]
+
+        # O alvo pode ser .c ou .h (-f:fsdata.h); compila sempre como C.
+        obj = work / "fsdata.o"
+        rc, elapsed, rss = measure_compile(
+            [cc, "-x", "c", "-c", str(fsdata), "-o", str(obj)] + cflags + include
+        )
+        if rc != 0:
+            raise SystemExit(f"Falha ao compilar {fsdata} (código {rc}).")
+        result["compile"] = {
+            "seconds": round(elapsed, 4),
+            "peak_rss_kib": rss,
+            "sections": object_sections(obj),
+        }
+
+        if _stop_requested:
+            return result
+
+        main_c = work / "harness.c"
+        main_c.write_text(HARNESS_C, encoding="utf-8")
+        exe = work / "harness"
+        build = subprocess.run(
+            [cc, str(main_c), "-o", str(exe), f"-DFSDATA_SOURCE=\"{fsdata}\""] + cflags + include
+        )
+        if build.returncode != 0:
+            raise SystemExit("Falha ao compilar o programa de teste do harness.")
+
+        dump = work / "fsdata.dump"
+        run = subprocess.run(
+            [str(exe), str(dump), str(args.iterations)], stdout=subprocess.PIPE, text=True
+        )
+        if run.returncode != 0:
+            raise SystemExit(f"Programa de teste falhou (código {run.returncode}).")
+        stats = json.loads(run.stdout)
+        records = parse_dump(dump.read_bytes())
+
+    fragments = fragment_files(fsdata.read_text(encoding="latin-1"))
+    errors = check_records(records, Path(args.fs).resolve() if args.fs else None, fragments)
+    if stats["files"] != stats["numfiles"]:
+        errors.append(f"FS_NUMFILES={stats['numfiles']}, mas a lista contém {stats['files']} arquivos")
+    result["check"] = {
+        "files": stats["files"],
+        "fragment_files": len(fragments),
+        "payload_bytes": sum(len(data) for _, _, data in records),
+        "ok": not errors,
+        "errors": errors,
+    }
+
+    files = max(stats["files"], 1)
+    lookups = args.iterations * files
+    result["lookup"] = {
+        "iterations": args.iterations,
+        "names": stats["files"],
+        # Distribuição uniforme: a média de strcmp é (n + 1) / 2.
+        "avg_comparisons_uniform": (stats["files"] + 1) / 2.0,
+        "ns_per_hit": round(stats["hit_ns_total"] / lookups, 2),
+        "ns_per_miss": round(stats["miss_ns_total"] / max(args.iterations, 1), 2),
+    }
+    return result
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    """Interpreta parâmetros de linha de comando."""
+
+    parser = argparse.ArgumentParser(description="Compila, valida e mede um fsdata.c gerado pelo makefsdata.")
+    parser.add_argument("fsdata", help="Arquivo fsdata.c (ou .h) gerado")
+    parser.add_argument("--fs", help="Diretório de origem para comparar o corpo de cada arquivo")
+    parser.add_argument("--cc", default="gcc", help="Compilador C do host (padrão: gcc)")
+    parser.add_argument("--cflags", default="-O2", help="Flags de compilação (padrão: -O2)")
+    parser.add_argument("--iterations", type=int, default=2000, help="Repetições do benchmark de busca")
+    parser.add_argument("--label", default="", help="Identificação livre (versão/opções do makefsdata)")
+    parser.add_argument("-o", "--output", help="Arquivo JSON de saída (padrão: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    signal.signal(signal.SIGINT, _signal_handler)
+    try:
+        signal.signal(signal.SIGTERM, _signal_handler)
+    except AttributeError:
+        pass
+
+    args = parse_args(argv)
+    result = run_harness(args)
+
+    text = json.dumps(result, indent=2, ensure_ascii=False) + "\n"
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+        sys.stdout.write(f"Resultado gravado em: {args.output}\n")
+    else:
+        sys.stdout.write(text)
+
+    for err in result.get("check", {}).get("errors", []):
+        sys.stderr.write(f"Erro: {err}\n")
+
+    if _stop_requested:
+        return 1
+    return 0 if result.get("check", {}).get("ok") else 1
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main(sys.argv[1:]))
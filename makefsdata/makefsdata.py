@@ -16,15 +16,19 @@ compressão deflate (-defl) e sem cálculo de checksums pré-calculados.
 
 from __future__ import annotations
 
+import base64
+import json
 import os
-import shutil
+import posixpath
+import re
 import signal
 import sys
 import time
 import zlib
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable, List, Optional, Sequence, Tuple
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from urllib.parse import unquote
 
 
 NEWLINE = "\r\n"  # usado apenas dentro de cabeçalhos HTTP
@@ -59,6 +63,39 @@ DEFAULT_CONTENT_TYPE = "text/plain"
 
 SSI_EXTENSIONS = [".shtml", ".shtm", ".ssi"]
 
+# Bundling (-bundle): páginas cujas referências são reescritas e arquivos
+# textuais varridos na poda de arquivos que deixaram de ser referenciados.
+BUNDLE_DEFAULT_THRESHOLD = 2048
+HTML_EXTENSIONS = {"html", "htm", "shtml", "shtm", "ssi"}
+BUNDLE_TEXT_EXTENSIONS = HTML_EXTENSIONS | {"css", "js", "json", "map", "xml", "txt", "svg"}
+
+# Expressões usadas pelo estágio de bundling. A análise é propositalmente
+# léxica (sem parser HTML completo): basta localizar <link>, <script src> vazios
+# e <img>, que são as tags que geram requisições adicionais ao httpd.
+_ASSET_TAG_RE = re.compile(
+    r"<link\b[^>]*>|<script\b[^>]*>\s*</script\s*>|<img\b[^>]*>",
+    re.IGNORECASE,
+)
+_TAG_ATTR_RE = re.compile(
+    r"""([^\s=/>"']+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?"""
+)
+_CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""", re.IGNORECASE)
+_URL_SCHEME_RE = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*:")
+
+# Ordenação por acessos (-hits): requisição em access logs (CLF/Combined) e
+# arquivos padrão tentados pelo httpd do lwIP quando o caminho termina em '/'.
+_ACCESS_LOG_REQUEST_RE = re.compile(r'"[A-Z]+ (\S+)(?: HTTP/[0-9.]+)?"')
+HTTPD_DEFAULT_FILENAMES = ["index.shtml", "index.ssi", "index.shtm", "index.html", "index.htm"]
+
+# Contadores de acesso (-counters): formato de exportação lido por fscounters.py.
+COUNTERS_MAGIC = 0x54435346  # "FSCT" em little-endian
+COUNTERS_VERSION = 1
+COUNTERS_HEADER_SIZE = 12
+
+# Fragmentos fsdata pré-montados (-frag), ex.: respostas x-static do
+# swagger2rest.py. Cada arquivo é descrito por "fsdata-fragment: <nome> <var> <bytes>".
+_FRAGMENT_FILE_RE = re.compile(r"fsdata-fragment:\s+(\S+)\s+(\w+)\s+(\d+)")
+
 _stop_requested = False
 
 # Contadores globais para estatísticas de compressão deflate
@@ -90,6 +127,60 @@ class MakeFsConfig:
     ncompress_exts: Optional[List[str]] = None
     deflate_non_ssi_files: bool = False
     deflate_level: int = 10
+    bundle_threshold: int = 0
+    bundle_concat: bool = False
+    bundle_prune: bool = False
+    hits_file: Optional[Path] = None
+    hot_count: int = 0
+    hot_section: Optional[str] = None
+    counters: bool = False
+    fragments: Optional[List[Path]] = None
+
+
+@dataclass
+class FsFragment:
+    """Fragmento fsdata pré-montado incluído com -frag.
+
+    - files: (nome qualificado, variável sem o prefixo file_, bytes do corpo)
+      na ordem de geração; o último é a raiz da lista do fragmento.
+    """
+
+    path: Path
+    text: str
+    files: List[Tuple[str, str, int]]
+
+
+@dataclass
+class BundlePageReport:
+    """Requisições de uma página HTML antes e depois do bundling."""
+
+    qualified_name: str
+    requests_before: int
+    requests_after: int
+    css_urls_inlined: int = 0
+
+    @property
+    def requests_saved(self) -> int:
+        return self.requests_before - self.requests_after
+
+
+@dataclass
+class BundleResult:
+    """Resultado do estágio de bundling, consumido por generate_fs.
+
+    - entries: lista final (qualified_name, caminho) a ser gravada no fsdata;
+      arquivos sintéticos (concatenações) usam um caminho inexistente apenas
+      para derivar nome e extensão.
+    - contents: conteúdo que substitui a leitura do disco (páginas reescritas
+      e arquivos concatenados).
+    - mtimes: data de modificação dos arquivos sintéticos (para -m).
+    """
+
+    entries: List[Tuple[str, Path]]
+    contents: Dict[str, bytes] = field(default_factory=dict)
+    mtimes: Dict[str, float] = field(default_factory=dict)
+    pages: List[BundlePageReport] = field(default_factory=list)
+    pruned: List[str] = field(default_factory=list)
 
 
 def print_usage() -> None:
@@ -98,7 +189,9 @@ def print_usage() -> None:
     msg = (
         " Usage: htmlgen [targetdir] [-s] [-e] [-11] [-nossi] [-ssi:<filename>] "
         "[-c] [-f:<filename>] [-m] [-svr:<name>] [-x:<ext_list>] [-xc:<ext_list>] "
-        "[-defl<:compr_level>]" + NEWLINE + NEWLINE +
+        "[-defl<:compr_level>] [-bundle<:max_bytes>] [-bundle-concat] "
+        "[-bundle-prune] [-hits:<file>] [-hot:<count>] [-hotsec:<section>] "
+        "[-counters] [-frag:<file>]" + NEWLINE + NEWLINE +
         "   targetdir: relative or absolute path to files to convert" + NEWLINE +
         "   switch -s: toggle processing of subdirectories (default is on)" + NEWLINE +
         "   switch -e: exclude HTTP header from file (header is created at" + NEWLINE +
@@ -115,6 +208,20 @@ def print_usage() -> None:
         "              compress (não serão comprimidas mesmo com -defl)" + NEWLINE +
         "   switch -defl: deflate-compress all non-SSI files (optional ':level'" + NEWLINE +
         "                 where level is [0..10], default=10)" + NEWLINE +
+        "   switch -bundle: inline CSS/JS and turn images into data URIs in" + NEWLINE +
+        f"                   HTML pages when size <= max_bytes (default={BUNDLE_DEFAULT_THRESHOLD})" + NEWLINE +
+        "   switch -bundle-concat: concatenate adjacent stylesheets/scripts" + NEWLINE +
+        "                   that were not inlined (requires -bundle)" + NEWLINE +
+        "   switch -bundle-prune: drop files left unreferenced after bundling" + NEWLINE +
+        "   switch -hits: access log or hit-count file; most requested files" + NEWLINE +
+        "                 are placed first in the FS_ROOT list" + NEWLINE +
+        "   switch -hot: mark the <count> hottest payloads with FSDATA_HOT_ATTR" + NEWLINE +
+        "                (requires -hits)" + NEWLINE +
+        "   switch -hotsec: linker section used by FSDATA_HOT_ATTR" + NEWLINE +
+        "   switch -counters: emit per-file RAM hit/byte counters and a" + NEWLINE +
+        "                     <target>.manifest.json for fscounters.py" + NEWLINE +
+        "   switch -frag: include a prebuilt fsdata fragment (e.g. x-static" + NEWLINE +
+        "                 responses from swagger2rest.py); may be repeated" + NEWLINE +
         "   if targetdir not specified, htmlgen will attempt to" + NEWLINE +
         "   process files in subdirectory 'fs'" + NEWLINE
     )
@@ -146,6 +253,14 @@ def parse_argv(argv: Sequence[str]) -> Tuple[MakeFsConfig, List[str]]:
     ncompress_exts: List[str] = []
     deflate_non_ssi_files = False
     deflate_level = 10
+    bundle_threshold = 0
+    bundle_concat = False
+    bundle_prune = False
+    hits_file: Optional[Path] = None
+    hot_count = 0
+    hot_section: Optional[str] = None
+    counters = False
+    fragments: List[Path] = []
 
     i = 0
     while i < len(argv):
@@ -199,6 +314,38 @@ def parse_argv(argv: Sequence[str]) -> Tuple[MakeFsConfig, List[str]]:
                     f"Deflating all non-SSI files with level {deflate_level} "
                     "(but only if size is reduced)\n"
                 )
+            elif arg == "-bundle" or arg.startswith("-bundle:"):
+                bundle_threshold = BUNDLE_DEFAULT_THRESHOLD
+                if ":" in arg:
+                    try:
+                        bundle_threshold = int(arg.split(":", 1)[1])
+                    except ValueError:
+                        bundle_threshold = -1
+                    if bundle_threshold <= 0:
+                        sys.stderr.write("ERROR: bundle threshold must be a positive number of bytes\n")
+                        sys.exit(1)
+            elif arg == "-bundle-concat":
+                bundle_concat = True
+            elif arg == "-bundle-prune":
+                bundle_prune = True
+            elif arg.startswith("-hits:"):
+                if arg[6:]:
+                    hits_file = Path(arg[6:])
+            elif arg.startswith("-hot:"):
+                try:
+                    hot_count = int(arg[5:])
+                except ValueError:
+                    hot_count = -1
+                if hot_count < 0:
+                    sys.stderr.write("ERROR: hot count must be a non-negative integer\n")
+                    sys.exit(1)
+            elif arg.startswith("-hotsec:"):
+                hot_section = arg[8:] or None
+            elif arg == "-counters":
+                counters = True
+            elif arg.startswith("-frag:"):
+                if arg[6:]:
+                    fragments.append(Path(arg[6:]))
             elif arg in ("-h", "-?", "--help"):
                 print_usage()
                 sys.exit(0)
@@ -225,7 +372,19 @@ def parse_argv(argv: Sequence[str]) -> Tuple[MakeFsConfig, List[str]]:
         ncompress_exts=ncompress_exts or None,
         deflate_non_ssi_files=deflate_non_ssi_files,
         deflate_level=deflate_level,
+        bundle_threshold=bundle_threshold,
+        bundle_concat=bundle_concat,
+        bundle_prune=bundle_prune,
+        hits_file=hits_file,
+        hot_count=hot_count,
+        hot_section=hot_section,
+        counters=counters,
+        fragments=fragments or None,
     )
+    if (bundle_concat or bundle_prune) and not bundle_threshold:
+        sys.stderr.write("Aviso: -bundle-concat/-bundle-prune exigem -bundle; opções ignoradas.\n")
+    if hot_count and hits_file is None:
+        sys.stderr.write("Aviso: -hot exige -hits; opção ignorada.\n")
     return cfg, exclude_exts
 
 
@@ -326,8 +485,13 @@ def build_http_header(
     cfg: MakeFsConfig,
     is_ssi: bool,
     is_compressed: bool,
+    mtime: Optional[float] = None,
 ) -> str:
-    """Constrói cabeçalho HTTP estático, semelhante a file_write_http_header."""
+    """Constrói cabeçalho HTTP estático, semelhante a file_write_http_header.
+
+    `mtime` substitui a data do arquivo em disco para conteúdos sintéticos
+    (ex.: arquivos concatenados pelo bundling).
+    """
 
     # Linha de status
     name = file_path.name
@@ -351,8 +515,9 @@ def build_http_header(
 
     # Last-Modified opcional
     if cfg.include_last_modified:
-        st = file_path.stat()
-        t = time.gmtime(st.st_mtime)
+        if mtime is None:
+            mtime = file_path.stat().st_mtime
+        t = time.gmtime(mtime)
         ts = time.strftime("%a, %d %b %Y %H:%M:%S GMT", t)
         lines.append(f"Last-Modified: {ts}" + NEWLINE)
 
@@ -387,6 +552,468 @@ def write_hex_bytes(out, data: bytes, start_index: int) -> int:
     return i
 
 
+def _parse_tag_attrs(tag: str) -> Dict[str, str]:
+    """Extrai atributos de uma tag HTML como dicionário (nomes em minúsculas)."""
+
+    # Remove '<nome' inicial e '>' final antes de varrer os atributos.
+    body = re.sub(r"^<\w+", "", tag).rstrip(">").rstrip("/")
+    attrs: Dict[str, str] = {}
+    for m in _TAG_ATTR_RE.finditer(body):
+        value = next((g for g in m.groups()[1:] if g is not None), "")
+        attrs[m.group(1).lower()] = value
+    return attrs
+
+
+def _resolve_local_ref(ref: str, base_qualified: str) -> Optional[str]:
+    """Converte uma referência (href/src/url()) em nome qualificado local.
+
+    Retorna None para URLs externas, data URIs e âncoras, que não geram
+    requisições ao httpd do dispositivo.
+    """
+
+    ref = ref.strip()
+    if not ref or ref.startswith(("#", "//")) or _URL_SCHEME_RE.match(ref):
+        return None
+    ref = unquote(ref.split("#", 1)[0].split("?", 1)[0])
+    if not ref:
+        return None
+    if not ref.startswith("/"):
+        ref = posixpath.join(posixpath.dirname(base_qualified), ref)
+    return posixpath.normpath(ref)
+
+
+def _content_type_for(qualified_name: str) -> str:
+    """Tipo MIME a partir da extensão do nome qualificado."""
+
+    ext = posixpath.splitext(qualified_name)[1].lstrip(".").lower()
+    return CONTENT_TYPE_MAP.get(ext, DEFAULT_CONTENT_TYPE)
+
+
+def _data_uri(qualified_name: str, data: bytes) -> str:
+    """Monta um data URI base64 para o conteúdo informado."""
+
+    encoded = base64.b64encode(data).decode("ascii")
+    return f"data:{_content_type_for(qualified_name)};base64,{encoded}"
+
+
+class _Bundler:
+    """Estado do estágio de bundling para uma execução de generate_fs.
+
+    O conteúdo é tratado como latin-1 para que bytes arbitrários (UTF-8 ou
+    não) sejam preservados exatamente ao reescrever as páginas.
+    """
+
+    def __init__(self, entries: List[Tuple[str, Path]], cfg: MakeFsConfig) -> None:
+        self.cfg = cfg
+        self.entries = entries
+        self.paths: Dict[str, Path] = dict(entries)
+        self.cache: Dict[str, bytes] = {}
+        self.consumed: Set[str] = set()
+        self.synthetic: Dict[str, bytes] = {}
+        self.mtimes: Dict[str, float] = {}
+        self.bundle_names: Dict[Tuple[str, ...], str] = {}
+
+    def read(self, qualified: str) -> bytes:
+        data = self.cache.get(qualified)
+        if data is None:
+            data = self.paths[qualified].read_bytes()
+            self.cache[qualified] = data
+        return data
+
+    def is_small(self, qualified: str) -> bool:
+        return len(self.read(qualified)) <= self.cfg.bundle_threshold
+
+    def rewrite_css(self, css: str, css_qualified: str, report: BundlePageReport) -> str:
+        """Ajusta url() de um CSS que muda de local (inline ou concatenado).
+
+        Imagens pequenas viram data URIs; as demais passam a usar o caminho
+        absoluto, já que o CSS deixa de estar no seu diretório original.
+        """
+
+        def repl(m: "re.Match[str]") -> str:
+            target = _resolve_local_ref(m.group(2), css_qualified)
+            if target is None or target not in self.paths:
+                return m.group(0)
+            if _content_type_for(target).startswith("image/") and self.is_small(target):
+                self.consumed.add(target)
+                report.css_urls_inlined += 1
+                return f"url({_data_uri(target, self.read(target))})"
+            return f"url({target})"
+
+        return _CSS_URL_RE.sub(repl, css)
+
+    def bundle_page(self, page: str) -> Tuple[bytes, BundlePageReport]:
+        """Reescreve uma página HTML, retornando o novo conteúdo e o relatório."""
+
+        html = self.read(page).decode("latin-1")
+        report = BundlePageReport(page, 0, 0)
+        # Cada item: [início, fim, tipo, alvo, atributos, substituição]
+        items: List[list] = []
+
+        for m in _ASSET_TAG_RE.finditer(html):
+            tag = m.group(0)
+            attrs = _parse_tag_attrs(tag)
+            name = tag[1:].split(None, 1)[0].split(">", 1)[0].lower()
+            if name == "link":
+                if "stylesheet" not in attrs.get("rel", "").lower().split():
+                    continue
+                kind, ref = "css", attrs.get("href", "")
+            elif name == "script":
+                if attrs.get("type", "text/javascript").lower() not in (
+                    "text/javascript", "application/javascript", ""
+                ):
+                    continue
+                kind, ref = "js", attrs.get("src", "")
+            else:
+                kind, ref = "img", attrs.get("src", "")
+            target = _resolve_local_ref(ref, page)
+            if target is None or target not in self.paths:
+                continue
+            report.requests_before += 1
+            items.append([m.start(), m.end(), kind, target, attrs, None])
+
+        for item in items:
+            _start, _end, kind, target, attrs, _ = item
+            if not self.is_small(target):
+                continue
+            text = self.read(target).decode("latin-1")
+            if kind == "css":
+                media = attrs.get("media")
+                open_tag = f'<style media="{media}">' if media else "<style>"
+                # "</style" numa string ou comentário fecharia o <style> antes da hora;
+                # "\/" é só "/" escapado para o CSS.
+                css = re.sub(r"</(style)", r"<\\/\1", self.rewrite_css(text, target, report), flags=re.IGNORECASE)
+                item[5] = open_tag + css + "</style>"
+            elif kind == "js":
+                # async/defer não têm efeito em scripts inline: mantém o arquivo.
+                if "async" in attrs or "defer" in attrs:
+                    continue
+                item[5] = "<script>" + text.replace("</script", "<\\/script") + "</script>"
+            else:
+                if not _content_type_for(target).startswith("image/"):
+                    continue
+                tag = html[item[0]:item[1]]
+                uri = _data_uri(target, self.read(target))
+                item[5] = re.sub(
+                    r"""(\bsrc\s*=\s*)("[^"]*"|'[^']*'|[^\s>]+)""",
+                    lambda mm: f'{mm.group(1)}"{uri}"',
+                    tag,
+                    count=1,
+                    flags=re.IGNORECASE,
+                )
+            self.consumed.add(target)
+
+        saved = sum(1 for item in items if item[5] is not None)
+        if self.cfg.bundle_concat:
+            saved += self.concat_runs(html, items, report)
+        report.requests_after = report.requests_before - saved
+
+        out: List[str] = []
+        pos = 0
+        for start, end, _kind, _target, _attrs, replacement in items:
+            if replacement is None:
+                continue
+            out.append(html[pos:start])
+            out.append(replacement)
+            pos = end
+        out.append(html[pos:])
+        return "".join(out).encode("latin-1"), report
+
+    def concat_runs(self, html: str, items: List[list], report: BundlePageReport) -> int:
+        """Agrupa folhas de estilo/scripts adjacentes não inlineados.
+
+        Somente sequências contíguas (separadas apenas por espaços) são
+        unidas, preservando a ordem de avaliação em relação a blocos inline.
+        Retorna o número de requisições economizadas.
+        """
+
+        run: List[list] = []
+        saved = 0
+
+        def eligible(item: list) -> bool:
+            _s, _e, kind, _t, attrs, replacement = item
+            if replacement is not None or kind == "img":
+                return False
+            if kind == "css":
+                return attrs.get("media", "all").lower() in ("", "all")
+            return "async" not in attrs and "defer" not in attrs
+
+        def flush() -> None:
+            nonlocal saved
+            if len(run) >= 2:
+                kind = run[0][2]
+                sources = tuple(item[3] for item in run)
+                bundle = self.concat_bundle(kind, sources, report)
+                if kind == "css":
+                    run[0][5] = f'<link rel="stylesheet" href="{bundle}">'
+                else:
+                    run[0][5] = f'<script src="{bundle}"></script>'
+                for item in run[1:]:
+                    item[5] = ""
+                saved += len(run) - 1
+            run.clear()
+
+        for item in items:
+            if run and (
+                not eligible(item)
+                or item[2] != run[-1][2]
+                or html[run[-1][1]:item[0]].strip()
+            ):
+                flush()
+            if eligible(item):
+                run.append(item)
+        flush()
+        return saved
+
+    def concat_bundle(self, kind: str, sources: Tuple[str, ...], report: BundlePageReport) -> str:
+        """Cria (ou reutiliza) o arquivo concatenado para a sequência `sources`."""
+
+        name = self.bundle_names.get(sources)
+        if name is not None:
+            return name
+        if kind == "css":
+            parts = [self.rewrite_css(self.read(s).decode("latin-1"), s, report) for s in sources]
+            joined = "\n".join(parts)
+        else:
+            joined = "\n;\n".join(self.read(s).decode("latin-1") for s in sources)
+        digest = zlib.crc32("\0".join(sources).encode("utf-8"))
+        name = f"/bundle-{digest:08x}.{kind}"
+        while name in self.paths:
+            digest = (digest + 1) & 0xFFFFFFFF
+            name = f"/bundle-{digest:08x}.{kind}"
+        self.bundle_names[sources] = name
+        self.synthetic[name] = joined.encode("latin-1")
+        self.mtimes[name] = max(self.paths[s].stat().st_mtime for s in sources)
+        self.consumed.update(sources)
+        return name
+
+    def prune(self, entries: List[Tuple[str, Path]], contents: Dict[str, bytes]) -> List[str]:
+        """Remove arquivos consumidos pelo bundling que não são mais citados.
+
+        Um arquivo só é removido se o seu nome base não aparecer em nenhum
+        outro arquivo textual restante (critério conservador). A varredura é
+        repetida até estabilizar, pois remover um CSS pode liberar imagens
+        que só ele referenciava.
+        """
+
+        alive = {q for q, _ in entries}
+        pruned: List[str] = []
+        changed = True
+        while changed:
+            changed = False
+            texts = {
+                q: (contents.get(q) or self.read(q)).decode("latin-1")
+                for q in alive
+                if posixpath.splitext(q)[1].lstrip(".").lower() in BUNDLE_TEXT_EXTENSIONS
+            }
+            for q in sorted(self.consumed & alive):
+                base = posixpath.basename(q)
+                if any(base in text for other, text in texts.items() if other != q):
+                    continue
+                alive.discard(q)
+                pruned.append(q)
+                changed = True
+        return pruned
+
+
+def bundle_assets(entries: List[Tuple[str, Path]], cfg: MakeFsConfig) -> BundleResult:
+    """Estágio de bundling executado antes de process_file.
+
+    Em alvos lwIP o número de PCBs TCP simultâneos é pequeno, então cada
+    requisição extra de uma página pesa na latência de carregamento. Aqui
+    CSS/JS até `cfg.bundle_threshold` bytes são embutidos no HTML e imagens
+    pequenas viram data URIs; opcionalmente, sequências de CSS/JS maiores são
+    concatenadas e arquivos que ficaram sem referência são descartados.
+    """
+
+    bundler = _Bundler(entries, cfg)
+    result = BundleResult(entries=list(entries))
+
+    for qualified, _full in entries:
+        if _stop_requested:
+            break
+        if posixpath.splitext(qualified)[1].lstrip(".").lower() not in HTML_EXTENSIONS:
+            continue
+        data, report = bundler.bundle_page(qualified)
+        result.pages.append(report)
+        if data != bundler.read(qualified):
+            result.contents[qualified] = data
+
+    root = cfg.target_dir.resolve()
+    for name, data in bundler.synthetic.items():
+        result.entries.append((name, root / name.lstrip("/")))
+        result.contents[name] = data
+    result.mtimes.update(bundler.mtimes)
+
+    if cfg.bundle_prune:
+        result.pruned = bundler.prune(result.entries, result.contents)
+        dropped = set(result.pruned)
+        result.entries = [(q, p) for q, p in result.entries if q not in dropped]
+
+    return result
+
+
+def print_bundle_report(result: BundleResult) -> None:
+    """Mostra as requisições economizadas por página pelo bundling."""
+
+    if not result.pages:
+        sys.stdout.write("\nBundling: nenhuma página HTML encontrada.\n")
+        return
+    sys.stdout.write("\nBundling (requisições por página: antes -> depois, economizadas):\n")
+    total_saved = 0
+    for page in result.pages:
+        total_saved += page.requests_saved
+        extra = ""
+        if page.css_urls_inlined:
+            extra = f" (+{page.css_urls_inlined} url() de CSS embutidas)"
+        sys.stdout.write(
+            f"  {page.qualified_name}: {page.requests_before} -> {page.requests_after}, "
+            f"economia de {page.requests_saved}{extra}\n"
+        )
+    sys.stdout.write(f"  Total de requisições economizadas: {total_saved}\n")
+    for name in result.pruned:
+        sys.stdout.write(f"  Removido (sem referências após bundling): {name}\n")
+    sys.stdout.write("\n")
+
+
+def load_hit_counts(path: Path) -> Dict[str, int]:
+    """Lê um access log ou arquivo de contagem de acessos.
+
+    Formatos aceitos, detectados linha a linha:
+      - access log (Common/Combined Log Format): `"GET /index.html HTTP/1.1"`
+        conta 1 acesso para o caminho requisitado;
+      - arquivo de contagem: `<contagem> <caminho>` ou `<caminho> <contagem>`,
+        separados por espaço, tab ou vírgula.
+    Linhas vazias ou iniciadas por '#' são ignoradas. Query string e
+    fragmento são removidos do caminho.
+    """
+
+    hits: Dict[str, int] = {}
+    try:
+        lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
+    except OSError as exc:
+        raise SystemExit(f"Falha ao ler arquivo de acessos '{path}': {exc}")
+
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        m = _ACCESS_LOG_REQUEST_RE.search(line)
+        if m:
+            name, count = m.group(1), 1
+        else:
+            parts = [p for p in re.split(r"[\s,;]+", line) if p]
+            if len(parts) != 2:
+                continue
+            if parts[0].isdigit():
+                count, name = int(parts[0]), parts[1]
+            elif parts[1].isdigit():
+                name, count = parts[0], int(parts[1])
+            else:
+                continue
+        name = unquote(name.split("#", 1)[0].split("?", 1)[0])
+        if not name.startswith("/"):
+            continue
+        hits[name] = hits.get(name, 0) + count
+    return hits
+
+
+def _lookup_cost(name: str, position: Dict[str, int], num_files: int) -> Optional[int]:
+    """Número de strcmp que fs_open gasta para atender `name`.
+
+    Caminhos terminados em '/' seguem a lista de arquivos padrão do httpd:
+    cada tentativa sem sucesso percorre a lista inteira (`num_files`
+    comparações). Retorna None se nenhum arquivo da imagem atende o caminho.
+    """
+
+    if not name.endswith("/"):
+        pos = position.get(name)
+        return None if pos is None else pos
+    cost = 0
+    for default in HTTPD_DEFAULT_FILENAMES:
+        pos = position.get(name + default)
+        if pos is not None:
+            return cost + pos
+        cost += num_files
+    return None
+
+
+def average_lookup_comparisons(chain: Sequence[str], hits: Dict[str, int]) -> Tuple[float, int]:
+    """Média ponderada de strcmp por requisição para uma ordem da lista.
+
+    `chain` está na ordem percorrida por fs_open (a partir de FS_ROOT).
+    Retorna (média, requisições consideradas); acessos a caminhos fora da
+    imagem são descartados, pois custam o mesmo em qualquer ordem.
+    """
+
+    position = {name: i + 1 for i, name in enumerate(chain)}
+    total_cost = 0
+    total_hits = 0
+    for name, count in hits.items():
+        cost = _lookup_cost(name, position, len(chain))
+        if cost is None:
+            continue
+        total_cost += cost * count
+        total_hits += count
+    if not total_hits:
+        return 0.0, 0
+    return total_cost / total_hits, total_hits
+
+
+def hits_per_file(entries: List[Tuple[str, Path]], hits: Dict[str, int]) -> Dict[str, int]:
+    """Agrega as contagens por arquivo da imagem.
+
+    Requisições a diretórios ('/') são atribuídas ao arquivo padrão que as
+    atende; caminhos fora da imagem são descartados.
+    """
+
+    names = {q for q, _ in entries}
+    per_file: Dict[str, int] = {}
+    for name, count in hits.items():
+        if name.endswith("/"):
+            name = next((name + d for d in HTTPD_DEFAULT_FILENAMES if name + d in names), name)
+        if name in names:
+            per_file[name] = per_file.get(name, 0) + count
+    return per_file
+
+
+def order_entries_by_hits(
+    entries: List[Tuple[str, Path]],
+    per_file: Dict[str, int],
+) -> List[Tuple[str, Path]]:
+    """Reordena os arquivos para que os mais acessados sejam achados primeiro.
+
+    Cada `fsdata_file` aponta para o anterior e FS_ROOT é o último gerado,
+    portanto fs_open percorre a lista na ordem inversa do processamento.
+    A ordenação é estável: arquivos com a mesma contagem mantêm a posição
+    relativa original.
+    """
+
+    chain = list(reversed(entries))
+    chain.sort(key=lambda item: -per_file.get(item[0], 0))
+    return list(reversed(chain))
+
+
+def print_ordering_report(
+    before: Sequence[str],
+    after: Sequence[str],
+    hits: Dict[str, int],
+    hot: Set[str],
+) -> None:
+    """Mostra o custo médio de busca em fs_open antes e depois da reordenação."""
+
+    avg_before, counted = average_lookup_comparisons(before, hits)
+    avg_after, _ = average_lookup_comparisons(after, hits)
+    total = sum(hits.values())
+    sys.stdout.write("\nOrdenação por acessos (fs_open percorre a lista a partir de FS_ROOT):\n")
+    sys.stdout.write(f"  Requisições consideradas: {counted} de {total}\n")
+    sys.stdout.write(f"  Comparações médias por requisição: antes {avg_before:.2f}, depois {avg_after:.2f}\n")
+    for name in after[:5]:
+        mark = " [hot]" if name in hot else ""
+        sys.stdout.write(f"    {name}{mark}\n")
+    sys.stdout.write("\n")
+
+
 def process_file(
     data_file,
     struct_file,
@@ -395,14 +1022,22 @@ def process_file(
     cfg: MakeFsConfig,
     last_var_name: str,
     used_names: List[str],
+    content: Optional[bytes] = None,
+    mtime: Optional[float] = None,
+    hot: bool = False,
 ) -> Tuple[str, int]:
-    """Gera entradas de dados e struct para um arquivo único."""
+    """Gera entradas de dados e struct para um arquivo único.
+
+    `content`/`mtime`, quando informados, substituem o conteúdo e a data do
+    arquivo em disco (páginas reescritas pelo bundling). `hot` marca o array
+    com FSDATA_HOT_ATTR para posicioná-lo em memória mais rápida.
+    """
 
     # Nome da variável C
     varname = make_c_identifier(qualified_name, used_names)
 
     # Dados do arquivo
-    file_bytes = full_path.read_bytes()
+    file_bytes = full_path.read_bytes() if content is None else content
     file_size = len(file_bytes)
     is_ssi = is_ssi_file(full_path)
 
@@ -456,7 +1091,8 @@ def process_file(
     content_type = CONTENT_TYPE_MAP.get(ext, DEFAULT_CONTENT_TYPE)
     compression_str = "yes" if is_compressed else "no"
 
-    data_file.write(f"static const unsigned char data_{varname}[] = {{\n")
+    hot_attr = "FSDATA_HOT_ATTR " if hot else ""
+    data_file.write(f"static const unsigned char {hot_attr}data_{varname}[] = {{\n")
     data_file.write(
         f"/* file: {name_str} | mime: {content_type} | size: {file_size} bytes | compressed: {compression_str} */\n"
     )
@@ -478,7 +1114,7 @@ def process_file(
     # Cabeçalho HTTP opcional: vem logo após o nome
     prefix_len = name_prefix_len
     if cfg.include_http_header:
-        header_str = build_http_header(full_path, file_size, cfg, is_ssi, is_compressed)
+        header_str = build_http_header(full_path, file_size, cfg, is_ssi, is_compressed, mtime)
         header_bytes = header_str.encode("ascii", errors="ignore")
         idx = write_hex_bytes(data_file, header_bytes, idx)
         prefix_len += len(header_bytes)
@@ -544,13 +1180,173 @@ def process_file(
     return varname, 1
 
 
-def concat_files(file1: Path, file2: Path, target: Path) -> None:
-    """Concatena dois arquivos binários em `target` (fsdata.tmp + fshdr.tmp)."""
+def load_fragment(path: Path) -> FsFragment:
+    """Lê um fragmento -frag e a descrição dos arquivos que ele contém."""
+
+    try:
+        text = path.read_text(encoding="utf-8")
+    except OSError as exc:
+        sys.stderr.write(f"Erro ao ler fragmento {path}: {exc}\n")
+        sys.exit(1)
+    files = [(m.group(1), m.group(2), int(m.group(3))) for m in _FRAGMENT_FILE_RE.finditer(text)]
+    if not files:
+        sys.stderr.write(f"Aviso: fragmento {path} não descreve nenhum arquivo (linhas fsdata-fragment:).\n")
+    return FsFragment(path=path, text=text, files=files)
 
-    with target.open("wb") as fout:
-        for src in (file1, file2):
-            with src.open("rb") as fin:
-                shutil.copyfileobj(fin, fout)
+
+def link_fragment(fragment: FsFragment, last_var_name: str) -> str:
+    """Liga o fim da lista do fragmento ao último arquivo já gerado.
+
+    O primeiro arquivo do fragmento aponta para file_NULL; ele passa a apontar
+    para `last_var_name`, encadeando fragmentos sucessivos.
+    """
+
+    if not fragment.files:
+        return fragment.text
+    first = fragment.files[0][1]
+    marker = f"struct fsdata_file file_{first}[] = {{ {{\nfile_NULL,"
+    if marker not in fragment.text:
+        sys.stderr.write(f"Erro: fragmento {fragment.path} sem a struct file_{first} encadeada em file_NULL.\n")
+        sys.exit(1)
+    return fragment.text.replace(marker, marker.replace("file_NULL", f"file_{last_var_name}"), 1)
+
+
+def counters_image_id(chain: Sequence[str]) -> int:
+    """Identificador da imagem: CRC32 dos nomes na ordem da lista FS_ROOT.
+
+    Gravado no fsdata e no manifesto, permite ao decodificador detectar um
+    dump vindo de um firmware com outra imagem de arquivos.
+    """
+
+    return zlib.crc32("\0".join(chain).encode("utf-8")) & 0xFFFFFFFF
+
+
+def write_counter_table(struct_file, chain: Sequence[Tuple[str, str]], cfg: MakeFsConfig) -> None:
+    """Emite a tabela de contadores de acesso por arquivo (-counters).
+
+    `chain` contém (qualified_name, varname) na ordem percorrida por fs_open,
+    de modo que o índice do contador é a posição do arquivo a partir de
+    FS_ROOT: o laço de fs_open já conhece esse índice sem custo adicional.
+    A tabela fica em RAM zerada (.bss), 8 bytes por arquivo.
+    """
+
+    target_is_header = str(cfg.target_filename).lower().endswith(".h")
+    storage = "static " if target_is_header else ""
+    # Em headers as funções ficam 'static inline' para não gerar avisos de
+    # função não usada nos módulos que incluem o arquivo.
+    fn_storage = "static inline " if target_is_header else ""
+    image_id = counters_image_id([q for q, _ in chain])
+    w = struct_file.write
+    w("/* Contadores de acesso por arquivo (makefsdata -counters).\n")
+    w(" * Indice = posicao do arquivo na lista a partir de FS_ROOT (0 = FS_ROOT).\n")
+    w(" * Nao sao atomicos: chame os macros apenas a partir da thread tcpip. */\n")
+    w(f"#define FSDATA_IMAGE_ID 0x{image_id:08x}UL\n")
+    w(f"#define FSDATA_COUNTERS_MAGIC 0x{COUNTERS_MAGIC:08x}UL /* \"FSCT\" */\n")
+    w(f"#define FSDATA_COUNTERS_VERSION {COUNTERS_VERSION}\n")
+    w(f"#define FSDATA_COUNTERS_EXPORT_SIZE ({COUNTERS_HEADER_SIZE}u + 8u * FS_NUMFILES)\n")
+    w("#ifndef FSDATA_COUNTERS_ATTR\n#define FSDATA_COUNTERS_ATTR\n#endif\n\n")
+    w("typedef struct fsdataCounter {\n")
+    w("    u32_t hits;\n")
+    w("    u32_t bytes;\n")
+    w("} fsdataCounter_t;\n\n")
+    w(f"{storage}FSDATA_COUNTERS_ATTR fsdataCounter_t fsdataCounters[FS_NUMFILES];\n\n")
+    w(f"{storage}const struct fsdata_file *const fsdataCounterFiles[FS_NUMFILES] = {{\n")
+    for qualified, varname in chain:
+        comment = qualified.encode("ascii", errors="replace").decode("ascii")
+        w(f"file_{varname}, /* {comment} */\n")
+    w("};\n\n")
+    w("/* Chamado por fs_open ao encontrar o arquivo de indice idx; len conta os\n")
+    w(" * bytes servidos direto da memoria (use 0 se o envio passar por fs_read). */\n")
+    w("#define FSDATA_COUNT_OPEN(idx, len) do { \\\n")
+    w("    fsdataCounters[(idx)].hits++; \\\n")
+    w("    fsdataCounters[(idx)].bytes += (u32_t)(len); \\\n")
+    w("} while (0)\n")
+    w("/* Chamado a cada leitura via fs_read, com n bytes lidos. */\n")
+    w("#define FSDATA_COUNT_READ(idx, n) do { \\\n")
+    w("    fsdataCounters[(idx)].bytes += (u32_t)(n); \\\n")
+    w("} while (0)\n\n")
+    w("/* Indice do contador a partir do ponteiro (busca linear por endereco). */\n")
+    w(f"{fn_storage}int fsdataCounterIndex(const struct fsdata_file *f)\n")
+    w("{\n")
+    w("    int i;\n")
+    w("    for (i = 0; i < FS_NUMFILES; i++) {\n")
+    w("        if (fsdataCounterFiles[i] == f) {\n")
+    w("            return i;\n")
+    w("        }\n")
+    w("    }\n")
+    w("    return -1;\n")
+    w("}\n\n")
+    helper_storage = "static inline " if target_is_header else "static "
+    w(f"{helper_storage}void fsdataPutU32(u8_t *p, u32_t v)\n")
+    w("{\n")
+    w("    p[0] = (u8_t)v;\n")
+    w("    p[1] = (u8_t)(v >> 8);\n")
+    w("    p[2] = (u8_t)(v >> 16);\n")
+    w("    p[3] = (u8_t)(v >> 24);\n")
+    w("}\n\n")
+    w("/* Serializa os contadores no formato de exportacao (little-endian):\n")
+    w(" * magic u32 | versao u8 | reservado u8 | arquivos u16 | image id u32 |\n")
+    w(" * (hits u32, bytes u32) por arquivo. Retorna os bytes escritos ou 0 se\n")
+    w(" * o buffer for menor que FSDATA_COUNTERS_EXPORT_SIZE. */\n")
+    w(f"{fn_storage}u32_t fsdataCountersExport(u8_t *buf, u32_t size)\n")
+    w("{\n")
+    w("    u32_t i;\n")
+    w("    if ((buf == NULL) || (size < FSDATA_COUNTERS_EXPORT_SIZE)) {\n")
+    w("        return 0;\n")
+    w("    }\n")
+    w("    fsdataPutU32(buf, FSDATA_COUNTERS_MAGIC);\n")
+    w("    buf[4] = (u8_t)FSDATA_COUNTERS_VERSION;\n")
+    w("    buf[5] = 0;\n")
+    w("    buf[6] = (u8_t)FS_NUMFILES;\n")
+    w("    buf[7] = (u8_t)(FS_NUMFILES >> 8);\n")
+    w("    fsdataPutU32(buf + 8, FSDATA_IMAGE_ID);\n")
+    w("    for (i = 0; i < FS_NUMFILES; i++) {\n")
+    w(f"        fsdataPutU32(buf + {COUNTERS_HEADER_SIZE} + 8 * i, fsdataCounters[i].hits);\n")
+    w(f"        fsdataPutU32(buf + {COUNTERS_HEADER_SIZE} + 8 * i + 4, fsdataCounters[i].bytes);\n")
+    w("    }\n")
+    w("    return FSDATA_COUNTERS_EXPORT_SIZE;\n")
+    w("}\n\n")
+
+
+def write_counters_manifest(target: Path, chain: Sequence[Tuple[str, str]], sizes: Dict[str, int]) -> Path:
+    """Grava o manifesto índice -> nome usado por fscounters.py."""
+
+    manifest = target.with_name(target.name + ".manifest.json")
+    names = [q for q, _ in chain]
+    payload = {
+        "schema": COUNTERS_VERSION,
+        "image_id": f"0x{counters_image_id(names):08x}",
+        "fsdata": target.name,
+        "files": [
+            {"index": i, "name": q, "var": f"file_{v}", "size": sizes.get(q, 0)}
+            for i, (q, v) in enumerate(chain)
+        ],
+    }
+    write_if_changed(manifest, (json.dumps(payload, indent=2, ensure_ascii=False) + "\n").encode("utf-8"))
+    return manifest
+
+
+def write_if_changed(target: Path, data: bytes) -> bool:
+    """Grava `data` em `target` de forma atômica, apenas se o conteúdo mudou.
+
+    Um arquivo igual não é tocado (a data de modificação fica preservada e o
+    build não recompila o fsdata); a troca usa um temporário no mesmo
+    diretório e os.replace, sem deixar o alvo pela metade.
+    """
+
+    try:
+        if target.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, target)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return True
 
 
 def generate_fs(cfg: MakeFsConfig, exclude_exts: List[str]) -> None:
@@ -564,10 +1360,13 @@ def generate_fs(cfg: MakeFsConfig, exclude_exts: List[str]) -> None:
 
     check_path(cfg.target_dir)
 
-    data_tmp = Path("fsdata.tmp")
-    hdr_tmp = Path("fshdr.tmp")
+    # Temporários ao lado do alvo (e com o PID): execuções simultâneas para
+    # alvos diferentes não disputam o mesmo arquivo no diretório corrente.
+    target = Path(cfg.target_filename)
+    data_tmp = target.with_name(f".{target.name}.{os.getpid()}.data.tmp")
+    hdr_tmp = target.with_name(f".{target.name}.{os.getpid()}.hdr.tmp")
 
-    with data_tmp.open("w", encoding="ascii") as data_file, hdr_tmp.open("w", encoding="ascii") as struct_file:
+    with data_tmp.open("w", encoding="utf-8") as data_file, hdr_tmp.open("w", encoding="utf-8") as struct_file:
         # Cabeçalho inicial do fsdata.c (parte de dados)
         data_file.write("#include \"lwip/apps/fs.h\"\n")
         data_file.write("#include \"lwip/def.h\"\n\n\n")
@@ -583,25 +1382,76 @@ def generate_fs(cfg: MakeFsConfig, exclude_exts: List[str]) -> None:
         data_file.write("#endif\n")
         data_file.write("#ifndef FSDATA_ALIGN_PRE\n#define FSDATA_ALIGN_PRE\n#endif\n")
         data_file.write("#ifndef FSDATA_ALIGN_POST\n#define FSDATA_ALIGN_POST\n#endif\n\n")
+        if cfg.hits_file is not None and cfg.hot_count > 0:
+            # Arrays mais acessados: seção definida por -hotsec ou pelo build.
+            data_file.write("#ifndef FSDATA_HOT_ATTR\n")
+            if cfg.hot_section:
+                data_file.write(f"#define FSDATA_HOT_ATTR __attribute__((section(\"{cfg.hot_section}\")))\n")
+            else:
+                data_file.write("#define FSDATA_HOT_ATTR\n")
+            data_file.write("#endif\n\n")
 
         last_var = "NULL"
         num_files = 0
         used_names: List[str] = []
+        processed: List[Tuple[str, str]] = []
+        sizes: Dict[str, int] = {}
+
+        # Fragmentos pré-montados (-frag) ficam no fim da lista FS_ROOT: os
+        # arquivos do diretório web são encadeados a partir da raiz deles.
+        fragment_files: List[Tuple[str, str]] = []
+        for fragment_path in cfg.fragments or []:
+            fragment = load_fragment(fragment_path)
+            sys.stdout.write(f"incluindo fragmento {fragment_path} ({len(fragment.files)} arquivos)...\n")
+            data_file.write(f"/* fragmento: {fragment_path.name} */\n")
+            data_file.write(link_fragment(fragment, last_var))
+            data_file.write("\n")
+            for qualified, var, size in fragment.files:
+                used_names.append(var)
+                fragment_files.append((qualified, var))
+                sizes[qualified] = size
+                num_files += 1
+            if fragment.files:
+                last_var = fragment.files[-1][1]
 
         # Estatísticas para sugerir ajustes em lwipopts.h
         max_file_size = 0
         max_file_name = ""
         total_bytes = 0
 
-        for qualified, full in iter_files(cfg.target_dir, cfg.process_subdirs, exclude_exts):
+        entries = list(iter_files(cfg.target_dir, cfg.process_subdirs, exclude_exts))
+        bundle = BundleResult(entries=entries)
+        if cfg.bundle_threshold > 0:
+            bundle = bundle_assets(entries, cfg)
+            print_bundle_report(bundle)
+
+        hot: Set[str] = set()
+        if cfg.hits_file is not None:
+            hits = load_hit_counts(cfg.hits_file)
+            per_file = hits_per_file(bundle.entries, hits)
+            before = [q for q, _ in reversed(bundle.entries)]
+            bundle.entries = order_entries_by_hits(bundle.entries, per_file)
+            after = [q for q, _ in reversed(bundle.entries)]
+            hot = {q for q in after[:cfg.hot_count] if per_file.get(q)}
+            print_ordering_report(before, after, hits, hot)
+
+        shadowed = {q for q, _ in fragment_files} & {q for q, _ in bundle.entries}
+        for qualified in sorted(shadowed):
+            sys.stderr.write(f"Aviso: {qualified} existe no diretório web e em um fragmento; o do diretório prevalece.\n")
+
+        for qualified, full in bundle.entries:
             if _stop_requested:
                 break
             sys.stdout.write(f"processando {qualified}...\n")
             sys.stdout.flush()
-            try:
-                file_size = full.stat().st_size
-            except OSError:
-                file_size = 0
+            content = bundle.contents.get(qualified)
+            if content is not None:
+                file_size = len(content)
+            else:
+                try:
+                    file_size = full.stat().st_size
+                except OSError:
+                    file_size = 0
 
             total_bytes += file_size
             if file_size > max_file_size:
@@ -615,27 +1465,37 @@ def generate_fs(cfg: MakeFsConfig, exclude_exts: List[str]) -> None:
                 cfg=cfg,
                 last_var_name=last_var,
                 used_names=used_names,
+                content=content,
+                mtime=bundle.mtimes.get(qualified),
+                hot=qualified in hot,
             )
             num_files += inc
+            processed.append((qualified, last_var))
+            sizes[qualified] = file_size
 
         # Definições finais (FS_ROOT, FS_NUMFILES)
         struct_file.write(f"#define FS_ROOT file_{last_var}\n")
         struct_file.write(f"#define FS_NUMFILES {num_files}\n\n")
 
-    # Concatena temporários no arquivo final
-    target = Path(cfg.target_filename)
+        chain = list(reversed(fragment_files + processed))
+        if cfg.counters:
+            write_counter_table(struct_file, chain, cfg)
+
+    # Concatena temporários no arquivo final (só regrava se mudou)
     sys.stdout.write("\nCriando arquivo alvo...\n\n")
-    concat_files(data_tmp, hdr_tmp, target)
+    if not write_if_changed(target, data_tmp.read_bytes() + hdr_tmp.read_bytes()):
+        sys.stdout.write(f"{target} inalterado (conteúdo idêntico, arquivo preservado).\n")
 
     # Remove temporários
-    try:
-        data_tmp.unlink()
-    except OSError:
-        sys.stderr.write("Aviso: falha ao remover fsdata.tmp\n")
-    try:
-        hdr_tmp.unlink()
-    except OSError:
-        sys.stderr.write("Aviso: falha ao remover fshdr.tmp\n")
+    for tmp in (data_tmp, hdr_tmp):
+        try:
+            tmp.unlink()
+        except OSError:
+            sys.stderr.write(f"Aviso: falha ao remover {tmp}\n")
+
+    if cfg.counters:
+        manifest = write_counters_manifest(target, chain, sizes)
+        sys.stdout.write(f"Manifesto de contadores: {manifest}\n")
 
     sys.stdout.write(f"\nProcessados {num_files} arquivos. Concluído.\n")
     if cfg.deflate_non_ssi_files and overall_data_bytes > 0:
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""Driver único de build: makefsdata.py e swagger2rest.py com cache de conteúdo.
+
+Uso básico:
+    python mkbuild.py [-c mkbuild.json] [--variant <nome> ...] [--force] [--jobs N]
+
+Lê um arquivo de configuração JSON do projeto (diretório web, spec, saídas,
+versão da API e opções de compressão) e executa os dois geradores:
+
+- em paralelo (um processo por gerador, sem reiniciar o interpretador a cada
+  ferramenta); o makefsdata espera o swagger2rest apenas quando usa o
+  fragmento x-static gerado por ele (-frag);
+- somente quando algo mudou: a chave de cada gerador é o SHA-256 do conteúdo
+  das entradas (árvore web ou spec), das opções e do próprio gerador. Com a
+  chave e as saídas iguais às da última execução, o gerador é pulado;
+- com escrita atômica e apenas de arquivos que mudaram (os geradores não
+  tocam saídas idênticas, preservando a data de modificação para o make).
+
+Exemplo de mkbuild.json (caminhos relativos ao próprio arquivo):
+
+    {
+      "swagger2rest": {"spec_dir": "RESTfull", "output": "Sources/rest_endpoints.h", "api_version": 1},
+      "makefsdata": {
+        "target_dir": "WebReact/dist", "output": "Sources/fsdata.c",
+        "deflate": 9, "no_compress": ["png"], "exclude": ["map"],
+        "fragments": ["Sources/rest_endpoints_fsdata.h"], "options": ["-counters"]
+      },
+      "variants": {
+        "f429": {"makefsdata": {"output": "build/f429/fsdata.c"}},
+        "h743": {"makefsdata": {"output": "build/h743/fsdata.c", "deflate": false}}
+      }
+    }
+
+Cada variante sobrepõe, seção a seção, as chaves da configuração base; use
+--variant várias vezes (ou --all-variants) para gerar várias placas em uma
+única execução. Gerações idênticas entre variantes (mesma ferramenta e mesmos
+argumentos) rodam uma só vez. O estado do cache fica em `cache` (padrão:
+.mkbuild-cache.json ao lado da configuração).
+
+O script trata SIGINT/SIGTERM para encerramento gracioso.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+TOOLS = {
+    "makefsdata": ROOT_DIR / "makefsdata" / "makefsdata.py",
+    "swagger2rest": ROOT_DIR / "swagger" / "swagger2rest.py",
+}
+CACHE_VERSION = 1
+DEFAULT_CONFIG = "mkbuild.json"
+DEFAULT_CACHE = ".mkbuild-cache.json"
+
+_stop_requested = False
+
+
+def _signal_handler(signum, _frame) -> None:
+    """Sinaliza encerramento gracioso do script."""
+
+    global _stop_requested
+    _stop_requested = True
+    sys.stderr.write(f"\nInterrupção solicitada (signal {signum}). Encerrando...\n")
+    sys.stderr.flush()
+
+
+@dataclass
+class Job:
+    """Uma execução de gerador (ferramenta + argumentos) e suas dependências."""
+
+    name: str
+    tool: str
+    argv: List[str]
+    inputs: List[Path]
+    outputs: List[Path]
+    after: List[str] = field(default_factory=list)
+    optional: List[Path] = field(default_factory=list)
+    mtime_sensitive: bool = False
+    key: str = ""
+
+    @property
+    def cache_id(self) -> str:
+        """Identificador estável no cache (independe da variante que gerou o job)."""
+
+        return f"{self.tool}:{self.outputs[0]}"
+
+
+def _resolve(base: Path, value: str) -> Path:
+    path = Path(value)
+    return path if path.is_absolute() else (base / path)
+
+
+def load_config(path: Path) -> Dict:
+    """Lê o mkbuild.json, encerrando com mensagem clara em caso de erro."""
+
+    try:
+        config = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f"Erro ao ler configuração {path}: {exc}")
+    if not isinstance(config, dict):
+        raise SystemExit(f"Configuração inválida em {path}: objeto JSON esperado.")
+    return config
+
+
+def merge_variant(config: Dict, variant: Optional[str]) -> Dict:
+    """Configuração base com as seções da variante sobrepostas (chave a chave)."""
+
+    merged = {k: (dict(v) if isinstance(v, dict) else v) for k, v in config.items() if k != "variants"}
+    if variant is None:
+        return merged
+    variants = config.get("variants") or {}
+    if variant not in variants:
+        raise SystemExit(f"Variante desconhecida: {variant} (disponíveis: {', '.join(sorted(variants)) or '-'})")
+    for section, values in (variants[variant] or {}).items():
+        if isinstance(values, dict) and isinstance(merged.get(section), dict):
+            merged[section].update(values)
+        else:
+            merged[section] = values
+    return merged
+
+
+def swagger_fragment_path(header: Path) -> Path:
+    """Fragmento x-static gravado pelo swagger2rest ao lado do header."""
+
+    return header.with_name(header.stem + "_fsdata.h")
+
+
+def plan_jobs(config: Dict, base: Path, label: str) -> List[Job]:
+    """Converte uma configuração (já com a variante aplicada) em jobs."""
+
+    jobs: List[Job] = []
+    rest_outputs: List[Path] = []
+    swagger = config.get("swagger2rest")
+    if isinstance(swagger, dict):
+        spec_dir = _resolve(base, str(swagger.get("spec_dir", ".")))
+        header = _resolve(base, str(swagger["output"]))
+        version = int(swagger.get("api_version", 1))
+        rest_outputs = [header, header.with_suffix(".c"), swagger_fragment_path(header)]
+        jobs.append(Job(
+            name=f"{label}swagger2rest",
+            tool="swagger2rest",
+            argv=[str(spec_dir), "-o", str(header), "-v", str(version)],
+            inputs=[spec_dir],
+            outputs=rest_outputs,
+        ))
+
+    fsdata = config.get("makefsdata")
+    if isinstance(fsdata, dict):
+        target_dir = _resolve(base, str(fsdata.get("target_dir", "fs")))
+        output = _resolve(base, str(fsdata.get("output", "fsdata.c")))
+        argv = [str(target_dir), f"-f:{output}"]
+        deflate = fsdata.get("deflate", False)
+        if deflate is True:
+            argv.append("-defl")
+        elif deflate not in (False, None):
+            argv.append(f"-defl:{int(deflate)}")
+        if fsdata.get("http11"):
+            argv.append("-11")
+        if fsdata.get("exclude"):
+            argv.append("-x:" + ",".join(fsdata["exclude"]))
+        if fsdata.get("no_compress"):
+            argv.append("-xc:" + ",".join(fsdata["no_compress"]))
+        inputs = [target_dir]
+        after: List[str] = []
+        optional: List[Path] = []
+        for raw in fsdata.get("fragments") or []:
+            fragment = _resolve(base, str(raw))
+            if fragment in rest_outputs:
+                after = [jobs[0].name]
+                optional.append(fragment)
+            argv.append(f"-frag:{fragment}")
+            inputs.append(fragment)
+        options = [str(o) for o in fsdata.get("options") or []]
+        for opt in options:
+            if opt.startswith("-hits:"):
+                inputs.append(_resolve(base, opt[6:]))
+        argv.extend(options)
+        outputs = [output]
+        if "-counters" in options:
+            outputs.append(output.with_name(output.name + ".manifest.json"))
+        jobs.append(Job(
+            name=f"{label}makefsdata",
+            tool="makefsdata",
+            argv=argv,
+            inputs=inputs,
+            outputs=outputs,
+            after=after,
+            optional=optional,
+            mtime_sensitive="-m" in options,
+        ))
+    return jobs
+
+
+def _hash_file(digest, path: Path, with_mtime: bool) -> None:
+    digest.update(path.read_bytes())
+    if with_mtime:
+        digest.update(str(int(path.stat().st_mtime)).encode("ascii"))
+
+
+def compute_key(job: Job) -> str:
+    """SHA-256 do gerador, dos argumentos e do conteúdo de todas as entradas."""
+
+    digest = hashlib.sha256()
+    digest.update(f"mkbuild:{CACHE_VERSION}\0{job.tool}\0".encode("utf-8"))
+    digest.update(TOOLS[job.tool].read_bytes())
+    digest.update("\0".join(job.argv).encode("utf-8"))
+    for source in job.inputs:
+        if source.is_dir():
+            for path in sorted(p for p in source.rglob("*") if p.is_file()):
+                digest.update(b"\0F" + path.relative_to(source).as_posix().encode("utf-8") + b"\0")
+                _hash_file(digest, path, job.mtime_sensitive)
+        elif source.is_file():
+            digest.update(b"\0I" + str(source).encode("utf-8") + b"\0")
+            _hash_file(digest, source, job.mtime_sensitive)
+        else:
+            digest.update(b"\0M" + str(source).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def output_digests(job: Job) -> Dict[str, str]:
+    """SHA-256 das saídas existentes (detecta saídas apagadas ou editadas)."""
+
+    digests: Dict[str, str] = {}
+    for path in job.outputs:
+        if path.is_file():
+            digests[str(path)] = hashlib.sha256(path.read_bytes()).hexdigest()
+    return digests
+
+
+def is_up_to_date(job: Job, cache: Dict) -> bool:
+    entry = cache.get(job.cache_id)
+    if not isinstance(entry, dict) or entry.get("key") != job.key:
+        return False
+    recorded = entry.get("outputs") or {}
+    return bool(recorded) and recorded == output_digests(job)
+
+
+def run_tool(tool: str, argv: Sequence[str]) -> Tuple[int, str, float]:
+    """Executa o main() de uma ferramenta no processo corrente.
+
+    A saída é capturada e devolvida para ser impressa em bloco pelo driver
+    (sem intercalar linhas de geradores que rodam em paralelo).
+    """
+
+    import importlib.util
+
+    path = TOOLS[tool]
+    spec = importlib.util.spec_from_file_location(f"_mkbuild_{tool}", path)
+    module = importlib.util.module_from_spec(spec)
+    output = io.StringIO()
+    handlers = {sig: signal.getsignal(sig) for sig in (signal.SIGINT, getattr(signal, "SIGTERM", None)) if sig}
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        try:
+            sys.modules[spec.name] = module  # dataclasses resolvem o módulo pelo nome
+            spec.loader.exec_module(module)
+            code = module.main(list(argv))
+        except SystemExit as exc:
+            code = exc.code if isinstance(exc.code, int) else (0 if exc.code is None else 1)
+            if isinstance(exc.code, str):
+                output.write(exc.code + "\n")
+        except Exception as exc:  # noqa: BLE001 - relatado ao driver
+            output.write(f"Erro inesperado em {tool}: {exc!r}\n")
+            code = 1
+        finally:
+            for sig, handler in handlers.items():
+                signal.signal(sig, handler)
+    return int(code or 0), output.getvalue(), time.perf_counter() - start
+
+
+def load_cache(path: Path) -> Dict:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("schema") != CACHE_VERSION:
+        return {}
+    return data.get("jobs") or {}
+
+
+def save_cache(path: Path, jobs: Dict) -> None:
+    data = json.dumps({"schema": CACHE_VERSION, "jobs": jobs}, indent=2, sort_keys=True) + "\n"
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(data, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def dedupe_jobs(jobs: List[Job]) -> List[Job]:
+    """Une jobs idênticos de variantes diferentes (mesma ferramenta e argumentos)."""
+
+    unique: Dict[Tuple[str, Tuple[str, ...]], Job] = {}
+    renamed: Dict[str, str] = {}
+    for job in jobs:
+        key = (job.tool, tuple(job.argv))
+        if key in unique:
+            renamed[job.name] = unique[key].name
+        else:
+            unique[key] = job
+    result = list(unique.values())
+    for job in result:
+        job.after = [renamed.get(name, name) for name in job.after]
+    return result
+
+
+def run_jobs(jobs: List[Job], cache: Dict, force: bool, max_workers: int) -> int:
+    """Executa os jobs respeitando dependências; retorna o número de falhas."""
+
+    pending = {job.name: job for job in jobs}
+    done: Dict[str, bool] = {}
+    running: Dict[Future, Job] = {}
+    failures = 0
+
+    def report(job: Job, status: str, text: str = "") -> None:
+        sys.stdout.write(f"[{job.name}] {status}\n")
+        if text:
+            sys.stdout.write("".join(f"    {line}\n" for line in text.rstrip("\n").splitlines()))
+        sys.stdout.flush()
+
+    executor = ProcessPoolExecutor(max_workers=max_workers) if max_workers > 1 else None
+    try:
+        while (pending or running) and not _stop_requested:
+            for name in list(pending):
+                job = pending[name]
+                if any(dep not in done for dep in job.after):
+                    continue
+                del pending[name]
+                if not all(done[dep] for dep in job.after):
+                    report(job, "não executado (dependência falhou)")
+                    done[name] = False
+                    failures += 1
+                    continue
+                # Fragmento do swagger2rest: sem GETs x-static ele não é gravado.
+                missing = {f"-frag:{p}" for p in job.optional if not p.is_file()}
+                job.argv = [a for a in job.argv if a not in missing]
+                for path in job.outputs:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                job.key = compute_key(job)
+                if not force and is_up_to_date(job, cache):
+                    report(job, "em dia (entradas inalteradas), pulado")
+                    done[name] = True
+                    continue
+                if executor is None:
+                    code, text, elapsed = run_tool(job.tool, job.argv)
+                    failures += _finish(job, code, text, elapsed, cache, done, report)
+                else:
+                    running[executor.submit(run_tool, job.tool, job.argv)] = job
+            if not running:
+                if pending and all(any(dep not in done for dep in j.after) for j in pending.values()):
+                    for job in pending.values():
+                        report(job, "dependência inexistente ou circular")
+                        failures += 1
+                    break
+                continue
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                job = running.pop(future)
+                code, text, elapsed = future.result()
+                failures += _finish(job, code, text, elapsed, cache, done, report)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+    return failures
+
+
+def _finish(job: Job, code: int, text: str, elapsed: float, cache: Dict, done: Dict[str, bool], report) -> int:
+    ok = code == 0
+    done[job.name] = ok
+    if ok:
+        cache[job.cache_id] = {"key": job.key, "outputs": output_digests(job)}
+        report(job, f"gerado em {elapsed:.2f} s", text)
+        return 0
+    cache.pop(job.cache_id, None)
+    report(job, f"falhou (código {code})", text)
+    return 1
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    """Interpreta parâmetros de linha de comando."""
+
+    parser = argparse.ArgumentParser(description="Executa makefsdata.py e swagger2rest.py com cache de conteúdo.")
+    parser.add_argument("-c", "--config", default=DEFAULT_CONFIG,
+                        help=f"Configuração JSON do projeto (padrão: {DEFAULT_CONFIG})")
+    parser.add_argument("--variant", action="append", default=[],
+                        help="Variante da configuração (pode repetir; padrão: configuração base)")
+    parser.add_argument("--all-variants", action="store_true", help="Gera todas as variantes da configuração")
+    parser.add_argument("--only", choices=sorted(TOOLS), help="Executa apenas um dos geradores")
+    parser.add_argument("--force", action="store_true", help="Ignora o cache e executa todos os geradores")
+    parser.add_argument("-j", "--jobs", type=int, default=2,
+                        help="Processos em paralelo (padrão: 2; 1 = sequencial no próprio processo)")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    signal.signal(signal.SIGINT, _signal_handler)
+    try:
+        signal.signal(signal.SIGTERM, _signal_handler)
+    except AttributeError:
+        pass
+
+    args = parse_args(argv)
+    config_path = Path(args.config).resolve()
+    config = load_config(config_path)
+    base = config_path.parent
+
+    variants: List[Optional[str]] = list(args.variant)
+    if args.all_variants:
+        variants = sorted((config.get("variants") or {}).keys())
+    if not variants:
+        variants = [None]
+
+    jobs: List[Job] = []
+    for variant in variants:
+        label = f"{variant}:" if variant else ""
+        jobs.extend(plan_jobs(merge_variant(config, variant), base, label))
+    if args.only:
+        jobs = [job for job in jobs if job.tool == args.only]
+        for job in jobs:
+            job.after = []
+    jobs = dedupe_jobs(jobs)
+    if not jobs:
+        sys.stderr.write("Aviso: nenhuma seção makefsdata/swagger2rest na configuração.\n")
+        return 0
+
+    cache_path = _resolve(base, str(config.get("cache", DEFAULT_CACHE)))
+    cache = load_cache(cache_path)
+    start = time.perf_counter()
+    failures = run_jobs(jobs, cache, args.force, max(1, args.jobs))
+    save_cache(cache_path, cache)
+    sys.stdout.write(f"\n{len(jobs)} gerações, {failures} falhas, {time.perf_counter() - start:.2f} s no total.\n")
+
+    if _stop_requested:
+        return 1
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,38 @@
+#!/usr/bin/env bash
+# fsdata_harness.sh - Wrapper para executar o harness de host fsdata_harness.py
+#
+# Projeto : mk-lwip-httpd-fs
+# Proposito: Compilar, validar e medir um fsdata.c gerado, usando o gcc do host
+# Autor   : Carlos Delfino
+# Data    : 2026-10-19
+# Dependencias: Python 3 e gcc (ou --cc); ambiente virtual opcional em
+#            - MakeFSdataProjPlusExample/venv
+#            - venv-mk-lwip-httpd-fs/ na raiz do projeto
+#
+# Uso:
+#   ./scripts/fsdata_harness.sh <fsdata.c> [--fs <targetdir>] [opções]
+# Os parâmetros são repassados diretamente ao fsdata_harness.py.
+
+set -euo pipefail
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_ROOT="$(cd "${SCRIPT_DIR}/.." && pwd)"
+# SUBPROJ_DIR deve apontar para a raiz "makefs" (já calculada em PROJECT_ROOT)
+SUBPROJ_DIR="${PROJECT_ROOT}"
+
+PYTHON=""
+
+if [[ -x "${SUBPROJ_DIR}/venv/bin/python" ]]; then
+  PYTHON="${SUBPROJ_DIR}/venv/bin/python"
+elif [[ -x "${PROJECT_ROOT}/venv-mk-lwip-httpd-fs/bin/python" ]]; then
+  PYTHON="${PROJECT_ROOT}/venv-mk-lwip-httpd-fs/bin/python"
+elif command -v python3 >/dev/null 2>&1; then
+  PYTHON="python3"
+elif command -v python >/dev/null 2>&1; then
+  PYTHON="python"
+else
+  echo "Erro: Python nao encontrado no sistema nem em ambientes virtuais conhecidos." >&2
+  exit 1
+fi
+
+exec "${PYTHON}" "${SUBPROJ_DIR}/makefsdata/fsdata_harness.py" "$@"
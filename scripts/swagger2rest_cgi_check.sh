@@ -0,0 +1,38 @@
+#!/usr/bin/env bash
+# swagger2rest_cgi_check.sh - Wrapper para executar o swagger2rest_cgi_check.py
+#
+# Projeto : mk-lwip-httpd-fs
+# Proposito: Verificar no host o dispatcher gerado no modo CGI (LWIP_HTTPD_CGI_SSI)
+# Autor   : Carlos Delfino
+# Data    : 2026-10-19
+# Dependencias: Python 3; ambiente virtual opcional em
+#            - MakeFSdataProjPlusExample/venv
+#            - venv-mk-lwip-httpd-fs/ na raiz do projeto
+#
+# Uso:
+#   ./scripts/swagger2rest_cgi_check.sh [--cc gcc] [--cflags "-O1"] [--keep DIR]
+# Os parâmetros são repassados diretamente ao swagger2rest_cgi_check.py.
+
+set -euo pipefail
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_ROOT="$(cd "${SCRIPT_DIR}/.." && pwd)"
+# SUBPROJ_DIR deve apontar para a raiz "makefs" (já calculada em PROJECT_ROOT)
+SUBPROJ_DIR="${PROJECT_ROOT}"
+
+PYTHON=""
+
+if [[ -x "${SUBPROJ_DIR}/venv/bin/python" ]]; then
+  PYTHON="${SUBPROJ_DIR}/venv/bin/python"
+elif [[ -x "${PROJECT_ROOT}/venv-mk-lwip-httpd-fs/bin/python" ]]; then
+  PYTHON="${PROJECT_ROOT}/venv-mk-lwip-httpd-fs/bin/python"
+elif command -v python3 >/dev/null 2>&1; then
+  PYTHON="python3"
+elif command -v python >/dev/null 2>&1; then
+  PYTHON="python"
+else
+  echo "Erro: Python nao encontrado no sistema nem em ambientes virtuais conhecidos." >&2
+  exit 1
+fi
+
+exec "${PYTHON}" "${SUBPROJ_DIR}/swagger/swagger2rest_cgi_check.py" "$@"
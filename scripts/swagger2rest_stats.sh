@@ -0,0 +1,39 @@
+#!/usr/bin/env bash
+# swagger2rest_stats.sh - Wrapper para executar o decodificador swagger2rest_stats.py
+#
+# Projeto : mk-lwip-httpd-fs
+# Proposito: Traduzir o dump de GET /api/vN/_stats (REST_STATS) para operationId e path
+# Autor   : Carlos Delfino
+# Data    : 2026-10-19
+# Dependencias: Python 3; ambiente virtual opcional em
+#            - MakeFSdataProjPlusExample/venv
+#            - venv-mk-lwip-httpd-fs/ na raiz do projeto
+#
+# Uso:
+#   ./scripts/swagger2rest_stats.sh <swagger_dir> -v 1 --url http://<ip>/api/v1/_stats
+#   ./scripts/swagger2rest_stats.sh <swagger_dir> -v 1 dump.json [--sort max] [--json]
+# Os parâmetros são repassados diretamente ao swagger2rest_stats.py.
+
+set -euo pipefail
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_ROOT="$(cd "${SCRIPT_DIR}/.." && pwd)"
+# SUBPROJ_DIR deve apontar para a raiz "makefs" (já calculada em PROJECT_ROOT)
+SUBPROJ_DIR="${PROJECT_ROOT}"
+
+PYTHON=""
+
+if [[ -x "${SUBPROJ_DIR}/venv/bin/python" ]]; then
+  PYTHON="${SUBPROJ_DIR}/venv/bin/python"
+elif [[ -x "${PROJECT_ROOT}/venv-mk-lwip-httpd-fs/bin/python" ]]; then
+  PYTHON="${PROJECT_ROOT}/venv-mk-lwip-httpd-fs/bin/python"
+elif command -v python3 >/dev/null 2>&1; then
+  PYTHON="python3"
+elif command -v python >/dev/null 2>&1; then
+  PYTHON="python"
+else
+  echo "Erro: Python nao encontrado no sistema nem em ambientes virtuais conhecidos." >&2
+  exit 1
+fi
+
+exec "${PYTHON}" "${SUBPROJ_DIR}/swagger/swagger2rest_stats.py" "$@"
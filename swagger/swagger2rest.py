@@ -14,8 +14,34 @@ Uso básico:
 
 Comportamento adicional:
 - Gera, no mesmo diretório do header, um arquivo .c com a mesma base de nome
-  (ex.: rest_endpoints.c) contendo o array restEndpoints[] e restEndpointCount.
-- Se ainda não existirem, gera também stubs de dispatcher REST:
+  (ex.: rest_endpoints.c) contendo a lógica gerada em C: o roteador compilado
+  (árvore radix de segmentos, restRouteLookup(), com patterns e rótulos em
+  um pool único de strings referenciado por offsets) e o dispatcher ligado aos
+  callbacks httpd_post_* do lwIP, que entrega o corpo dos POSTs ao endpoint
+  em partes (pbuf a pbuf). O array restEndpoints[] e restEndpointCount
+  continuam no header.
+- Para cada operação com parâmetros de path/query ou corpo JSON, gera um
+  struct restReq_<op>_t de layout fixo e um parser JSON especializado no
+  schema (sem alocação), que o preenche antes da chamada do handler.
+- Para cada resposta JSON em `responses`, gera um struct restRes_<op>_<status>_t,
+  o tamanho máximo serializado (<nome>_MAX_LENGTH) e restRespond_<op>_<status>(),
+  que serializa o struct sem alocação (em partes, se necessário).
+- GETs marcados com `x-static` têm a resposta (exemplo JSON do spec) pré-montada
+  em <header>_fsdata.h, um fragmento no formato do fsdata servido pelo httpd
+  sem passar pelo dispatcher (makefsdata.py -frag:<arquivo>).
+- Operações com `x-rate-limit` ganham um balde de tokens (global ou por
+  cliente) verificado pelo dispatcher antes do handler; excedido o limite, a
+  resposta é um 429 pré-montado, sem slot nem handler.
+- GETs com `x-cache-ttl` guardam a última resposta 200 em um buffer fixo de
+  RAM (chaveado pelos parâmetros de path) e a servem sem chamar o handler
+  até o TTL expirar ou uma função restCacheInvalidate_<op>() ser chamada.
+- Operações com `x-async` podem adiar a resposta: o handler reserva um token
+  (restAsyncDefer) e retorna REST_PENDING; uma tarefa conclui com
+  restAsyncComplete(), que retoma o envio na thread tcpip (tcpip_callback).
+- Com REST_STATS 1, o dispatcher mede cada handler (chamadas, erros, bytes e
+  tempo via REST_STATS_NOW()) e responde GET <prefixo>/_stats; o script
+  swagger2rest_stats.py traduz o dump para operationId e path.
+- Se ainda não existirem, gera também os ganchos fs_open_custom/fs_close_custom:
     rest_dispatcher.h e rest_dispatcher.c
 
 O script trata SIGINT/SIGTERM para encerramento gracioso.
@@ -25,11 +51,16 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
+import re
 import signal
 import sys
-from dataclasses import dataclass
+import zlib
+from dataclasses import dataclass, field
+from http import HTTPStatus
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import unquote
 
 _stop_requested = False
 
@@ -50,6 +81,18 @@ class Endpoint:
     path: str
     method: str
     handler_name: str
+    operation: Dict = field(default_factory=dict, repr=False)
+    body_handler_name: str = ""
+    max_body_length: Optional[int] = 0
+    parameters: List[Dict] = field(default_factory=list, repr=False)
+    request: Optional["JsonStruct"] = None
+    body_required: bool = False
+    responses: List["ResponseModel"] = field(default_factory=list, repr=False)
+    static: Optional["StaticResponse"] = None
+    rate_limit: Optional["RateLimit"] = None
+    cache: Optional["ResponseCache"] = None
+    deferred: bool = False
+    query: bool = False
 
 
 HTTP_METHODS = [
@@ -94,173 +137,4837 @@ def find_swagger_file(swagger_dir: Path) -> Path:
     )
 
 
+_SLASHES_RE = re.compile(r"/{2,}")
+_NON_WORD_RE = re.compile(r"\W")
+
+
 def normalize_path(path: str) -> str:
     """Normaliza um path Swagger para iniciar com '/' e remover barras duplicadas."""
 
-    if not path.startswith("/"):
-        path = "/" + path
-    # Remove barras duplas internas
-    while "//" in path:
-        path = path.replace("//", "/")
-    return path
+    if not path.startswith("/"):
+        path = "/" + path
+    # Remove barras duplas internas (uma única passada)
+    return _SLASHES_RE.sub("/", path)
+
+
+def build_handler_name(method: str, path: str) -> str:
+    """Gera o nome de função C para o handler a partir de método + path."""
+
+    # remove prefixo inicial
+    if path.startswith("/"):
+        path = path[1:]
+
+    # remove chaves de parâmetros {id}; demais não alfanuméricos viram '_'
+    base = _NON_WORD_RE.sub("_", path.replace("{", "").replace("}", "")).strip("_") or "root"
+
+    return f"restHandle_{method.upper()}_{base}"
+
+
+def body_handler_name(handler_name: str) -> str:
+    """Nome do callback de corpo (restBody_*) correspondente a um handler."""
+
+    return "restBody_" + handler_name[len("restHandle_"):]
+
+
+def _body_schemas(op: Dict) -> List[Dict]:
+    """Schemas do corpo da requisição (OpenAPI 3 requestBody ou Swagger 2 `in: body`)."""
+
+    schemas: List[Dict] = []
+    request_body = op.get("requestBody")
+    if isinstance(request_body, dict):
+        for media in (request_body.get("content") or {}).values():
+            if isinstance(media, dict) and isinstance(media.get("schema"), dict):
+                schemas.append(media["schema"])
+    for param in op.get("parameters") or []:
+        if isinstance(param, dict) and param.get("in") in ("body", "formData"):
+            schemas.append(param.get("schema") if isinstance(param.get("schema"), dict) else param)
+    return schemas
+
+
+def operation_has_body(op: Dict) -> bool:
+    """Indica se a operação declara corpo de requisição."""
+
+    if isinstance(op.get("requestBody"), dict):
+        return True
+    return any(
+        isinstance(p, dict) and p.get("in") in ("body", "formData") for p in op.get("parameters") or []
+    )
+
+
+def operation_max_body_length(op: Dict) -> Optional[int]:
+    """Tamanho máximo do corpo declarado no spec (None = usar o padrão do firmware).
+
+    Ordem de procura: `x-max-body-size` na operação, `x-max-body-size` no
+    requestBody e, por fim, o maior `maxLength` entre os schemas do corpo.
+    """
+
+    request_body = op.get("requestBody") if isinstance(op.get("requestBody"), dict) else {}
+    for holder in (op, request_body):
+        value = holder.get("x-max-body-size")
+        if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+            return value
+    lengths = [
+        s["maxLength"]
+        for s in _body_schemas(op)
+        if isinstance(s.get("maxLength"), int) and not isinstance(s.get("maxLength"), bool)
+    ]
+    return max(lengths) if lengths else None
+
+
+def extract_endpoints(swagger: Dict, api_prefix: str) -> List[Endpoint]:
+    """Extrai a lista de endpoints a partir da estrutura do Swagger/OpenAPI."""
+
+    paths = swagger.get("paths")
+    if not isinstance(paths, dict):
+        raise SystemExit("Swagger/OpenAPI JSON inválido: objeto 'paths' não encontrado.")
+
+    endpoints: List[Endpoint] = []
+    routes: Set[Tuple[str, str]] = set()
+    handler_routes: Dict[str, str] = {}
+
+    for raw_path, item in paths.items():
+        if _stop_requested:
+            break
+        if not isinstance(item, dict):
+            continue
+
+        # Garante path normalizado
+        raw_path = normalize_path(str(raw_path))
+
+        # Aplica prefixo /api/vX se ainda não estiver presente
+        full_path = raw_path
+        if not full_path.startswith(api_prefix):
+            # Evita duplicar barra
+            if raw_path.startswith("/"):
+                full_path = api_prefix + raw_path
+            else:
+                full_path = api_prefix + "/" + raw_path
+
+        for method, op in item.items():
+            if method.lower() not in HTTP_METHODS:
+                continue
+            if not isinstance(op, dict):
+                continue
+
+            route = f"{method.upper()} {full_path}"
+            if (method.lower(), full_path) in routes:
+                sys.stderr.write(f"Aviso: rota duplicada {route} (após normalização); ignorada.\n")
+                continue
+            routes.add((method.lower(), full_path))
+
+            # Paths distintos podem gerar o mesmo nome (ex.: /a-b e /a_b,
+            # /x/{id} e /x/id): o segundo recebe sufixo numérico.
+            handler_name = build_handler_name(method, full_path)
+            if handler_name in handler_routes:
+                n = 2
+                while f"{handler_name}_{n}" in handler_routes:
+                    n += 1
+                unique = f"{handler_name}_{n}"
+                sys.stderr.write(
+                    f"Aviso: {route} gera o mesmo handler que {handler_routes[handler_name]} "
+                    f"({handler_name}); usando {unique}.\n"
+                )
+                handler_name = unique
+            handler_routes[handler_name] = route
+            has_body = operation_has_body(op)
+            endpoints.append(
+                Endpoint(
+                    path=full_path,
+                    method=method.lower(),
+                    handler_name=handler_name,
+                    operation=op,
+                    body_handler_name=body_handler_name(handler_name) if has_body else "",
+                    max_body_length=operation_max_body_length(op) if has_body else 0,
+                    parameters=list(item.get("parameters") or []) + list(op.get("parameters") or []),
+                )
+            )
+
+    return endpoints
+
+
+C_KEYWORDS = {
+    "auto", "break", "case", "char", "const", "continue", "default", "do", "double", "else", "enum",
+    "extern", "float", "for", "goto", "if", "inline", "int", "long", "register", "restrict", "return",
+    "short", "signed", "sizeof", "static", "struct", "switch", "typedef", "union", "unsigned", "void",
+    "volatile", "while", "bool", "true", "false", "class", "new", "delete", "this", "template",
+}
+
+# Limite de campos por struct: cada campo ocupa um bit de `present`.
+JSON_MAX_FIELDS = 32
+
+JSON_KIND_CONSTANTS = {
+    "string": "REST_JSON_T_STRING",
+    "int": "REST_JSON_T_INT",
+    "int64": "REST_JSON_T_INT64",
+    "number": "REST_JSON_T_NUMBER",
+    "float": "REST_JSON_T_FLOAT",
+    "bool": "REST_JSON_T_BOOL",
+    "object": "REST_JSON_T_OBJECT",
+    "array": "REST_JSON_T_ARRAY",
+}
+
+
+def c_identifier(name: str) -> str:
+    """Converte um nome do spec em identificador C válido."""
+
+    ident = "".join(ch if (ch.isascii() and ch.isalnum()) else "_" for ch in name).strip("_") or "field"
+    if ident[0].isdigit():
+        ident = "_" + ident
+    if ident in C_KEYWORDS:
+        ident += "_"
+    return ident
+
+
+def _unique_name(name: str, used: Set[str]) -> str:
+    """Acrescenta sufixo numérico até o nome não colidir com `used`."""
+
+    candidate = name
+    n = 2
+    while candidate in used:
+        candidate = f"{name}{n}"
+        n += 1
+    used.add(candidate)
+    return candidate
+
+
+@dataclass
+class JsonField:
+    """Campo de um struct gerado (propriedade JSON ou parâmetro de path/query).
+
+    Em arrays, `kind` é "array" e `item_kind`/`c_type`/`length`/`struct`
+    descrevem os itens.
+    """
+
+    name: str
+    ident: str
+    kind: str
+    c_type: str = ""
+    length: str = ""
+    struct: Optional["JsonStruct"] = None
+    item_kind: str = ""
+    items: str = ""
+    count_ident: str = ""
+    required: bool = False
+
+
+@dataclass
+class JsonStruct:
+    """Struct C de layout fixo gerado a partir de um schema (ou de uma operação)."""
+
+    type_name: str
+    fields: List[JsonField] = field(default_factory=list)
+    body: Optional["JsonStruct"] = None
+    operation: bool = False
+    index: int = -1
+    request: bool = False   # decodificado pelo parser (gera despacho de chaves)
+    response: bool = False  # serializado pelo writer (gera textos de chave)
+    wrapper: bool = False   # raiz não-objeto: serializa só o valor do campo 0
+
+    @property
+    def base(self) -> str:
+        return self.type_name[:-2]
+
+
+@dataclass
+class ResponseModel:
+    """Resposta JSON tipada de uma operação (um código de status)."""
+
+    name: str
+    status: str
+    struct: JsonStruct
+
+
+@dataclass
+class StaticResponse:
+    """Resposta pré-montada de um GET `x-static`, servida direto do fsdata."""
+
+    status: int
+    body: bytes
+    deflate: bool = False
+    cache_control: str = ""
+
+
+@dataclass
+class RateLimit:
+    """Balde de tokens de um endpoint com `x-rate-limit`."""
+
+    interval: int  # ms para repor um token
+    burst: int
+    per_client: bool = False
+
+    @property
+    def retry_after(self) -> int:
+        """Segundos do Retry-After do 429 (tempo máximo até o próximo token)."""
+
+        return max(1, -(-self.interval // 1000))
+
+
+@dataclass
+class ResponseCache:
+    """Cache de resposta de um GET com `x-cache-ttl`."""
+
+    ttl: int  # ms
+    size: Optional[int] = None  # bytes da resposta completa (None: REST_CACHE_ENTRY_SIZE)
+
+
+class SchemaResolver:
+    """Resolve `$ref` e monta os structs C dos schemas de requisição e resposta.
+
+    Cada `$ref` é resolvido uma única vez (memoizado), e cada schema
+    referenciado gera um único struct `restSchema_<Nome>_t`, compartilhado por
+    todas as operações que o usam. `structs` fica em ordem de dependência
+    (filhos antes dos pais), pronta para emissão em C.
+    """
+
+    def __init__(self, spec: Dict) -> None:
+        self.spec = spec
+        self.structs: List[JsonStruct] = []
+        self._refs: Dict[str, Dict] = {}
+        self._ref_structs: Dict[str, Optional[JsonStruct]] = {}
+        self._resolving: Set[str] = set()
+        self._building: Set[str] = set()
+        self._type_names: Set[str] = set()
+
+    def _pointer(self, ref: str) -> Dict:
+        if not ref.startswith("#/"):
+            sys.stderr.write(f"Aviso: $ref externo não suportado: {ref}\n")
+            return {}
+        node = self.spec
+        for part in ref[2:].split("/"):
+            part = unquote(part).replace("~1", "/").replace("~0", "~")
+            if isinstance(node, dict) and part in node:
+                node = node[part]
+            elif isinstance(node, list) and part.isdigit() and int(part) < len(node):
+                node = node[int(part)]
+            else:
+                sys.stderr.write(f"Aviso: $ref não encontrado: {ref}\n")
+                return {}
+        return node if isinstance(node, dict) else {}
+
+    def resolve(self, schema) -> Dict:
+        """Segue a cadeia de `$ref` até um schema concreto (com memoização)."""
+
+        if not isinstance(schema, dict):
+            return {}
+        ref = schema.get("$ref")
+        if not isinstance(ref, str):
+            return schema
+        cached = self._refs.get(ref)
+        if cached is not None:
+            return cached
+        if ref in self._resolving:
+            sys.stderr.write(f"Aviso: $ref circular: {ref}\n")
+            return {}
+        self._resolving.add(ref)
+        resolved = self.resolve(self._pointer(ref))
+        self._resolving.discard(ref)
+        self._refs[ref] = resolved
+        return resolved
+
+    def schema_type(self, schema) -> str:
+        s = self.resolve(schema)
+        t = s.get("type")
+        if isinstance(t, list):
+            t = next((x for x in t if x != "null"), None)
+        if isinstance(t, str):
+            return t
+        if "properties" in s or "allOf" in s:
+            return "object"
+        if s.get("enum") and all(isinstance(v, str) for v in s["enum"]):
+            return "string"
+        return ""
+
+    def object_view(self, schema) -> Tuple[Dict[str, Dict], Set[str]]:
+        """Propriedades e obrigatórios do objeto, mesclando `allOf`."""
+
+        s = self.resolve(schema)
+        props: Dict[str, Dict] = {}
+        required: Set[str] = set()
+        for part in s.get("allOf") or []:
+            sub_props, sub_required = self.object_view(part)
+            props.update(sub_props)
+            required |= sub_required
+        for name, prop in (s.get("properties") or {}).items():
+            if isinstance(prop, dict):
+                props[str(name)] = prop
+        required |= {str(r) for r in s.get("required") or []}
+        return props, required
+
+    def _new_struct(self, base: str) -> JsonStruct:
+        return JsonStruct(type_name=_unique_name(base, self._type_names) + "_t")
+
+    def _finish(self, struct: JsonStruct) -> JsonStruct:
+        struct.index = len(self.structs)
+        self.structs.append(struct)
+        return struct
+
+    def struct_for(self, schema: Dict, base: str) -> Optional[JsonStruct]:
+        """Struct de um schema de objeto; schemas referenciados são gerados uma vez."""
+
+        ref = schema.get("$ref") if isinstance(schema, dict) else None
+        if not isinstance(ref, str):
+            return self._build(schema, base)
+        if ref in self._ref_structs:
+            return self._ref_structs[ref]
+        if ref in self._building:
+            sys.stderr.write(f"Aviso: schema recursivo não suportado no parser: {ref}\n")
+            return None
+        self._building.add(ref)
+        struct = self._build(schema, "restSchema_" + c_identifier(ref.rsplit("/", 1)[-1]))
+        self._building.discard(ref)
+        self._ref_structs[ref] = struct
+        return struct
+
+    def _build(self, schema: Dict, base: str) -> JsonStruct:
+        struct = self._new_struct(base)
+        props, required = self.object_view(schema)
+        used = {"present"}
+        for name, prop in props.items():
+            f = self.field_for(name, prop, struct.base, used)
+            if f is None:
+                continue
+            f.required = name in required
+            struct.fields.append(f)
+        return self._finish(self._truncate(struct))
+
+    def _truncate(self, struct: JsonStruct) -> JsonStruct:
+        if len(struct.fields) > JSON_MAX_FIELDS:
+            sys.stderr.write(
+                f"Aviso: {struct.type_name} tem {len(struct.fields)} campos; "
+                f"apenas os {JSON_MAX_FIELDS} primeiros são gerados.\n"
+            )
+            del struct.fields[JSON_MAX_FIELDS:]
+        return struct
+
+    def _value(self, schema: Dict, name: str, ident: str, owner: str) -> Optional[JsonField]:
+        s = self.resolve(schema)
+        kind = self.schema_type(schema)
+        if kind == "object":
+            child = self.struct_for(schema, f"{owner}_{ident}")
+            if child is None:
+                return None
+            return JsonField(name, ident, "object", c_type=child.type_name, struct=child)
+        if kind == "string":
+            if isinstance(s.get("maxLength"), int):
+                length = str(s["maxLength"] + 1)
+            elif s.get("enum") and all(isinstance(v, str) for v in s["enum"]):
+                length = str(max(len(v.encode("utf-8")) for v in s["enum"]) + 1)
+            else:
+                length = "REST_JSON_STRING_DEFAULT + 1"
+            return JsonField(name, ident, "string", c_type="char", length=length)
+        if kind == "integer":
+            if s.get("format") == "int64":
+                return JsonField(name, ident, "int64", c_type="long long")
+            return JsonField(name, ident, "int", c_type="long")
+        if kind == "number":
+            if s.get("format") == "float":
+                return JsonField(name, ident, "float", c_type="float")
+            return JsonField(name, ident, "number", c_type="double")
+        if kind == "boolean":
+            return JsonField(name, ident, "bool", c_type="unsigned char")
+        if kind == "array":
+            return JsonField(name, ident, "array")
+        return None
+
+    def field_for(self, name: str, schema: Dict, owner: str, used: Set[str]) -> Optional[JsonField]:
+        """Campo C de uma propriedade/parâmetro (None: tipo não suportado, ignorado)."""
+
+        ident = c_identifier(name)
+        value = self._value(schema, name, ident, owner)
+        if value is not None and value.kind == "array":
+            s = self.resolve(schema)
+            item = self._value(s.get("items") or {}, name, ident, owner)
+            if item is None or item.kind == "array":
+                value = None
+            else:
+                value = JsonField(
+                    name,
+                    ident,
+                    "array",
+                    c_type=item.c_type,
+                    length=item.length,
+                    struct=item.struct,
+                    item_kind=item.kind,
+                    items=str(s["maxItems"]) if isinstance(s.get("maxItems"), int) else "REST_JSON_ARRAY_DEFAULT",
+                )
+        if value is None:
+            sys.stderr.write(f"Aviso: tipo não suportado em {owner}.{name}; campo ignorado pelo parser.\n")
+            return None
+        value.ident = _unique_name(ident, used)
+        if value.kind == "array":
+            value.count_ident = _unique_name(value.ident + "Count", used)
+        return value
+
+    def operation_struct(self, base: str, params: List[Tuple[Dict, Dict, bool]],
+                         body: Optional[JsonStruct]) -> JsonStruct:
+        """Struct da operação: parâmetros de path/query tipados + corpo JSON."""
+
+        struct = self._new_struct(base)
+        struct.operation = True
+        struct.body = body
+        used = {"present", "body"}
+        for param, schema, required in params:
+            f = self.field_for(str(param.get("name")), schema, struct.base, used)
+            if f is None or (f.kind == "object") or (f.kind == "array" and f.item_kind == "object"):
+                continue
+            f.required = required
+            struct.fields.append(f)
+        return self._finish(self._truncate(struct))
+
+    def wrapper_struct(self, base: str, schema: Dict) -> Optional[JsonStruct]:
+        """Struct de uma resposta cuja raiz não é objeto (array ou escalar)."""
+
+        ident = "items" if self.schema_type(schema) == "array" else "value"
+        struct = self._new_struct(base)
+        struct.wrapper = True
+        f = self.field_for(ident, schema, struct.base, {"present"})
+        if f is None:
+            self._type_names.discard(struct.base)
+            return None
+        f.required = True
+        struct.fields.append(f)
+        return self._finish(struct)
+
+
+def mark_struct_usage(struct: JsonStruct, attr: str) -> None:
+    """Marca o struct e seus filhos como usados na requisição ou na resposta."""
+
+    pending = [struct]
+    while pending:
+        current = pending.pop()
+        if getattr(current, attr):
+            continue
+        setattr(current, attr, True)
+        pending.extend(f.struct for f in current.fields if f.struct is not None)
+        if current.body is not None:
+            pending.append(current.body)
+
+
+def _json_body(op: Dict, resolver: SchemaResolver) -> Tuple[Optional[Dict], bool]:
+    """Schema JSON do corpo e se ele é obrigatório (OpenAPI 3 ou Swagger 2)."""
+
+    request_body = resolver.resolve(op.get("requestBody"))
+    for media, content in (request_body.get("content") or {}).items():
+        if "json" in str(media) and isinstance(content, dict) and isinstance(content.get("schema"), dict):
+            return content["schema"], bool(request_body.get("required"))
+    for param in op.get("parameters") or []:
+        param = resolver.resolve(param)
+        if param.get("in") == "body" and isinstance(param.get("schema"), dict):
+            return param["schema"], bool(param.get("required"))
+    return None, False
+
+
+def build_request_models(endpoints: List[Endpoint], resolver: SchemaResolver) -> None:
+    """Gera os structs de requisição por operação e associa-os aos endpoints.
+
+    Operações com corpo JSON de objeto passam a ser atendidas pelo parser
+    gerado (não há restBody_* a implementar); os demais corpos continuam
+    entregues em partes ao restBody_* do endpoint.
+    """
+
+    for ep in endpoints:
+        if _stop_requested:
+            break
+        if ep.static is not None:
+            continue
+        route_params = set(endpoint_param_names(ep.path))
+        merged: Dict[Tuple[str, str], Dict] = {}
+        for raw in ep.parameters:
+            param = resolver.resolve(raw)
+            if param.get("in") in ("path", "query") and param.get("name"):
+                merged[(str(param["name"]), str(param["in"]))] = param
+        params: List[Tuple[Dict, Dict, bool]] = []
+        for (name, location), param in merged.items():
+            if location == "path" and name not in route_params:
+                sys.stderr.write(f"Aviso: parâmetro de path '{name}' ausente em {ep.path}; ignorado.\n")
+                continue
+            schema = param.get("schema") if isinstance(param.get("schema"), dict) else param
+            params.append((param, schema, location == "path" or bool(param.get("required"))))
+
+        body: Optional[JsonStruct] = None
+        body_schema, body_required = _json_body(ep.operation, resolver)
+        if body_schema is not None:
+            if resolver.schema_type(body_schema) == "object":
+                op_name = ep.handler_name[len("restHandle_"):]
+                body = resolver.struct_for(body_schema, f"restReq_{op_name}_Body")
+            else:
+                sys.stderr.write(
+                    f"Aviso: corpo JSON de {ep.method.upper()} {ep.path} não é objeto; "
+                    "entregue em partes ao restBody_*.\n"
+                )
+        if not params and body is None:
+            continue
+        ep.query = any(location == "query" for _name, location in merged)
+        ep.request = resolver.operation_struct(
+            "restReq_" + ep.handler_name[len("restHandle_"):], params, body
+        )
+        mark_struct_usage(ep.request, "request")
+        if body is not None:
+            ep.body_handler_name = ""
+            ep.body_required = body_required
+
+
+def build_response_models(endpoints: List[Endpoint], resolver: SchemaResolver) -> None:
+    """Gera os structs tipados das respostas JSON de cada operação.
+
+    Schemas referenciados continuam compartilhados com as requisições (mesmo
+    struct restSchema_<Nome>_t); respostas inline viram restRes_<op>_<status>_t.
+    """
+
+    for ep in endpoints:
+        if _stop_requested:
+            break
+        if ep.static is not None:
+            continue
+        op_name = ep.handler_name[len("restHandle_"):]
+        responses = ep.operation.get("responses")
+        if not isinstance(responses, dict):
+            continue
+        for status, raw in responses.items():
+            response = resolver.resolve(raw)
+            schema = None
+            for media, content in (response.get("content") or {}).items():
+                if "json" in str(media) and isinstance(content, dict) and isinstance(content.get("schema"), dict):
+                    schema = content["schema"]
+                    break
+            if schema is None and isinstance(response.get("schema"), dict):
+                schema = response["schema"]  # Swagger 2.0
+            if schema is None:
+                continue
+            status_ident = "".join(ch if (ch.isascii() and ch.isalnum()) else "_" for ch in str(status))
+            name = f"restRes_{op_name}_{status_ident}"
+            if resolver.schema_type(schema) == "object":
+                struct = resolver.struct_for(schema, name)
+            else:
+                struct = resolver.wrapper_struct(name, schema)
+            if struct is None:
+                continue
+            mark_struct_usage(struct, "response")
+            ep.responses.append(ResponseModel(name=name, status=str(status), struct=struct))
+
+
+def _response_example(response: Dict, resolver: SchemaResolver) -> Tuple[bool, object]:
+    """Exemplo JSON de uma resposta: `example`, primeiro de `examples` ou do schema."""
+
+    candidates: List[Dict] = []
+    for media, content in (response.get("content") or {}).items():
+        if "json" in str(media) and isinstance(content, dict):
+            if "example" in content:
+                return True, content["example"]
+            for example in (content.get("examples") or {}).values():
+                example = resolver.resolve(example)
+                if "value" in example:
+                    return True, example["value"]
+            candidates.append(resolver.resolve(content.get("schema")))
+    for media, value in (response.get("examples") or {}).items():  # Swagger 2.0
+        if "json" in str(media):
+            return True, value
+    candidates.append(resolver.resolve(response.get("schema")))
+    for schema in candidates:
+        if "example" in schema:
+            return True, schema["example"]
+    return False, None
+
+
+def build_static_responses(endpoints: List[Endpoint], resolver: SchemaResolver) -> None:
+    """Pré-monta a resposta dos GETs marcados com `x-static` na operação.
+
+    O exemplo JSON da resposta vira um arquivo do fsdata no próprio path do
+    endpoint (cabeçalhos calculados aqui, deflate opcional): o httpd o serve
+    como arquivo estático, sem slot nem handler. Aceita `x-static: true` ou
+    um objeto com `status`, `deflate` e `cacheControl`.
+    """
+
+    for ep in endpoints:
+        if _stop_requested:
+            break
+        option = ep.operation.get("x-static")
+        if not option:
+            continue
+        route = f"{ep.method.upper()} {ep.path}"
+        if ep.method != "get" or endpoint_param_names(ep.path):
+            sys.stderr.write(f"Aviso: x-static em {route} exige GET sem parâmetros de path; ignorado.\n")
+            continue
+        settings = option if isinstance(option, dict) else {}
+        responses = ep.operation.get("responses")
+        responses = responses if isinstance(responses, dict) else {}
+        status = str(settings.get("status") or next((s for s in responses if str(s).startswith("2")), "200"))
+        if not (status.isdigit() and len(status) == 3):
+            sys.stderr.write(f"Aviso: x-static em {route} com status inválido '{status}'; ignorado.\n")
+            continue
+        found, example = _response_example(resolver.resolve(responses.get(status)), resolver)
+        if not found:
+            sys.stderr.write(f"Aviso: x-static em {route} sem exemplo JSON na resposta {status}; ignorado.\n")
+            continue
+        ep.static = StaticResponse(
+            status=int(status),
+            body=json.dumps(example, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+            deflate=bool(settings.get("deflate")),
+            cache_control=str(settings.get("cacheControl") or ""),
+        )
+        ep.body_handler_name = ""
+
+
+RATE_LIMIT_PERIODS = {"second": 1000, "minute": 60 * 1000, "hour": 60 * 60 * 1000}
+
+
+def build_rate_limits(endpoints: List[Endpoint]) -> None:
+    """Lê `x-rate-limit` das operações (balde de tokens por endpoint).
+
+    Aceita um número (requisições por segundo) ou um objeto com `rate`,
+    `per` (`second`, `minute` ou `hour`), `burst` (padrão: `rate`
+    arredondado para cima) e `scope` (`global` ou `client`). O balde repõe
+    um token a cada `interval` ms, então a taxa máxima é de 1000 por segundo.
+    """
+
+    for ep in endpoints:
+        if _stop_requested:
+            break
+        option = ep.operation.get("x-rate-limit")
+        if option is None:
+            continue
+        route = f"{ep.method.upper()} {ep.path}"
+        if ep.static is not None:
+            sys.stderr.write(f"Aviso: x-rate-limit em {route} ignorado: GET x-static é servido pelo fsdata.\n")
+            continue
+        settings = option if isinstance(option, dict) else {"rate": option}
+        rate = settings.get("rate")
+        period = RATE_LIMIT_PERIODS.get(str(settings.get("per", "second")))
+        scope = str(settings.get("scope", "global"))
+        if (not isinstance(rate, (int, float)) or isinstance(rate, bool) or rate <= 0 or period is None
+                or scope not in ("global", "client")):
+            sys.stderr.write(f"Aviso: x-rate-limit inválido em {route}: {json.dumps(option)}; ignorado.\n")
+            continue
+        burst = settings.get("burst", -(-rate // 1))
+        if isinstance(burst, float) and burst.is_integer():
+            burst = int(burst)
+        if not isinstance(burst, int) or isinstance(burst, bool) or not (1 <= burst <= 0xFFFF):
+            sys.stderr.write(f"Aviso: x-rate-limit em {route} com burst inválido '{burst}'; ignorado.\n")
+            continue
+        interval = round(period / rate)
+        if interval < 1:
+            sys.stderr.write(f"Aviso: x-rate-limit em {route} acima de 1000/s; limitado a 1000/s.\n")
+            interval = 1
+        elif interval > 0xFFFFFFFF:
+            interval = 0xFFFFFFFF
+        ep.rate_limit = RateLimit(interval=interval, burst=burst, per_client=(scope == "client"))
+
+
+def build_response_caches(endpoints: List[Endpoint], resolver: SchemaResolver) -> None:
+    """Lê `x-cache-ttl` dos GETs (TTL em segundos, ou objeto com `ttl` e `size`).
+
+    A chave do cache são os parâmetros de path: operações que declaram
+    parâmetros de query são recusadas, porque a query não chega ao fs_open
+    quando o handler roda via httpd_cgi_handler. `size` limita a resposta
+    completa (cabeçalho + corpo) guardada; sem ele vale REST_CACHE_ENTRY_SIZE.
+    """
+
+    for ep in endpoints:
+        if _stop_requested:
+            break
+        option = ep.operation.get("x-cache-ttl")
+        if option is None:
+            continue
+        route = f"{ep.method.upper()} {ep.path}"
+        if ep.method != "get" or ep.static is not None:
+            sys.stderr.write(f"Aviso: x-cache-ttl em {route} exige GET com handler; ignorado.\n")
+            continue
+        if any(resolver.resolve(p).get("in") == "query" for p in ep.parameters if isinstance(p, dict)):
+            sys.stderr.write(
+                f"Aviso: x-cache-ttl em {route} ignorado: o cache é chaveado só pelos parâmetros de path.\n"
+            )
+            continue
+        settings = option if isinstance(option, dict) else {"ttl": option}
+        ttl = settings.get("ttl")
+        size = settings.get("size")
+        if not isinstance(ttl, (int, float)) or isinstance(ttl, bool) or ttl <= 0:
+            sys.stderr.write(f"Aviso: x-cache-ttl inválido em {route}: {json.dumps(option)}; ignorado.\n")
+            continue
+        if size is not None and (not isinstance(size, int) or isinstance(size, bool) or not (64 <= size <= 0xFFFF)):
+            sys.stderr.write(f"Aviso: x-cache-ttl em {route} com size inválido '{size}' (64 a 65535); ignorado.\n")
+            continue
+        ep.cache = ResponseCache(ttl=min(max(1, round(ttl * 1000)), 0xFFFFFFFF), size=size)
+
+
+def build_async_endpoints(endpoints: List[Endpoint]) -> None:
+    """Marca as operações com `x-async: true` (conclusão adiada do handler)."""
+
+    for ep in endpoints:
+        if _stop_requested:
+            break
+        option = ep.operation.get("x-async")
+        if option is None or option is False:
+            continue
+        route = f"{ep.method.upper()} {ep.path}"
+        if option is not True:
+            sys.stderr.write(f"Aviso: x-async em {route} deve ser true; ignorado.\n")
+            continue
+        if ep.static is not None:
+            sys.stderr.write(f"Aviso: x-async em {route} ignorado: GET x-static é servido pelo fsdata.\n")
+            continue
+        ep.deferred = True
+
+
+def method_enum_name(method: str) -> str:
+    """Converte método HTTP textual em identificador de enum C."""
+
+    return f"HTTP_METHOD_{method.upper()}"
+
+
+def collect_methods(endpoints: Iterable[Endpoint]) -> List[str]:
+    """Ordem dos valores de httpMethod_t: métodos usados primeiro, depois os demais."""
+
+    # Coleta métodos distintos (dict preserva a ordem de inserção)
+    methods = dict.fromkeys(method_enum_name(ep.method) for ep in endpoints)
+
+    # Garante que todos os métodos padrão existam
+    all_methods = [
+        "HTTP_METHOD_GET",
+        "HTTP_METHOD_POST",
+        "HTTP_METHOD_PUT",
+        "HTTP_METHOD_DELETE",
+        "HTTP_METHOD_PATCH",
+        "HTTP_METHOD_OPTIONS",
+        "HTTP_METHOD_HEAD",
+        "HTTP_METHOD_TRACE",
+        "HTTP_METHOD_CONNECT",
+    ]
+    methods.update(dict.fromkeys(all_methods))
+
+    return list(methods)
+
+
+def path_segments(path: str) -> List[str]:
+    """Divide um path em segmentos, descartando segmentos vazios."""
+
+    return [seg for seg in path.split("/") if seg]
+
+
+def is_param_segment(segment: str) -> bool:
+    """Indica se o segmento é um parâmetro de path (`{nome}`)."""
+
+    return len(segment) > 2 and segment[0] == "{" and segment[-1] == "}"
+
+
+def endpoint_param_names(path: str) -> List[str]:
+    """Nomes dos parâmetros de path, na ordem em que aparecem."""
+
+    return [seg[1:-1] for seg in path_segments(path) if is_param_segment(seg)]
+
+
+@dataclass
+class RouteNode:
+    """Nó da árvore radix de segmentos usada pelo roteador compilado.
+
+    - literals: segmento literal -> índice do nó filho;
+    - param: nó filho para um segmento `{param}` (-1 se não houver);
+    - targets: método HTTP -> índice do endpoint em restEndpoints[];
+    - sources: segmento literal -> (path, posição em bytes) de onde o rótulo
+      é lido no pool de strings (o rótulo não é armazenado à parte).
+    """
+
+    literals: Dict[str, int] = field(default_factory=dict)
+    param: int = -1
+    targets: Dict[str, int] = field(default_factory=dict)
+    sources: Dict[str, Tuple[str, int]] = field(default_factory=dict)
+
+
+def build_route_trie(endpoints: List[Endpoint], quiet: bool = False) -> List[RouteNode]:
+    """Monta a árvore de rotas a partir da lista de endpoints.
+
+    Cada path é inserido uma única vez por segmento (custo linear no total de
+    segmentos). Todos os `{param}` de uma mesma posição compartilham o mesmo
+    nó; o nome do parâmetro fica associado ao endpoint, não ao nó. Com
+    `quiet`, rotas duplicadas são descartadas sem novo aviso.
+    """
+
+    nodes: List[RouteNode] = [RouteNode()]
+    for index, ep in enumerate(endpoints):
+        node = 0
+        encoded = ep.path.encode("utf-8")
+        position = 0
+        for seg in path_segments(ep.path):
+            raw = seg.encode("utf-8")
+            position = encoded.index(raw, position)
+            start, position = position, position + len(raw)
+            current = nodes[node]
+            if is_param_segment(seg):
+                if current.param < 0:
+                    current.param = len(nodes)
+                    nodes.append(RouteNode())
+                node = current.param
+            else:
+                child = current.literals.get(seg)
+                if child is None:
+                    child = len(nodes)
+                    current.literals[seg] = child
+                    current.sources[seg] = (ep.path, start)
+                    nodes.append(RouteNode())
+                node = child
+        targets = nodes[node].targets
+        if ep.method in targets:
+            if quiet:
+                continue
+            sys.stderr.write(
+                f"Aviso: rota duplicada {ep.method.upper()} {ep.path}; mantida a primeira definição.\n"
+            )
+            continue
+        targets[ep.method] = index
+    return nodes
+
+
+def build_route_pool(paths: Iterable[str]) -> Tuple[bytes, Dict[str, int]]:
+    """Blob único com os patterns das rotas, cada um indexado por offset.
+
+    Sem terminadores (o tamanho fica na tabela), um path que é prefixo de
+    outro (ex.: /api/v1/devices e /api/v1/devices/{id}) aponta para o início
+    do mais longo, e os rótulos da árvore são lidos de dentro dos patterns.
+    Com os paths em ordem basta comparar cada um com o seguinte: todas as
+    extensões de um path vêm logo depois dele (custo O(n log n)).
+    """
+
+    ordered = sorted(dict.fromkeys(paths))
+    offsets: Dict[str, int] = {}
+    chunks: List[bytes] = []
+    size = 0
+    for i in range(len(ordered) - 1, -1, -1):
+        path = ordered[i]
+        if (i + 1 < len(ordered)) and ordered[i + 1].startswith(path):
+            offsets[path] = offsets[ordered[i + 1]]
+        else:
+            raw = path.encode("utf-8")
+            offsets[path] = size
+            chunks.append(raw)
+            size += len(raw)
+    return b"".join(chunks), offsets
+
+
+# Tipos inteiros das tabelas do roteador e de restEndpoints[], do mais
+# estreito ao mais largo: (tipo C, maior valor, bytes em ILP32). Os com sinal
+# servem aos campos que usam -1 como "ausente".
+ROUTE_FIELD_TYPES = [
+    ("unsigned char", 0xFF, 1),
+    ("unsigned short", 0xFFFF, 2),
+    ("unsigned long", 0xFFFFFFFF, 4),
+]
+ROUTE_SIGNED_FIELD_TYPES = [
+    ("signed char", 0x7F, 1),
+    ("short", 0x7FFF, 2),
+    ("long", 0x7FFFFFFF, 4),
+]
+
+
+def route_field_type(max_value: int, minimum: str = "unsigned char") -> str:
+    """Menor tipo, a partir de `minimum` (e com o mesmo sinal), que representa max_value."""
+
+    family = ROUTE_SIGNED_FIELD_TYPES if any(name == minimum for name, _l, _s in ROUTE_SIGNED_FIELD_TYPES) \
+        else ROUTE_FIELD_TYPES
+    names = [name for name, _limit, _size in family]
+    for name, limit, _size in family[names.index(minimum):]:
+        if max_value <= limit:
+            return name
+    raise SystemExit(f"Erro: valor {max_value} não cabe em 32 bits nas tabelas de rotas.")
+
+
+def route_field_size(c_type: str) -> int:
+    """Bytes (ILP32) de um tipo de ROUTE_FIELD_TYPES / ROUTE_SIGNED_FIELD_TYPES."""
+
+    return next(size for name, _limit, size in ROUTE_FIELD_TYPES + ROUTE_SIGNED_FIELD_TYPES if name == c_type)
+
+
+def c_struct_size(field_sizes: Iterable[int]) -> int:
+    """Tamanho de uma struct C (ILP32) com campos dos tamanhos dados, com padding."""
+
+    size = 0
+    align = 1
+    for field_size in field_sizes:
+        size = (size + field_size - 1) // field_size * field_size + field_size
+        align = max(align, field_size)
+    return (size + align - 1) // align * align
+
+
+def route_pool_offset_type(pool: bytes) -> str:
+    """Tipo dos offsets no pool: 16 bits sempre que o blob couber neles."""
+
+    return route_field_type(len(pool), "unsigned short")
+
+
+def route_edge_count_type(nodes: List[RouteNode]) -> str:
+    """Tipo de restTrieNode_t.edgeCount: 8 bits enquanto nenhum nó tiver mais de 255 filhos."""
+
+    return route_field_type(max((len(node.literals) for node in nodes), default=0))
+
+
+def route_table_types(endpoints: List[Endpoint], nodes: List[RouteNode], pool: bytes) -> Dict[str, str]:
+    """Tipos dos campos das tabelas do roteador, dimensionados pelos dados.
+
+    Mesma regra de route_pool_offset_type: o tipo de sempre enquanto os
+    valores couberem nele, um mais largo quando não (um rótulo com mais de
+    255 bytes, mais de 65535 nós, arestas ou alvos, ...), em vez de truncar
+    em silêncio.
+    """
+
+    edges = sum(len(node.literals) for node in nodes)
+    targets = sum(len(node.targets) for node in nodes)
+    label = max((len(seg.encode("utf-8")) for node in nodes for seg in node.literals), default=0)
+    return {
+        "label": route_pool_offset_type(pool),
+        "child": route_field_type(len(nodes) - 1, "unsigned short"),
+        "labelLength": route_field_type(label),
+        "firstEdge": route_field_type(edges, "unsigned short"),
+        "paramChild": route_field_type(len(nodes) - 1, "short"),
+        "firstTarget": route_field_type(targets, "unsigned short"),
+        "edgeCount": route_edge_count_type(nodes),
+        "target": route_field_type(max(len(endpoints) - 1, 0), "unsigned short"),
+    }
+
+
+def endpoint_table_types(endpoints: Iterable[Endpoint]) -> Dict[str, str]:
+    """Tipos dos campos dimensionados de restEndpoint_t (índices de schema e pathLength)."""
+
+    schema = 0
+    path = 0
+    for ep in endpoints:
+        if ep.request is not None:
+            schema = max(schema, ep.request.index)
+            if ep.request.body is not None:
+                schema = max(schema, ep.request.body.index)
+        path = max(path, len(ep.path.encode("utf-8")))
+    return {
+        "schema": route_field_type(schema, "short"),
+        "pathLength": route_field_type(path, "unsigned short"),
+    }
+
+
+def route_table_sizes(endpoints: List[Endpoint], nodes: List[RouteNode], pool: bytes) -> Tuple[int, int]:
+    """Estimativa (ILP32) dos bytes de flash das tabelas de rotas: (antes, agora).
+
+    "Antes" é o formato anterior: pattern completo (ponteiro + literal) e
+    método em cada linha de restEndpoints[], rótulos da árvore como literais
+    com ponteiro, alvos (método, endpoint) por linha e tabela de nomes de
+    parâmetros. Literais iguais contam uma vez (como com -fmerge-constants).
+    """
+
+    types = route_table_types(endpoints, nodes, pool)
+    ep_types = endpoint_table_types(endpoints)
+    size = {key: route_field_size(c_type) for key, c_type in {**types, **ep_types}.items()}
+    # Mesma ordem de campos de restEndpoint_t, restTrieEdge_t e restTrieNode_t.
+    endpoint_size = c_struct_size([4, 4, 4, size["schema"], size["schema"], 2, size["label"],
+                                   size["pathLength"], 1, 1])
+    edge_size = c_struct_size([size["label"], size["child"], size["labelLength"]])
+    node_size = c_struct_size([size["firstEdge"], size["paramChild"], size["firstTarget"], 2, size["edgeCount"]])
+    edges = sum(len(node.literals) for node in nodes)
+    targets = sum(len(node.targets) for node in nodes)
+    labels = {seg for node in nodes for seg in node.literals}
+    paths = {ep.path for ep in endpoints}
+    names = {n for ep in endpoints for n in endpoint_param_names(ep.path)}
+    name_tuples = {tuple(endpoint_param_names(ep.path)) for ep in endpoints} - {()}
+
+    before = 28 * len(endpoints) + sum(len(p.encode("utf-8")) + 1 for p in paths)
+    before += 8 * edges + sum(len(label.encode("utf-8")) + 1 for label in labels)
+    before += 8 * targets + 12 * len(nodes)
+    before += 8 * len(endpoints) + sum(4 * len(t) for t in name_tuples)
+    before += sum(len(n.encode("utf-8")) + 1 for n in names)
+
+    after = endpoint_size * len(endpoints) + len(pool) + 1
+    after += edge_size * edges + size["target"] * targets + node_size * len(nodes)
+    return before, after
+
+
+def c_bytes_string(data: bytes, width: Optional[int] = 72) -> str:
+    """Literal de string C com bytes não imprimíveis em octal.
+
+    Quebrado em linhas de até `width` caracteres; com width=None, um único
+    literal em uma linha.
+    """
+
+    parts: List[str] = []
+    current = ""
+    for b in data:
+        ch = chr(b)
+        if ch in "\\\"":
+            piece = "\\" + ch
+        elif 0x20 <= b < 0x7F and ch != "?":
+            piece = ch
+        else:
+            piece = f"\\{b:03o}"
+        if (width is not None) and (len(current) + len(piece) > width):
+            parts.append(f'"{current}"')
+            current = ""
+        current += piece
+    parts.append(f'"{current}"')
+    return "\n    ".join(parts)
+
+
+def c_string_literal(text: str) -> str:
+    """Converte texto em literal de string C (escapando aspas e barras)."""
+
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def generate_router_content(endpoints: List[Endpoint]) -> str:
+    """Gera as tabelas da árvore de rotas e a função restRouteLookup().
+
+    Literais são armazenados por nó em ordem crescente (mesma ordem de
+    memcmp), permitindo busca binária. Na busca, um segmento literal tem
+    prioridade sobre `{param}`; se o ramo literal não levar a uma rota com o
+    método pedido, o ramo de parâmetro é tentado (backtracking limitado à
+    profundidade do path). Os parâmetros são devolvidos como spans
+    (ponteiro + tamanho) dentro da própria URI, sem alocação nem cópia.
+
+    Formato compacto: rótulos das arestas e patterns dos endpoints são
+    offsets no pool único restRoutePool (build_route_pool) e cada nó guarda
+    só a máscara de métodos do path; os alvos são índices de endpoint na
+    ordem dos bits da máscara, sem repetir o método por linha.
+    """
+
+    nodes = build_route_trie(endpoints)
+    pool, offsets = build_route_pool(ep.path for ep in endpoints)
+    method_order = collect_methods(endpoints)
+
+    def method_rank(method: str) -> int:
+        return method_order.index(method_enum_name(method))
+
+    edges: List[Tuple[str, int, int]] = []
+    first_edge: List[int] = []
+    targets: List[int] = []
+    first_target: List[int] = []
+    for node in nodes:
+        first_edge.append(len(edges))
+        for seg, child in sorted(node.literals.items()):
+            path, position = node.sources[seg]
+            edges.append((seg, offsets[path] + position, child))
+        first_target.append(len(targets))
+        targets.extend(node.targets[m] for m in sorted(node.targets, key=method_rank))
+
+    before, after = route_table_sizes(endpoints, nodes, pool)
+    types = route_table_types(endpoints, nodes, pool)
+    lines: List[str] = []
+    lines.append("/* ---- Roteador compilado (árvore radix de segmentos) ---- */\n\n")
+    lines.append(
+        f"/* Tabelas de rotas: {after} bytes (formato anterior, com ponteiros por linha: {before} bytes;\n"
+        " * estimativa para ponteiros de 32 bits). */\n"
+    )
+    lines.append(f"const char restRoutePool[{len(pool) + 1}] =\n    {c_bytes_string(pool)};\n\n")
+    lines.append("typedef struct restTrieEdge {\n")
+    lines.append("    restPoolOffset_t label;       /* rótulo em restRoutePool */\n")
+    lines.append(f"    {types['child']:<16} child;\n")
+    lines.append(f"    {types['labelLength']:<16} labelLength;\n")
+    lines.append("} restTrieEdge_t;\n\n")
+    lines.append("typedef struct restTrieNode {\n")
+    lines.append(f"    {types['firstEdge']:<14} firstEdge;\n")
+    lines.append(f"    {types['paramChild']:<14} paramChild;\n")
+    lines.append(f"    {types['firstTarget']:<14} firstTarget;  /* alvos na ordem dos bits de methodMask */\n")
+    lines.append("    unsigned short methodMask;\n")
+    lines.append(f"    {types['edgeCount']:<14} edgeCount;\n")
+    lines.append("} restTrieNode_t;\n\n")
+
+    lines.append(f"static const restTrieEdge_t restTrieEdges[{max(len(edges), 1)}] = {{\n")
+    for seg, offset, child in edges:
+        label = seg.replace("*/", "* /")
+        lines.append(f"    {{ {offset}u, {child}u, {len(seg.encode('utf-8'))}u }}, /* {label} */\n")
+    if not edges:
+        lines.append("    { 0u, 0u, 0u },\n")
+    lines.append("};\n\n")
+
+    lines.append(f"static const {types['target']} restTrieTargets[{max(len(targets), 1)}] = {{\n")
+    for i in range(0, len(targets), 12):
+        lines.append("    " + " ".join(f"{t}u," for t in targets[i:i + 12]) + "\n")
+    if not targets:
+        lines.append("    0u,\n")
+    lines.append("};\n\n")
+
+    lines.append(f"static const restTrieNode_t restTrieNodes[{len(nodes)}] = {{\n")
+    for i, node in enumerate(nodes):
+        mask = " | ".join(
+            f"REST_METHOD_BIT({method_enum_name(m)})"
+            for m in sorted(node.targets, key=method_rank)
+        ) or "0u"
+        lines.append(
+            f"    {{ {first_edge[i]}u, {node.param}, {first_target[i]}u, {mask}, {len(node.literals)}u }},\n"
+        )
+    lines.append("};\n\n")
+
+    lines.append(
+        "static int restTrieFindLiteral(const restTrieNode_t *node, const char *seg, unsigned int segLength)\n"
+        "{\n"
+        "    int lo = (int)node->firstEdge;\n"
+        "    int hi = lo + (int)node->edgeCount - 1;\n"
+        "\n"
+        "    while (lo <= hi) {\n"
+        "        int mid = lo + ((hi - lo) / 2);\n"
+        "        const restTrieEdge_t *edge = &restTrieEdges[mid];\n"
+        "        unsigned int n = (segLength < edge->labelLength) ? segLength : edge->labelLength;\n"
+        "        int cmp = memcmp(seg, restRoutePool + edge->label, n);\n"
+        "        if (cmp == 0) {\n"
+        "            cmp = (int)segLength - (int)edge->labelLength;\n"
+        "        }\n"
+        "        if (cmp == 0) {\n"
+        "            return (int)edge->child;\n"
+        "        }\n"
+        "        if (cmp < 0) {\n"
+        "            hi = mid - 1;\n"
+        "        } else {\n"
+        "            lo = mid + 1;\n"
+        "        }\n"
+        "    }\n"
+        "    return -1;\n"
+        "}\n\n"
+    )
+
+    lines.append(
+        "static int restTrieWalk(unsigned int nodeIndex, const char *p, const char *end,\n"
+        "                        httpMethod_t method, restRouteMatch_t *match, int *pathNode)\n"
+        "{\n"
+        "    const restTrieNode_t *node = &restTrieNodes[nodeIndex];\n"
+        "    const char *seg;\n"
+        "    unsigned int segLength;\n"
+        "    int child;\n"
+        "\n"
+        "    while ((p < end) && (*p == '/')) {\n"
+        "        p++;\n"
+        "    }\n"
+        "    if (p == end) {\n"
+        "        unsigned int below;\n"
+        "        unsigned int index = 0;\n"
+        "        if (node->methodMask == 0u) {\n"
+        "            return 0;\n"
+        "        }\n"
+        "        if (*pathNode < 0) {\n"
+        "            *pathNode = (int)nodeIndex;\n"
+        "        }\n"
+        "        if ((node->methodMask & REST_METHOD_BIT(method)) == 0u) {\n"
+        "            return 0;\n"
+        "        }\n"
+        "        /* Alvo = quantos métodos da máscara vêm antes deste bit. */\n"
+        "        below = node->methodMask & (REST_METHOD_BIT(method) - 1u);\n"
+        "        while (below != 0u) {\n"
+        "            below &= below - 1u;\n"
+        "            index++;\n"
+        "        }\n"
+        "        match->endpoint = (int)restTrieTargets[node->firstTarget + index];\n"
+        "        match->methodMask = node->methodMask;\n"
+        "        return 1;\n"
+        "    }\n"
+        "\n"
+        "    seg = p;\n"
+        "    while ((p < end) && (*p != '/')) {\n"
+        "        p++;\n"
+        "    }\n"
+        "    segLength = (unsigned int)(p - seg);\n"
+        "\n"
+        "    /* Segmento literal tem prioridade sobre {param}. */\n"
+        "    child = restTrieFindLiteral(node, seg, segLength);\n"
+        "    if ((child >= 0) && restTrieWalk((unsigned int)child, p, end, method, match, pathNode)) {\n"
+        "        return 1;\n"
+        "    }\n"
+        "    if ((node->paramChild >= 0) && (match->paramCount < REST_MAX_PATH_PARAMS)) {\n"
+        "        match->params[match->paramCount].ptr = seg;\n"
+        "        match->params[match->paramCount].length = (unsigned short)segLength;\n"
+        "        match->paramCount++;\n"
+        "        if (restTrieWalk((unsigned int)node->paramChild, p, end, method, match, pathNode)) {\n"
+        "            return 1;\n"
+        "        }\n"
+        "        match->paramCount--;\n"
+        "    }\n"
+        "    return 0;\n"
+        "}\n\n"
+    )
+
+    lines.append(
+        "int restRouteLookup(const char *uri, unsigned int uriLength, httpMethod_t method, restRouteMatch_t *match)\n"
+        "{\n"
+        "    const char *end = uri + uriLength;\n"
+        "    const char *query = (const char *)memchr(uri, '?', uriLength);\n"
+        "    int pathNode = -1;\n"
+        "\n"
+        "    if (query != NULL) {\n"
+        "        end = query;\n"
+        "    }\n"
+        "    match->endpoint = -1;\n"
+        "    match->methodMask = 0u;\n"
+        "    match->paramCount = 0u;\n"
+        "\n"
+        "    if (restTrieWalk(0u, uri, end, method, match, &pathNode)) {\n"
+        "        return REST_ROUTE_FOUND;\n"
+        "    }\n"
+        "    match->paramCount = 0u;\n"
+        "    if (pathNode >= 0) {\n"
+        "        /* Path existe, mas não para este método: usar methodMask no Allow. */\n"
+        "        match->methodMask = restTrieNodes[pathNode].methodMask;\n"
+        "        return REST_ROUTE_METHOD_NOT_ALLOWED;\n"
+        "    }\n"
+        "    return REST_ROUTE_NOT_FOUND;\n"
+        "}\n\n"
+    )
+
+    lines.append(
+        "const char *restEndpointPath(unsigned int endpoint, unsigned int *length)\n"
+        "{\n"
+        "    if (endpoint >= restEndpointCount) {\n"
+        "        return NULL;\n"
+        "    }\n"
+        "    if (length != NULL) {\n"
+        "        *length = restEndpoints[endpoint].pathLength;\n"
+        "    }\n"
+        "    return restRoutePool + restEndpoints[endpoint].path;\n"
+        "}\n\n"
+    )
+
+    # Os nomes dos parâmetros de path são lidos do próprio pattern no pool,
+    # na mesma ordem dos spans (sem tabela de nomes separada).
+    lines.append(
+        "/* Próximo {nome} do pattern a partir de *cursor: devolve o nome (sem as\n"
+        " * chaves) e seu tamanho, ou NULL ao chegar ao fim do pattern. */\n"
+        "static const char *restPatternNextParam(const char **cursor, const char *end, unsigned int *length)\n"
+        "{\n"
+        "    const char *p = *cursor;\n"
+        "    const char *seg;\n"
+        "\n"
+        "    while (p < end) {\n"
+        "        while ((p < end) && (*p == '/')) {\n"
+        "            p++;\n"
+        "        }\n"
+        "        seg = p;\n"
+        "        while ((p < end) && (*p != '/')) {\n"
+        "            p++;\n"
+        "        }\n"
+        "        if (((p - seg) > 2) && (seg[0] == '{') && (p[-1] == '}')) {\n"
+        "            *cursor = p;\n"
+        "            *length = (unsigned int)(p - seg) - 2u;\n"
+        "            return seg + 1;\n"
+        "        }\n"
+        "    }\n"
+        "    *cursor = p;\n"
+        "    return NULL;\n"
+        "}\n\n"
+    )
+
+    lines.append(
+        "const char *restRouteParam(const restRouteMatch_t *match, const char *name, unsigned int *length)\n"
+        "{\n"
+        "    const char *cursor;\n"
+        "    const char *end;\n"
+        "    const char *param;\n"
+        "    unsigned int paramLength;\n"
+        "    unsigned int nameLength;\n"
+        "    unsigned int i;\n"
+        "\n"
+        "    if ((match == NULL) || (match->endpoint < 0)) {\n"
+        "        return NULL;\n"
+        "    }\n"
+        "    nameLength = (unsigned int)strlen(name);\n"
+        "    cursor = restEndpointPath((unsigned int)match->endpoint, &paramLength);\n"
+        "    end = cursor + paramLength;\n"
+        "    for (i = 0; i < match->paramCount; i++) {\n"
+        "        param = restPatternNextParam(&cursor, end, &paramLength);\n"
+        "        if (param == NULL) {\n"
+        "            break;\n"
+        "        }\n"
+        "        if ((paramLength == nameLength) && (memcmp(param, name, nameLength) == 0)) {\n"
+        "            if (length != NULL) {\n"
+        "                *length = match->params[i].length;\n"
+        "            }\n"
+        "            return match->params[i].ptr;\n"
+        "        }\n"
+        "    }\n"
+        "    return NULL;\n"
+        "}\n\n"
+    )
+
+    return "".join(lines)
+
+
+def _c_char_case(b: int) -> str:
+    ch = chr(b)
+    if ch.isascii() and (ch.isalnum() or ch in "_-$@."):
+        return f"'{ch}'"
+    return f"0x{b:02X}"
+
+
+def generate_key_function(struct: JsonStruct) -> str:
+    """Gera o despacho de chaves do struct: switch por tamanho, depois pelo 1º byte.
+
+    Cada chave candidata custa no máximo um memcmp do restante do nome; chaves
+    desconhecidas são descartadas sem nenhuma comparação completa na maioria
+    dos casos.
+    """
+
+    lines: List[str] = []
+    lines.append(f"static int restJsonKey_{struct.base}(const char *key, unsigned int length)\n{{\n")
+    by_length: Dict[int, Dict[int, List[Tuple[bytes, int]]]] = {}
+    for index, f in enumerate(struct.fields):
+        raw = f.name.encode("utf-8")
+        if raw:
+            by_length.setdefault(len(raw), {}).setdefault(raw[0], []).append((raw, index))
+    if not by_length:
+        lines.append("    (void)key;\n    (void)length;\n    return -1;\n}\n\n")
+        return "".join(lines)
+    lines.append("    switch (length) {\n")
+    for length in sorted(by_length):
+        lines.append(f"    case {length}u:\n")
+        lines.append("        switch ((unsigned char)key[0]) {\n")
+        for first in sorted(by_length[length]):
+            lines.append(f"        case {_c_char_case(first)}:\n")
+            for raw, index in by_length[length][first]:
+                if length == 1:
+                    lines.append(f"            return {index};\n")
+                    break
+                rest = c_bytes_string(raw[1:], width=None)
+                lines.append(f"            if (memcmp(key + 1, {rest}, {length - 1}u) == 0) {{\n")
+                lines.append(f"                return {index};\n")
+                lines.append("            }\n")
+            else:
+                lines.append("            break;\n")
+        lines.append("        default:\n            break;\n")
+        lines.append("        }\n        break;\n")
+    lines.append("    default:\n        break;\n    }\n    return -1;\n}\n\n")
+    return "".join(lines)
+
+
+def _member_declaration(f: JsonField) -> List[str]:
+    if f.kind == "string":
+        return [f"    char {f.ident}[{f.length}];\n"]
+    if f.kind == "array":
+        suffix = f"[{f.length}]" if f.item_kind == "string" else ""
+        return [
+            f"    {f.c_type} {f.ident}[{f.items}]{suffix};\n",
+            f"    unsigned short {f.count_ident};\n",
+        ]
+    return [f"    {f.c_type} {f.ident};\n"]
+
+
+def generate_schema_types(structs: List[JsonStruct]) -> str:
+    """Gera os structs de requisição e resposta (header), em ordem de dependência."""
+
+    lines: List[str] = []
+    for struct in structs:
+        lines.append(f"typedef struct {struct.base} {{\n")
+        lines.append("    unsigned long present; /* bit n: campo n presente (ver _HAS_) */\n")
+        for f in struct.fields:
+            lines.extend(_member_declaration(f))
+        if struct.body is not None:
+            lines.append(f"    {struct.body.type_name} body;\n")
+        lines.append(f"}} {struct.type_name};\n")
+        for index, f in enumerate(struct.fields):
+            lines.append(f"#define {struct.base}_HAS_{f.ident} (1ul << {index})\n")
+        lines.append("\n")
+    return "".join(lines)
+
+
+def _struct_depths(structs: List[JsonStruct]) -> Dict[int, int]:
+    """Frames necessários por struct (objetos e arrays aninhados)."""
+
+    depth: Dict[int, int] = {}
+    for struct in structs:  # ordem de dependência: filhos já calculados
+        best = 0
+        for f in struct.fields:
+            if f.kind == "object" and f.struct is not None:
+                best = max(best, depth[f.struct.index])
+            elif f.kind == "array":
+                best = max(best, 1 + (depth[f.struct.index] if f.struct is not None else 0))
+        depth[struct.index] = 1 + best
+    return depth
+
+
+def json_max_depth(structs: List[JsonStruct]) -> int:
+    """Profundidade máxima de frames do parser (corpos de requisição)."""
+
+    depth = _struct_depths(structs)
+    return max((depth[s.body.index] for s in structs if s.body is not None), default=1)
+
+
+# Valores padrão dos macros de dimensionamento, usados apenas no relatório de
+# tamanho máximo impresso pelo gerador (o C usa sempre os macros).
+SIZE_MACRO_DEFAULTS = {
+    "REST_JSON_STRING_DEFAULT": 32,
+    "REST_JSON_ARRAY_DEFAULT": 4,
+    "REST_JSON_FRACTION_DIGITS": 6,
+}
+
+
+@dataclass
+class SizeExpr:
+    """Tamanho em bytes como expressão C: constante + Σ coeficiente × termo.
+
+    Termos iguais são somados (ex.: 3 * REST_JSON_FRACTION_DIGITS), mantendo
+    a expressão curta; `atoms` guarda o valor de cada termo com os padrões.
+    """
+
+    const: int = 0
+    coeffs: Dict[str, int] = field(default_factory=dict)
+    atoms: Dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def macro(cls, name: str, factor: int = 1, const: int = 0) -> "SizeExpr":
+        return cls(const, {name: factor}, {name: SIZE_MACRO_DEFAULTS.get(name, 0)})
+
+    def __add__(self, other: "SizeExpr") -> "SizeExpr":
+        coeffs = dict(self.coeffs)
+        for atom, k in other.coeffs.items():
+            coeffs[atom] = coeffs.get(atom, 0) + k
+        return SizeExpr(self.const + other.const, coeffs, {**self.atoms, **other.atoms})
+
+    def times(self, count: str) -> "SizeExpr":
+        if count.isdigit():
+            k = int(count)
+            return SizeExpr(self.const * k, {a: c * k for a, c in self.coeffs.items()}, dict(self.atoms))
+        atom = f"({count}) * ({self.c_expr()})"
+        return SizeExpr(0, {atom: 1}, {atom: SIZE_MACRO_DEFAULTS.get(count, 0) * self.default()})
+
+    def c_expr(self) -> str:
+        parts = [a if k == 1 else f"{k} * {a}" for a, k in self.coeffs.items() if k]
+        if self.const or not parts:
+            parts.append(str(self.const))
+        return " + ".join(parts)
+
+    def default(self) -> int:
+        return self.const + sum(k * self.atoms[a] for a, k in self.coeffs.items())
+
+
+def json_key_text(name: str) -> bytes:
+    """Texto de saída de uma chave, com a vírgula separadora: `,"nome":`."""
+
+    return ("," + json.dumps(name, ensure_ascii=False) + ":").encode("utf-8")
+
+
+def _value_max_length(kind: str, f: JsonField, memo: Dict[int, SizeExpr]) -> SizeExpr:
+    if kind == "string":
+        # Pior caso: todo byte escapado como \u00XX, mais as aspas.
+        if f.length.isdigit():
+            return SizeExpr(2 + 6 * (int(f.length) - 1))
+        return SizeExpr.macro("REST_JSON_STRING_DEFAULT", 6, 2)
+    if kind in ("int", "int64"):
+        return SizeExpr(20)
+    if kind in ("number", "float"):
+        return SizeExpr.macro("REST_JSON_FRACTION_DIGITS", 1, 18)
+    if kind == "bool":
+        return SizeExpr(5)
+    if kind == "object" and f.struct is not None:
+        return struct_max_length(f.struct, memo)
+    return SizeExpr(4)  # null
+
+
+def _field_max_length(f: JsonField, memo: Dict[int, SizeExpr]) -> SizeExpr:
+    if f.kind == "array":
+        return (_value_max_length(f.item_kind, f, memo) + SizeExpr(1)).times(f.items) + SizeExpr(2)
+    return _value_max_length(f.kind, f, memo)
+
+
+def struct_max_length(struct: JsonStruct, memo: Optional[Dict[int, SizeExpr]] = None) -> SizeExpr:
+    """Maior saída serializada do struct (todos os campos presentes e cheios)."""
+
+    memo = {} if memo is None else memo
+    if struct.index in memo:
+        return memo[struct.index]
+    if struct.wrapper:
+        total = _field_max_length(struct.fields[0], memo)
+    else:
+        total = SizeExpr(2 - (1 if struct.fields else 0))
+        for f in struct.fields:
+            total = total + SizeExpr(len(json_key_text(f.name))) + _field_max_length(f, memo)
+    memo[struct.index] = total
+    return total
+
+
+def json_writer_depth(structs: List[JsonStruct]) -> int:
+    """Profundidade máxima de frames do serializador (respostas)."""
+
+    depth = _struct_depths(structs)
+    return max((depth[s.index] for s in structs if s.response), default=1)
+
+
+def _field_descriptor(struct: JsonStruct, f: JsonField) -> str:
+    t = struct.type_name
+    member = f"((({t} *)0)->{f.ident})"
+    schema = f"{f.struct.index}u" if f.struct is not None else "0u"
+    if f.kind == "string":
+        return f"{{ offsetof({t}, {f.ident}), 0u, sizeof{member}, 0u, REST_JSON_T_STRING, 0u, 0u }}"
+    if f.kind == "array":
+        return (
+            f"{{ offsetof({t}, {f.ident}), offsetof({t}, {f.count_ident}), "
+            f"sizeof{member} / sizeof{member}[0], sizeof{member}[0], "
+            f"REST_JSON_T_ARRAY, {JSON_KIND_CONSTANTS[f.item_kind]}, {schema} }}"
+        )
+    return f"{{ offsetof({t}, {f.ident}), 0u, 0u, 0u, {JSON_KIND_CONSTANTS[f.kind]}, 0u, {schema} }}"
+
+
+def generate_json_tables(structs: List[JsonStruct]) -> str:
+    """Gera despacho de chaves, descritores de campos, restJsonSchemas[] e o
+    union de armazenamento das requisições (um por conexão)."""
+
+    lines: List[str] = []
+    memo: Dict[int, SizeExpr] = {}
+    for struct in structs:
+        if struct.request or struct.operation:
+            lines.append(generate_key_function(struct))
+        if struct.fields:
+            lines.append(f"static const restJsonField_t restJsonFields_{struct.base}[] = {{\n")
+            for f in struct.fields:
+                lines.append(f"    {_field_descriptor(struct, f)},\n")
+            lines.append("};\n\n")
+        if struct.response and struct.fields and not struct.wrapper:
+            lines.append(f"static const restJsonKeyText_t restJsonKeys_{struct.base}[] = {{\n")
+            for f in struct.fields:
+                text = json_key_text(f.name)
+                lines.append(f"    {{ {c_bytes_string(text, width=None)}, {len(text)}u }},\n")
+            lines.append("};\n\n")
+
+    lines.append("static const restJsonSchema_t restJsonSchemas[REST_JSON_SCHEMA_COUNT] = {\n")
+    for struct in structs:
+        required = 0
+        for index, f in enumerate(struct.fields):
+            if f.required:
+                required |= 1 << index
+        key = f"restJsonKey_{struct.base}" if (struct.request or struct.operation) else "NULL"
+        fields = f"restJsonFields_{struct.base}" if struct.fields else "NULL"
+        if struct.response:
+            keys = f"restJsonKeys_{struct.base}" if (struct.fields and not struct.wrapper) else "NULL"
+            max_length = f"{struct.base}_MAX_LENGTH"
+        else:
+            keys, max_length = "NULL", "0ul"
+        flags = "REST_JSON_SCHEMA_WRAPPER" if struct.wrapper else "0u"
+        lines.append(
+            f"    {{ {key}, {fields}, 0x{required:08x}ul, sizeof({struct.type_name}), {keys}, "
+            f"{max_length}, {len(struct.fields)}u, {flags} }},\n"
+        )
+    if not structs:
+        lines.append("    { NULL, NULL, 0ul, 0u, NULL, 0ul, 0u, 0u },\n")
+    lines.append("};\n\n")
+
+    lines.append("/* Armazenamento da requisição decodificada (um por conexão). */\n")
+    lines.append("typedef union restRequestStorage {\n")
+    lines.append("    unsigned long none;\n")
+    for struct in structs:
+        if struct.operation:
+            lines.append(f"    {struct.type_name} {struct.base[len('restReq_'):]};\n")
+    lines.append("} restRequestStorage_t;\n\n")
+
+    lines.append("#if REST_RESPONSE_STREAMING\n")
+    lines.append("/* Cópia da resposta serializada em partes após o retorno do handler. */\n")
+    lines.append("typedef union restResponseStorage {\n")
+    lines.append("    unsigned long none;\n")
+    for struct in structs:
+        if struct.response:
+            lines.append(f"    {struct.type_name} {struct.base};\n")
+    lines.append("} restResponseStorage_t;\n")
+    lines.append("#endif\n\n")
+    return "".join(lines)
+
+
+# Runtime do parser JSON emitido no .c companheiro. Genérico: o que é
+# específico de cada schema (despacho de chaves, offsets, tipos) vem das
+# tabelas geradas por generate_json_tables().
+JSON_RUNTIME_C = r"""/* ---- Parser JSON especializado por schema (sem alocação, alimentado em partes) ---- */
+
+enum {
+    REST_JSON_T_STRING = 0,
+    REST_JSON_T_INT,
+    REST_JSON_T_INT64,
+    REST_JSON_T_NUMBER,
+    REST_JSON_T_FLOAT,
+    REST_JSON_T_BOOL,
+    REST_JSON_T_OBJECT,
+    REST_JSON_T_ARRAY,
+    REST_JSON_T_IGNORE = 0xFF
+};
+
+/* Campo de um struct gerado. Todo struct gerado começa com
+ * `unsigned long present` (bit n = campo n recebido/presente). */
+typedef struct restJsonField {
+    unsigned short offset;
+    unsigned short countOffset; /* arrays: contador de itens */
+    unsigned short size;        /* strings: bytes (com NUL); arrays: itens */
+    unsigned short itemSize;    /* arrays: sizeof de um item */
+    unsigned char  type;
+    unsigned char  itemType;
+    unsigned short schema;      /* objetos (campo ou itens): índice em restJsonSchemas[] */
+} restJsonField_t;
+
+typedef int (*restJsonKeyFn)(const char *key, unsigned int length);
+
+/* Texto pré-computado de uma chave na saída: ",\"nome\":". */
+typedef struct restJsonKeyText {
+    const char    *text;
+    unsigned short length;
+} restJsonKeyText_t;
+
+#define REST_JSON_SCHEMA_WRAPPER 0x01u /* resposta de raiz não-objeto: só o campo 0 */
+
+typedef struct restJsonSchema {
+    restJsonKeyFn            key;       /* chave -> índice do campo (-1: desconhecida); NULL: só resposta */
+    const restJsonField_t   *fields;
+    unsigned long            required;
+    unsigned short           size;
+    const restJsonKeyText_t *keys;      /* NULL: só requisição */
+    unsigned long            maxLength; /* maior saída serializada (bytes) */
+    unsigned char            fieldCount;
+    unsigned char            flags;
+} restJsonSchema_t;
+
+static const restJsonSchema_t restJsonSchemas[REST_JSON_SCHEMA_COUNT];
+
+typedef struct restJsonTarget {
+    const restJsonField_t *field;
+    unsigned char   type;
+    unsigned short  schema;
+    unsigned short  capacity;
+    char           *ptr;
+    unsigned long  *present;
+    unsigned long   bit;
+} restJsonTarget_t;
+
+typedef struct restJsonFrame {
+    const restJsonSchema_t *schema; /* NULL: frame de array */
+    char                   *base;
+    const restJsonField_t  *array;
+} restJsonFrame_t;
+
+enum {
+    REST_JSON_S_VALUE = 0,
+    REST_JSON_S_VALUE_OR_END,
+    REST_JSON_S_STRING,
+    REST_JSON_S_TOKEN,
+    REST_JSON_S_KEY_OR_END,
+    REST_JSON_S_KEY_START,
+    REST_JSON_S_KEY,
+    REST_JSON_S_COLON,
+    REST_JSON_S_NEXT,
+    REST_JSON_S_SKIP,
+    REST_JSON_S_DONE
+};
+
+#define REST_JSON_F_KEY_OVERFLOW 0x01u
+#define REST_JSON_F_SKIP_STRING  0x02u
+#define REST_JSON_F_SKIP_ESCAPE  0x04u
+#define REST_JSON_F_OPTIONAL     0x08u
+
+typedef struct restJsonParser {
+    unsigned char    state;
+    unsigned char    depth;
+    unsigned char    escape;      /* 1 = após '\', 2..5 = dígitos de \uXXXX */
+    unsigned char    flags;
+    int              status;      /* 0 ou status HTTP do primeiro erro */
+    unsigned short   skipDepth;
+    unsigned short   length;
+    unsigned short   codePoint;
+    unsigned short   surrogate;
+    restJsonTarget_t target;
+    char             key[REST_JSON_KEY_MAX + 1];
+    char             token[REST_JSON_TOKEN_MAX + 1];
+    restJsonFrame_t  frames[REST_JSON_MAX_DEPTH];
+} restJsonParser_t;
+
+static int restJsonIsSpace(char c)
+{
+    return (c == ' ') || (c == '\t') || (c == '\r') || (c == '\n');
+}
+
+/* Inteiro JSON (sem fração/expoente), com verificação de overflow. */
+static int restJsonParseInt(const char *text, unsigned int length, long long *out)
+{
+    unsigned long long value = 0;
+    unsigned long long limit = 9223372036854775807ull;
+    unsigned int i = 0;
+    int negative = 0;
+
+    if ((i < length) && (text[i] == '-')) {
+        negative = 1;
+        limit += 1u;
+        i++;
+    }
+    if ((i >= length) || ((text[i] == '0') && (i + 1u < length))) {
+        return 0;
+    }
+    for (; i < length; i++) {
+        unsigned int digit;
+        if ((text[i] < '0') || (text[i] > '9')) {
+            return 0;
+        }
+        digit = (unsigned int)(text[i] - '0');
+        if (value > ((limit - digit) / 10u)) {
+            return 0;
+        }
+        value = (value * 10u) + digit;
+    }
+    if (negative) {
+        *out = (value == limit) ? (-9223372036854775807ll - 1) : -(long long)value;
+    } else {
+        *out = (long long)value;
+    }
+    return 1;
+}
+
+/* Número JSON completo (-?int(.frac)?([eE][+-]?exp)?), sem strtod. */
+static int restJsonParseNumber(const char *text, unsigned int length, double *out)
+{
+    double value = 0.0;
+    double scale = 1.0;
+    unsigned int i = 0;
+    int negative = 0;
+    int exponent = 0;
+    int expNegative = 0;
+    int digits = 0;
+
+    if ((i < length) && (text[i] == '-')) {
+        negative = 1;
+        i++;
+    }
+    if ((i < length) && (text[i] == '0') && (i + 1u < length) && (text[i + 1u] >= '0') && (text[i + 1u] <= '9')) {
+        return 0;
+    }
+    while ((i < length) && (text[i] >= '0') && (text[i] <= '9')) {
+        value = (value * 10.0) + (double)(text[i++] - '0');
+        digits++;
+    }
+    if (digits == 0) {
+        return 0;
+    }
+    if ((i < length) && (text[i] == '.')) {
+        digits = 0;
+        i++;
+        while ((i < length) && (text[i] >= '0') && (text[i] <= '9')) {
+            scale /= 10.0;
+            value += scale * (double)(text[i++] - '0');
+            digits++;
+        }
+        if (digits == 0) {
+            return 0;
+        }
+    }
+    if ((i < length) && ((text[i] == 'e') || (text[i] == 'E'))) {
+        digits = 0;
+        i++;
+        if ((i < length) && ((text[i] == '+') || (text[i] == '-'))) {
+            expNegative = (text[i++] == '-');
+        }
+        while ((i < length) && (text[i] >= '0') && (text[i] <= '9')) {
+            if (exponent < 400) {
+                exponent = (exponent * 10) + (text[i] - '0');
+            }
+            i++;
+            digits++;
+        }
+        if (digits == 0) {
+            return 0;
+        }
+        while (exponent-- > 0) {
+            value = expNegative ? (value / 10.0) : (value * 10.0);
+        }
+    }
+    if (i != length) {
+        return 0;
+    }
+    *out = negative ? -value : value;
+    return 1;
+}
+
+static void restJsonMarkPresent(const restJsonTarget_t *target)
+{
+    if (target->present != NULL) {
+        *target->present |= target->bit;
+    }
+}
+
+/* Atribui um número ou literal (true/false/null) ao destino. Retorna 0 ou 422. */
+static int restJsonAssign(const restJsonTarget_t *target, const char *text, unsigned int length)
+{
+    long long integer;
+    double number;
+
+    if ((length == 4u) && (memcmp(text, "null", 4) == 0)) {
+        return 0;
+    }
+    switch (target->type) {
+    case REST_JSON_T_IGNORE:
+        return 0;
+    case REST_JSON_T_BOOL:
+        if ((length == 4u) && (memcmp(text, "true", 4) == 0)) {
+            *(unsigned char *)target->ptr = 1u;
+        } else if ((length == 5u) && (memcmp(text, "false", 5) == 0)) {
+            *(unsigned char *)target->ptr = 0u;
+        } else {
+            return 422;
+        }
+        break;
+    case REST_JSON_T_INT:
+        if (!restJsonParseInt(text, length, &integer) || (integer < LONG_MIN) || (integer > LONG_MAX)) {
+            return 422;
+        }
+        *(long *)(void *)target->ptr = (long)integer;
+        break;
+    case REST_JSON_T_INT64:
+        if (!restJsonParseInt(text, length, &integer)) {
+            return 422;
+        }
+        *(long long *)(void *)target->ptr = integer;
+        break;
+    case REST_JSON_T_NUMBER:
+        if (!restJsonParseNumber(text, length, &number)) {
+            return 422;
+        }
+        *(double *)(void *)target->ptr = number;
+        break;
+    case REST_JSON_T_FLOAT:
+        if (!restJsonParseNumber(text, length, &number)) {
+            return 422;
+        }
+        *(float *)(void *)target->ptr = (float)number;
+        break;
+    default:
+        return 422;
+    }
+    restJsonMarkPresent(target);
+    return 0;
+}
+
+/* Destino de um campo de objeto; arrays apontam para o próximo item livre. */
+static int restJsonFieldTarget(restJsonTarget_t *target, const restJsonSchema_t *schema, char *base, int index)
+{
+    const restJsonField_t *field;
+
+    if (index < 0) {
+        target->field = NULL;
+        target->type = REST_JSON_T_IGNORE;
+        target->present = NULL;
+        return 0;
+    }
+    field = &schema->fields[index];
+    target->field = field;
+    target->type = field->type;
+    target->schema = field->schema;
+    target->capacity = field->size;
+    target->ptr = base + field->offset;
+    target->present = (unsigned long *)(void *)base;
+    target->bit = 1ul << index;
+    return 0;
+}
+
+static int restJsonItemTarget(restJsonTarget_t *target, char *base, const restJsonField_t *field)
+{
+    unsigned short *count = (unsigned short *)(void *)(base + field->countOffset);
+
+    if (*count >= field->size) {
+        return 422;
+    }
+    target->field = field;
+    target->type = field->itemType;
+    target->schema = field->schema;
+    target->capacity = field->itemSize;
+    target->ptr = base + field->offset + ((unsigned int)*count * field->itemSize);
+    target->present = NULL;
+    (*count)++;
+    return 0;
+}
+
+static int restJsonPush(restJsonParser_t *p, const restJsonSchema_t *schema, char *base, const restJsonField_t *array)
+{
+    if (p->depth >= REST_JSON_MAX_DEPTH) {
+        return 400;
+    }
+    p->frames[p->depth].schema = schema;
+    p->frames[p->depth].base = base;
+    p->frames[p->depth].array = array;
+    p->depth++;
+    return 0;
+}
+
+static void restJsonAfterValue(restJsonParser_t *p)
+{
+    p->state = (p->depth == 0u) ? REST_JSON_S_DONE : REST_JSON_S_NEXT;
+}
+
+static int restJsonCloseObject(restJsonParser_t *p)
+{
+    const restJsonFrame_t *frame = &p->frames[p->depth - 1u];
+    unsigned long present = *(const unsigned long *)(const void *)frame->base;
+
+    if ((present & frame->schema->required) != frame->schema->required) {
+        return 422;
+    }
+    p->depth--;
+    restJsonAfterValue(p);
+    return 0;
+}
+
+/* Início de um valor (primeiro caractere não branco). */
+static int restJsonBeginValue(restJsonParser_t *p, char c)
+{
+    restJsonTarget_t *t = &p->target;
+
+    if (t->type == REST_JSON_T_IGNORE) {
+        if ((c == '{') || (c == '[')) {
+            p->skipDepth = 1u;
+            p->flags &= (unsigned char)~(REST_JSON_F_SKIP_STRING | REST_JSON_F_SKIP_ESCAPE);
+            p->state = REST_JSON_S_SKIP;
+            return 0;
+        }
+    }
+    if (c == '{') {
+        if (t->type != REST_JSON_T_OBJECT) {
+            return 422;
+        }
+        restJsonMarkPresent(t);
+        p->state = REST_JSON_S_KEY_OR_END;
+        return restJsonPush(p, &restJsonSchemas[t->schema], t->ptr, NULL);
+    }
+    if (c == '[') {
+        if (t->type != REST_JSON_T_ARRAY) {
+            return 422;
+        }
+        restJsonMarkPresent(t);
+        p->state = REST_JSON_S_VALUE_OR_END;
+        /* Frame de array: base do struct dono, itens descritos pelo campo. */
+        return restJsonPush(p, NULL, (char *)t->present, t->field);
+    }
+    if (c == '"') {
+        if ((t->type != REST_JSON_T_STRING) && (t->type != REST_JSON_T_IGNORE)) {
+            return 422;
+        }
+        p->length = 0u;
+        p->state = REST_JSON_S_STRING;
+        return 0;
+    }
+    if (((c >= '0') && (c <= '9')) || (c == '-') || ((c >= 'a') && (c <= 'z'))) {
+        p->token[0] = c;
+        p->length = 1u;
+        p->state = REST_JSON_S_TOKEN;
+        return 0;
+    }
+    return 400;
+}
+
+/* Acrescenta um byte decodificado à chave ou à string de valor corrente. */
+static int restJsonPut(restJsonParser_t *p, char c)
+{
+    if (p->state == REST_JSON_S_KEY) {
+        if (p->length < REST_JSON_KEY_MAX) {
+            p->key[p->length++] = c;
+        } else {
+            p->flags |= REST_JSON_F_KEY_OVERFLOW;
+        }
+        return 0;
+    }
+    if (p->target.type != REST_JSON_T_STRING) {
+        return 0;
+    }
+    if ((unsigned int)p->length + 1u >= p->target.capacity) {
+        return 422; /* maior que o maxLength do schema */
+    }
+    p->target.ptr[p->length++] = c;
+    return 0;
+}
+
+static int restJsonPutCodePoint(restJsonParser_t *p, unsigned long cp)
+{
+    int rc = 0;
+    if (cp < 0x80ul) {
+        rc = restJsonPut(p, (char)cp);
+    } else if (cp < 0x800ul) {
+        rc = restJsonPut(p, (char)(0xC0ul | (cp >> 6)));
+        rc = rc ? rc : restJsonPut(p, (char)(0x80ul | (cp & 0x3Ful)));
+    } else if (cp < 0x10000ul) {
+        rc = restJsonPut(p, (char)(0xE0ul | (cp >> 12)));
+        rc = rc ? rc : restJsonPut(p, (char)(0x80ul | ((cp >> 6) & 0x3Ful)));
+        rc = rc ? rc : restJsonPut(p, (char)(0x80ul | (cp & 0x3Ful)));
+    } else {
+        rc = restJsonPut(p, (char)(0xF0ul | (cp >> 18)));
+        rc = rc ? rc : restJsonPut(p, (char)(0x80ul | ((cp >> 12) & 0x3Ful)));
+        rc = rc ? rc : restJsonPut(p, (char)(0x80ul | ((cp >> 6) & 0x3Ful)));
+        rc = rc ? rc : restJsonPut(p, (char)(0x80ul | (cp & 0x3Ful)));
+    }
+    return rc;
+}
+
+/* Caractere dentro de string (chave ou valor), tratando escapes. */
+static int restJsonStringChar(restJsonParser_t *p, char c)
+{
+    if (p->escape == 1u) {
+        p->escape = 0u;
+        switch (c) {
+        case '"':
+        case '\\':
+        case '/':
+            return restJsonPut(p, c);
+        case 'b': return restJsonPut(p, '\b');
+        case 'f': return restJsonPut(p, '\f');
+        case 'n': return restJsonPut(p, '\n');
+        case 'r': return restJsonPut(p, '\r');
+        case 't': return restJsonPut(p, '\t');
+        case 'u':
+            p->escape = 2u;
+            p->codePoint = 0u;
+            return 0;
+        default:
+            return 400;
+        }
+    }
+    if (p->escape >= 2u) {
+        unsigned int digit;
+        if ((c >= '0') && (c <= '9')) {
+            digit = (unsigned int)(c - '0');
+        } else if ((c >= 'a') && (c <= 'f')) {
+            digit = (unsigned int)(c - 'a') + 10u;
+        } else if ((c >= 'A') && (c <= 'F')) {
+            digit = (unsigned int)(c - 'A') + 10u;
+        } else {
+            return 400;
+        }
+        p->codePoint = (unsigned short)((p->codePoint << 4) | digit);
+        if (++p->escape < 6u) {
+            return 0;
+        }
+        p->escape = 0u;
+        if ((p->codePoint >= 0xD800u) && (p->codePoint < 0xDC00u)) {
+            p->surrogate = p->codePoint;
+            return 0;
+        }
+        if ((p->codePoint >= 0xDC00u) && (p->codePoint < 0xE000u) && (p->surrogate != 0u)) {
+            unsigned long cp = 0x10000ul + (((unsigned long)p->surrogate - 0xD800ul) << 10) +
+                               ((unsigned long)p->codePoint - 0xDC00ul);
+            p->surrogate = 0u;
+            return restJsonPutCodePoint(p, cp);
+        }
+        p->surrogate = 0u;
+        return restJsonPutCodePoint(p, p->codePoint);
+    }
+    if (c == '\\') {
+        p->escape = 1u;
+        return 0;
+    }
+    if ((unsigned char)c < 0x20u) {
+        return 400;
+    }
+    if (c != '"') {
+        return restJsonPut(p, c);
+    }
+
+    /* Fim da string */
+    if (p->state == REST_JSON_S_KEY) {
+        const restJsonFrame_t *frame = &p->frames[p->depth - 1u];
+        int index = -1;
+        if ((p->flags & REST_JSON_F_KEY_OVERFLOW) == 0u) {
+            index = frame->schema->key(p->key, p->length);
+        }
+        p->flags &= (unsigned char)~REST_JSON_F_KEY_OVERFLOW;
+        p->state = REST_JSON_S_COLON;
+        return restJsonFieldTarget(&p->target, frame->schema, frame->base, index);
+    }
+    if (p->target.type == REST_JSON_T_STRING) {
+        p->target.ptr[p->length] = '\0';
+        restJsonMarkPresent(&p->target);
+    }
+    restJsonAfterValue(p);
+    return 0;
+}
+
+/* Valor composto desconhecido: apenas equilibra {} e [] fora de strings. */
+static void restJsonSkipChar(restJsonParser_t *p, char c)
+{
+    if (p->flags & REST_JSON_F_SKIP_STRING) {
+        if (p->flags & REST_JSON_F_SKIP_ESCAPE) {
+            p->flags &= (unsigned char)~REST_JSON_F_SKIP_ESCAPE;
+        } else if (c == '\\') {
+            p->flags |= REST_JSON_F_SKIP_ESCAPE;
+        } else if (c == '"') {
+            p->flags &= (unsigned char)~REST_JSON_F_SKIP_STRING;
+        }
+        return;
+    }
+    if (c == '"') {
+        p->flags |= REST_JSON_F_SKIP_STRING;
+    } else if ((c == '{') || (c == '[')) {
+        p->skipDepth++;
+    } else if ((c == '}') || (c == ']')) {
+        if (--p->skipDepth == 0u) {
+            restJsonAfterValue(p);
+        }
+    }
+}
+
+static int restJsonNextItem(restJsonParser_t *p, char c)
+{
+    const restJsonFrame_t *frame = &p->frames[p->depth - 1u];
+    int rc = restJsonItemTarget(&p->target, frame->base, frame->array);
+    return rc ? rc : restJsonBeginValue(p, c);
+}
+
+static int restJsonChar(restJsonParser_t *p, char c)
+{
+    switch (p->state) {
+    case REST_JSON_S_STRING:
+    case REST_JSON_S_KEY:
+        return restJsonStringChar(p, c);
+    case REST_JSON_S_SKIP:
+        restJsonSkipChar(p, c);
+        return 0;
+    case REST_JSON_S_TOKEN:
+        if (((c >= '0') && (c <= '9')) || ((c >= 'a') && (c <= 'z')) || (c == '-') || (c == '+') ||
+            (c == '.') || (c == 'E')) {
+            if (p->length >= REST_JSON_TOKEN_MAX) {
+                return 400;
+            }
+            p->token[p->length++] = c;
+            return 0;
+        } else {
+            int rc = restJsonAssign(&p->target, p->token, p->length);
+            if (rc != 0) {
+                return rc;
+            }
+            restJsonAfterValue(p);
+        }
+        break; /* o caractere que encerrou o token é tratado abaixo */
+    default:
+        break;
+    }
+
+    if (restJsonIsSpace(c)) {
+        return 0;
+    }
+    switch (p->state) {
+    case REST_JSON_S_VALUE:
+        return restJsonBeginValue(p, c);
+    case REST_JSON_S_VALUE_OR_END:
+        if (c == ']') {
+            p->depth--;
+            restJsonAfterValue(p);
+            return 0;
+        }
+        return restJsonNextItem(p, c);
+    case REST_JSON_S_KEY_OR_END:
+        if (c == '}') {
+            return restJsonCloseObject(p);
+        }
+        /* fallthrough */
+    case REST_JSON_S_KEY_START:
+        if (c != '"') {
+            return 400;
+        }
+        p->length = 0u;
+        p->state = REST_JSON_S_KEY;
+        return 0;
+    case REST_JSON_S_COLON:
+        if (c != ':') {
+            return 400;
+        }
+        p->state = REST_JSON_S_VALUE;
+        return 0;
+    case REST_JSON_S_NEXT: {
+        const restJsonFrame_t *frame = &p->frames[p->depth - 1u];
+        if (c == ',') {
+            if (frame->schema != NULL) {
+                p->state = REST_JSON_S_KEY_START;
+                return 0;
+            }
+            p->state = REST_JSON_S_VALUE;
+            return restJsonItemTarget(&p->target, frame->base, frame->array);
+        }
+        if ((c == '}') && (frame->schema != NULL)) {
+            return restJsonCloseObject(p);
+        }
+        if ((c == ']') && (frame->schema == NULL)) {
+            p->depth--;
+            restJsonAfterValue(p);
+            return 0;
+        }
+        return 400;
+    }
+    default:
+        return 400; /* conteúdo após o fim do documento */
+    }
+}
+
+/* Prepara o parser para preencher `base` segundo o schema raiz (objeto). */
+static void restJsonBegin(restJsonParser_t *p, const restJsonSchema_t *schema, char *base, int optional)
+{
+    memset(p, 0, offsetof(restJsonParser_t, key));
+    p->target.type = REST_JSON_T_OBJECT;
+    p->target.schema = (unsigned short)(schema - restJsonSchemas);
+    p->target.ptr = base;
+    p->state = REST_JSON_S_VALUE;
+    p->flags = optional ? REST_JSON_F_OPTIONAL : 0u;
+}
+
+/* Alimenta o parser com uma parte do corpo. Retorna 0 ou status HTTP. */
+static int restJsonFeed(restJsonParser_t *p, const void *chunk, unsigned int length)
+{
+    const char *c = (const char *)chunk;
+    unsigned int i;
+
+    for (i = 0; (i < length) && (p->status == 0); i++) {
+        p->status = restJsonChar(p, c[i]);
+    }
+    return p->status;
+}
+
+/* Fim do corpo: o documento precisa estar completo. */
+static int restJsonEnd(restJsonParser_t *p, unsigned long bodyLength)
+{
+    if (p->status != 0) {
+        return p->status;
+    }
+    if (p->state == REST_JSON_S_TOKEN) {
+        p->status = restJsonChar(p, ' ');
+        if (p->status != 0) {
+            return p->status;
+        }
+    }
+    if (p->state == REST_JSON_S_DONE) {
+        return 0;
+    }
+    if ((bodyLength == 0u) && (p->flags & REST_JSON_F_OPTIONAL)) {
+        return 0; /* requestBody opcional ausente */
+    }
+    return 400;
+}
+
+/* Decodifica %XX e '+' de um componente de URI em `out` (sem NUL). */
+static int restUriDecode(const char *in, unsigned int length, char *out, unsigned int capacity,
+                         unsigned int *outLength)
+{
+    unsigned int i = 0;
+    unsigned int n = 0;
+
+    while (i < length) {
+        char c = in[i++];
+        if (c == '+') {
+            c = ' ';
+        } else if (c == '%') {
+            unsigned int k;
+            unsigned int value = 0;
+            if (i + 2u > length) {
+                return 400;
+            }
+            for (k = 0; k < 2u; k++) {
+                char h = in[i++];
+                value <<= 4;
+                if ((h >= '0') && (h <= '9')) {
+                    value |= (unsigned int)(h - '0');
+                } else if ((h >= 'a') && (h <= 'f')) {
+                    value |= (unsigned int)(h - 'a') + 10u;
+                } else if ((h >= 'A') && (h <= 'F')) {
+                    value |= (unsigned int)(h - 'A') + 10u;
+                } else {
+                    return 400;
+                }
+            }
+            c = (char)value;
+        }
+        if (n >= capacity) {
+            return 400;
+        }
+        out[n++] = c;
+    }
+    *outLength = n;
+    return 0;
+}
+
+/* Converte um parâmetro de path/query para o campo tipado do struct da
+ * operação. Parâmetros desconhecidos são ignorados; repetidos acumulam em
+ * campos array (?tag=a&tag=b). Retorna 0 ou 400. */
+static int restBindParam(const restJsonSchema_t *schema, char *base, const char *name, unsigned int nameLength,
+                         const char *value, unsigned int valueLength)
+{
+    restJsonTarget_t target;
+    char text[REST_JSON_TOKEN_MAX];
+    unsigned int length;
+    int index = schema->key(name, nameLength);
+
+    if (index < 0) {
+        return 0;
+    }
+    restJsonFieldTarget(&target, schema, base, index);
+    if (target.type == REST_JSON_T_ARRAY) {
+        restJsonMarkPresent(&target);
+        if (restJsonItemTarget(&target, base, target.field) != 0) {
+            return 400;
+        }
+    }
+    if (target.type == REST_JSON_T_STRING) {
+        if (restUriDecode(value, valueLength, target.ptr, target.capacity - 1u, &length) != 0) {
+            return 400;
+        }
+        target.ptr[length] = '\0';
+        restJsonMarkPresent(&target);
+        return 0;
+    }
+    if (restUriDecode(value, valueLength, text, sizeof(text), &length) != 0) {
+        return 400;
+    }
+    if ((length == 4u) && (memcmp(text, "null", 4) == 0)) {
+        return 400;
+    }
+    return (restJsonAssign(&target, text, length) == 0) ? 0 : 400;
+}
+
+static int restBindQuery(const restJsonSchema_t *schema, char *base, const char *query)
+{
+    while ((query != NULL) && (*query != '\0')) {
+        const char *end = query;
+        const char *eq = NULL;
+        int rc;
+        while ((*end != '\0') && (*end != '&')) {
+            if ((*end == '=') && (eq == NULL)) {
+                eq = end;
+            }
+            end++;
+        }
+        if (eq == NULL) {
+            eq = end;
+        }
+        rc = restBindParam(schema, base, query, (unsigned int)(eq - query),
+                           (eq < end) ? (eq + 1) : eq, (eq < end) ? (unsigned int)(end - eq - 1) : 0u);
+        if (rc != 0) {
+            return rc;
+        }
+        query = (*end == '&') ? (end + 1) : end;
+    }
+    return 0;
+}
+"""
+
+
+# Serializador das respostas tipadas, também genérico: chaves pré-computadas,
+# campos e tamanhos máximos vêm de restJsonSchemas[].
+JSON_WRITER_C = r"""/* ---- Serializador JSON (respostas tipadas, retomável em partes) ---- */
+
+enum {
+    REST_JSON_W_OBJECT = 0,
+    REST_JSON_W_ARRAY,
+    REST_JSON_W_ROOT
+};
+
+static unsigned int restJsonFormatInt(char *out, long long value)
+{
+    char digits[20];
+    unsigned long long u;
+    unsigned int n = 0;
+    unsigned int length = 0;
+
+    if (value < 0) {
+        out[length++] = '-';
+        u = 0ull - (unsigned long long)value;
+    } else {
+        u = (unsigned long long)value;
+    }
+    do {
+        digits[n++] = (char)('0' + (u % 10u));
+        u /= 10u;
+    } while (u != 0u);
+    while (n > 0u) {
+        out[length++] = digits[--n];
+    }
+    return length;
+}
+
+/* Ponto fixo com até REST_JSON_FRACTION_DIGITS casas (zeros à direita
+ * removidos); magnitudes >= 1e15 em notação exponencial; NaN/Inf -> null. */
+static unsigned int restJsonFormatDouble(char *out, double value)
+{
+    unsigned long long scale = 1u;
+    unsigned long long integer;
+    unsigned long long fraction;
+    unsigned int length = 0;
+    unsigned int d;
+    int exponent = 0;
+
+    if ((value != value) || (value > 1.7976931348623157e308) || (value < -1.7976931348623157e308)) {
+        memcpy(out, "null", 4);
+        return 4u;
+    }
+    if (value < 0.0) {
+        out[length++] = '-';
+        value = -value;
+    }
+    if (value >= 1e15) {
+        while (value >= 10.0) {
+            value /= 10.0;
+            exponent++;
+        }
+    }
+    for (d = 0; d < REST_JSON_FRACTION_DIGITS; d++) {
+        scale *= 10u;
+    }
+    integer = (unsigned long long)value;
+    fraction = (unsigned long long)(((value - (double)integer) * (double)scale) + 0.5);
+    if (fraction >= scale) {
+        integer++;
+        fraction -= scale;
+    }
+    if ((exponent != 0) && (integer >= 10u)) {
+        integer /= 10u;
+        exponent++;
+    }
+    length += restJsonFormatInt(out + length, (long long)integer);
+    if (fraction != 0u) {
+        char digits[REST_JSON_FRACTION_DIGITS];
+        unsigned int last = REST_JSON_FRACTION_DIGITS;
+        for (d = REST_JSON_FRACTION_DIGITS; d > 0u; d--) {
+            digits[d - 1u] = (char)('0' + (fraction % 10u));
+            fraction /= 10u;
+        }
+        while ((last > 0u) && (digits[last - 1u] == '0')) {
+            last--;
+        }
+        out[length++] = '.';
+        memcpy(out + length, digits, last);
+        length += last;
+    }
+    if (exponent != 0) {
+        out[length++] = 'e';
+        length += restJsonFormatInt(out + length, exponent);
+    }
+    return length;
+}
+
+static void restJsonWriterPiece(restJsonWriter_t *w, const char *text, unsigned int length)
+{
+    w->piece = text;
+    w->pieceLength = (unsigned short)length;
+    w->pieceOffset = 0u;
+}
+
+static void restJsonWriterPush(restJsonWriter_t *w, unsigned char kind, unsigned int schema, unsigned int field,
+                               const char *base)
+{
+    restJsonWriterFrame_t *frame = &w->frames[w->depth++];
+    frame->base = base;
+    frame->schema = (unsigned short)schema;
+    frame->field = (unsigned char)field;
+    frame->kind = kind;
+    frame->first = 1u;
+    frame->index = 0u;
+}
+
+/* Prepara a saída de um valor (campo ou item de array) do tipo indicado. */
+static void restJsonWriterValue(restJsonWriter_t *w, const restJsonField_t *field, unsigned char type,
+                                unsigned int owner, unsigned int fieldIndex, const char *ptr, unsigned int capacity)
+{
+    unsigned int length = 0;
+
+    switch (type) {
+    case REST_JSON_T_STRING:
+        while ((length < capacity) && (ptr[length] != '\0')) {
+            length++;
+        }
+        restJsonWriterPiece(w, ptr, length);
+        w->pieceString = 1u;
+        w->stringPhase = 0u;
+        break;
+    case REST_JSON_T_INT:
+        restJsonWriterPiece(w, w->scratch, restJsonFormatInt(w->scratch, *(const long *)(const void *)ptr));
+        break;
+    case REST_JSON_T_INT64:
+        restJsonWriterPiece(w, w->scratch, restJsonFormatInt(w->scratch, *(const long long *)(const void *)ptr));
+        break;
+    case REST_JSON_T_NUMBER:
+        restJsonWriterPiece(w, w->scratch, restJsonFormatDouble(w->scratch, *(const double *)(const void *)ptr));
+        break;
+    case REST_JSON_T_FLOAT:
+        restJsonWriterPiece(w, w->scratch, restJsonFormatDouble(w->scratch, *(const float *)(const void *)ptr));
+        break;
+    case REST_JSON_T_BOOL:
+        if (*(const unsigned char *)ptr) {
+            restJsonWriterPiece(w, "true", 4u);
+        } else {
+            restJsonWriterPiece(w, "false", 5u);
+        }
+        break;
+    case REST_JSON_T_OBJECT:
+        restJsonWriterPush(w, REST_JSON_W_OBJECT, field->schema, 0u, ptr);
+        restJsonWriterPiece(w, "{", 1u);
+        break;
+    case REST_JSON_T_ARRAY:
+        restJsonWriterPush(w, REST_JSON_W_ARRAY, owner, fieldIndex, ptr - field->offset);
+        restJsonWriterPiece(w, "[", 1u);
+        break;
+    default:
+        restJsonWriterPiece(w, "null", 4u);
+        break;
+    }
+}
+
+/* Avança a estrutura até a próxima peça de texto. Retorna 0 ao terminar. */
+static int restJsonWriterNext(restJsonWriter_t *w)
+{
+    while (w->depth > 0u) {
+        restJsonWriterFrame_t *frame = &w->frames[w->depth - 1u];
+        const restJsonSchema_t *schema = &restJsonSchemas[frame->schema];
+
+        if (frame->kind == REST_JSON_W_OBJECT) {
+            unsigned long present = *(const unsigned long *)(const void *)frame->base | schema->required;
+            if (w->valuePending) {
+                const restJsonField_t *f = &schema->fields[frame->index - 1u];
+                w->valuePending = 0u;
+                restJsonWriterValue(w, f, f->type, frame->schema, frame->index - 1u, frame->base + f->offset, f->size);
+                return 1;
+            }
+            while (frame->index < schema->fieldCount) {
+                unsigned int i = frame->index++;
+                if (present & (1ul << i)) {
+                    /* Texto da chave pré-computado: ",\"nome\":" (sem a vírgula no primeiro). */
+                    restJsonWriterPiece(w, schema->keys[i].text + frame->first,
+                                        schema->keys[i].length - frame->first);
+                    frame->first = 0u;
+                    w->valuePending = 1u;
+                    return 1;
+                }
+            }
+            w->depth--;
+            restJsonWriterPiece(w, "}", 1u);
+            return 1;
+        }
+
+        if (frame->kind == REST_JSON_W_ARRAY) {
+            const restJsonField_t *f = &schema->fields[frame->field];
+            unsigned int count = *(const unsigned short *)(const void *)(frame->base + f->countOffset);
+            if (count > f->size) {
+                count = f->size;
+            }
+            if (w->valuePending || ((frame->index < count) && frame->first)) {
+                const char *item = frame->base + f->offset + ((unsigned int)frame->index * f->itemSize);
+                w->valuePending = 0u;
+                frame->first = 0u;
+                frame->index++;
+                restJsonWriterValue(w, f, f->itemType, frame->schema, frame->field, item, f->itemSize);
+                return 1;
+            }
+            if (frame->index < count) {
+                w->valuePending = 1u;
+                restJsonWriterPiece(w, ",", 1u);
+                return 1;
+            }
+            w->depth--;
+            restJsonWriterPiece(w, "]", 1u);
+            return 1;
+        }
+
+        /* Raiz não-objeto (array ou escalar): apenas o valor do campo 0. */
+        if (frame->index == 0u) {
+            const restJsonField_t *f = &schema->fields[0];
+            frame->index = 1u;
+            restJsonWriterValue(w, f, f->type, frame->schema, 0u, frame->base + f->offset, f->size);
+            return 1;
+        }
+        w->depth--;
+    }
+    return 0;
+}
+
+/* Conteúdo de string com escape de '"', '\' e caracteres de controle. */
+static unsigned int restJsonWriterString(restJsonWriter_t *w, char *out, unsigned int room)
+{
+    unsigned int n = 0;
+
+    while (n < room) {
+        if (w->escapeOffset < w->escapeLength) {
+            out[n++] = w->escape[w->escapeOffset++];
+        } else if (w->stringPhase == 0u) {
+            out[n++] = '"';
+            w->stringPhase = 1u;
+        } else if (w->pieceOffset < w->pieceLength) {
+            unsigned int run = 0;
+            unsigned char c;
+            while ((run < (room - n)) && ((w->pieceOffset + run) < w->pieceLength)) {
+                c = (unsigned char)w->piece[w->pieceOffset + run];
+                if ((c < 0x20u) || (c == '"') || (c == '\\')) {
+                    break;
+                }
+                run++;
+            }
+            if (run > 0u) {
+                memcpy(out + n, w->piece + w->pieceOffset, run);
+                w->pieceOffset = (unsigned short)(w->pieceOffset + run);
+                n += run;
+                continue;
+            }
+            c = (unsigned char)w->piece[w->pieceOffset++];
+            w->escape[0] = '\\';
+            w->escapeOffset = 0u;
+            if ((c == '"') || (c == '\\')) {
+                w->escape[1] = (char)c;
+                w->escapeLength = 2u;
+            } else {
+                static const char hex[] = "0123456789abcdef";
+                w->escape[1] = 'u';
+                w->escape[2] = '0';
+                w->escape[3] = '0';
+                w->escape[4] = hex[c >> 4];
+                w->escape[5] = hex[c & 0x0Fu];
+                w->escapeLength = 6u;
+            }
+        } else {
+            out[n++] = '"';
+            w->piece = NULL;
+            w->pieceString = 0u;
+            w->escapeLength = 0u;
+            w->escapeOffset = 0u;
+            break;
+        }
+    }
+    return n;
+}
+
+void restJsonWriterBegin(restJsonWriter_t *writer, unsigned int schema, const void *value)
+{
+    memset(writer, 0, offsetof(restJsonWriter_t, scratch));
+    restJsonWriterPush(writer, (restJsonSchemas[schema].flags & REST_JSON_SCHEMA_WRAPPER) ? REST_JSON_W_ROOT
+                                                                                        : REST_JSON_W_OBJECT,
+                       schema, 0u, (const char *)value);
+    if (writer->frames[0].kind == REST_JSON_W_OBJECT) {
+        restJsonWriterPiece(writer, "{", 1u);
+    }
+}
+
+unsigned int restJsonWriterWrite(restJsonWriter_t *writer, char *out, unsigned int size)
+{
+    unsigned int n = 0;
+
+    while (n < size) {
+        if ((writer->piece == NULL) && !restJsonWriterNext(writer)) {
+            break;
+        }
+        if (writer->pieceString) {
+            n += restJsonWriterString(writer, out + n, size - n);
+        } else {
+            unsigned int chunk = (unsigned int)(writer->pieceLength - writer->pieceOffset);
+            if (chunk > (size - n)) {
+                chunk = size - n;
+            }
+            memcpy(out + n, writer->piece + writer->pieceOffset, chunk);
+            writer->pieceOffset = (unsigned short)(writer->pieceOffset + chunk);
+            n += chunk;
+            if (writer->pieceOffset >= writer->pieceLength) {
+                writer->piece = NULL;
+            }
+        }
+    }
+    return n;
+}
+
+unsigned int restJsonWriterWritePbuf(restJsonWriter_t *writer, struct pbuf *p)
+{
+    unsigned int total = 0;
+    struct pbuf *q;
+
+    for (q = p; (q != NULL) && !restJsonWriterDone(writer); q = q->next) {
+        total += restJsonWriterWrite(writer, (char *)q->payload, q->len);
+    }
+    if ((total > 0u) && (total < p->tot_len)) {
+        pbuf_realloc(p, (u16_t)total);
+    }
+    return total;
+}
+"""
+
+
+# Motor do dispatcher emitido no .c companheiro. Fica em texto fixo porque não
+# depende do spec: o que varia por API (rotas, handlers, limites de corpo) já
+# está em restEndpoints[] e nas tabelas do roteador.
+DISPATCHER_ENGINE_C = r"""#if REST_RESPONSE_STREAMING && !LWIP_HTTPD_DYNAMIC_FILE_READ
+#error "REST_RESPONSE_STREAMING requer LWIP_HTTPD_DYNAMIC_FILE_READ (fs_read_custom -> restFsRead)"
+#endif
+
+typedef enum {
+    REST_SLOT_FREE = 0,
+    REST_SLOT_RECEIVING,  /* POST aceito, corpo chegando em pbufs */
+    REST_SLOT_RESPONDING, /* resposta pronta, aguardando fs_open */
+    REST_SLOT_SERVING     /* resposta em envio, liberada em fs_close */
+} restSlotState_t;
+
+/* Estado por conexão. O corpo da requisição nunca é acumulado aqui: cada
+ * pbuf é entregue ao bodyHandler do endpoint e liberado em seguida. O buffer
+ * guarda apenas a resposta, com REST_RESPONSE_HEADER_RESERVE bytes livres no
+ * início para montar o cabeçalho HTTP imediatamente antes do corpo. */
+typedef struct restSlot {
+    restSlotState_t      state;
+    unsigned char        deferred;  /* GET aguardando a query (REST_CGI_DEFER) */
+    unsigned char        pending;   /* x-async: 1 + índice em restPending[] (0: não) */
+    void                *connection;
+    int                  status;
+    unsigned long        expected;
+    unsigned int         headerOffset;
+#if REST_STATS
+    u32_t                statsStart;    /* REST_STATS_NOW() ao chamar o handler */
+#endif
+#if REST_RESPONSE_STREAMING
+    unsigned char        streaming;     /* corpo serializado em restFsRead */
+    unsigned int         headerSent;
+    unsigned long        streamLength;  /* limite superior do corpo (maxLength) */
+#endif
+    restRequestContext_t ctx;
+    restRouteMatch_t     match;
+    restResponse_t       response;
+    char                 uri[REST_URI_MAX_LENGTH + 1];
+    char                 buffer[REST_RESPONSE_HEADER_RESERVE + REST_RESPONSE_BUFFER_SIZE];
+    restJsonParser_t     json;
+    restRequestStorage_t request;
+#if REST_RESPONSE_STREAMING
+    restJsonWriter_t      writer;
+    restResponseStorage_t value;
+#endif
+} restSlot_t;
+
+static restSlot_t restSlots[REST_MAX_CONNECTIONS];
+
+#if REST_ASYNC_COUNT > 0
+/* Requisição adiada (x-async). O slot fica reservado até a conclusão, mesmo
+ * que a conexão caia antes: a tarefa pode estar escrevendo na resposta. */
+typedef struct restPending {
+    restSlot_t     *slot;         /* NULL: livre */
+    struct fs_file *file;         /* arquivo aberto pelo httpd (NULL: ainda não) */
+    fs_wait_cb      callback;     /* http_continue, enquanto o httpd espera */
+    void           *callbackArg;
+    int             result;       /* valor passado a restAsyncComplete */
+    unsigned char   generation;   /* invalida tokens de usos anteriores */
+    unsigned char   done;
+    unsigned char   closed;       /* fs_close antes da conclusão */
+    volatile unsigned char posted;
+} restPending_t;
+
+static restPending_t restPending[REST_ASYNC_MAX_PENDING];
+
+#define restSlotAwaiting(slot) (((slot)->pending != 0u) && !restPending[(slot)->pending - 1u].done)
+#endif
+
+#if REST_STATS
+#ifndef REST_STATS_NOW
+#include "lwip/sys.h"
+#define REST_STATS_NOW() sys_now()
+#endif
+/* Unidade de REST_STATS_NOW(), informada em GET _stats. */
+#ifndef REST_STATS_UNIT
+#define REST_STATS_UNIT "ms"
+#endif
+
+static restStats_t restStats[sizeof(restEndpoints) / sizeof(restEndpoints[0])];
+
+/* Fecha a medição do handler (ou da conclusão, em x-async) do slot. */
+static void restStatsRecord(const restSlot_t *slot)
+{
+    restStats_t *stats = &restStats[slot->match.endpoint];
+    u32_t elapsed = (u32_t)((u32_t)REST_STATS_NOW() - slot->statsStart);
+    unsigned int out = (slot->response.length > slot->response.size) ? slot->response.size
+                                                                       : slot->response.length;
+
+#if REST_RESPONSE_STREAMING
+    if (slot->streaming) {
+        out = 0u; /* contado em restFsRead, conforme é serializado */
+    }
+#endif
+    if ((stats->calls == 0u) || (elapsed < stats->minTime)) {
+        stats->minTime = elapsed;
+    }
+    if (elapsed > stats->maxTime) {
+        stats->maxTime = elapsed;
+    }
+    stats->totalTime += elapsed;
+    stats->calls++;
+    if (slot->status >= 400) {
+        stats->errors++;
+    }
+    stats->bytesIn += slot->ctx.bodyLength;
+    stats->bytesOut += out;
+}
+#endif
+
+static const char restBusyResponse[] =
+    "HTTP/1.0 503 Service Unavailable\r\nContent-Length: 0\r\n\r\n";
+
+/* O httpd abre a resposta (fs_open) na mesma chamada em que o POST termina,
+ * então um slot ainda em RESPONDING aqui pertence a uma conexão que caiu
+ * antes do envio e pode ser reaproveitado. */
+static restSlot_t *restSlotAlloc(void)
+{
+    unsigned int i;
+    for (i = 0; i < REST_MAX_CONNECTIONS; i++) {
+        if (((restSlots[i].state == REST_SLOT_FREE) || (restSlots[i].state == REST_SLOT_RESPONDING)) &&
+            (restSlots[i].pending == 0u)) {
+            memset(&restSlots[i], 0, offsetof(restSlot_t, uri));
+            restSlots[i].state = REST_SLOT_RECEIVING;
+            return &restSlots[i];
+        }
+    }
+    return NULL;
+}
+
+static restSlot_t *restSlotFind(void *connection)
+{
+    unsigned int i;
+    for (i = 0; i < REST_MAX_CONNECTIONS; i++) {
+        if ((restSlots[i].state == REST_SLOT_RECEIVING) && (restSlots[i].connection == connection)) {
+            return &restSlots[i];
+        }
+    }
+    return NULL;
+}
+
+static const char *restStatusText(int status)
+{
+    switch (status) {
+    case 200: return "OK";
+    case 201: return "Created";
+    case 202: return "Accepted";
+    case 204: return "No Content";
+    case 400: return "Bad Request";
+    case 401: return "Unauthorized";
+    case 403: return "Forbidden";
+    case 404: return "Not Found";
+    case 405: return "Method Not Allowed";
+    case 409: return "Conflict";
+    case 413: return "Payload Too Large";
+    case 414: return "URI Too Long";
+    case 422: return "Unprocessable Entity";
+    case 429: return "Too Many Requests";
+    case 503: return "Service Unavailable";
+    default:  return (status < 500) ? "Error" : "Internal Server Error";
+    }
+}
+
+static unsigned int restAppend(char *out, unsigned int pos, unsigned int size, const char *text)
+{
+    while ((*text != '\0') && (pos < size)) {
+        out[pos++] = *text++;
+    }
+    return pos;
+}
+
+static unsigned int restAppendUInt(char *out, unsigned int pos, unsigned int size, unsigned long value)
+{
+    char digits[12];
+    unsigned int n = 0;
+    do {
+        digits[n++] = (char)('0' + (value % 10u));
+        value /= 10u;
+    } while ((value != 0u) && (n < sizeof(digits)));
+    while ((n > 0u) && (pos < size)) {
+        out[pos++] = digits[--n];
+    }
+    return pos;
+}
+
+/* Preenche o struct tipado da operação com os parâmetros de path e query e,
+ * se houver corpo JSON, prepara o parser para recebê-lo em partes. */
+static int restBindRequest(restSlot_t *slot)
+{
+    const restEndpoint_t *ep = &restEndpoints[slot->match.endpoint];
+    const restJsonSchema_t *schema;
+    const char *cursor = restRoutePool + ep->path;
+    const char *end = cursor + ep->pathLength;
+    const char *name;
+    unsigned int nameLength;
+    char *base = (char *)&slot->request;
+    unsigned int i;
+    int rc;
+
+    if (ep->requestSchema < 0) {
+        slot->ctx.request = NULL;
+        return 0;
+    }
+    schema = &restJsonSchemas[ep->requestSchema];
+    memset(base, 0, schema->size);
+    slot->ctx.request = base;
+    for (i = 0; i < slot->match.paramCount; i++) {
+        name = restPatternNextParam(&cursor, end, &nameLength);
+        if (name == NULL) {
+            break;
+        }
+        rc = restBindParam(schema, base, name, nameLength,
+                           slot->match.params[i].ptr, slot->match.params[i].length);
+        if (rc != 0) {
+            return rc;
+        }
+    }
+    rc = restBindQuery(schema, base, slot->ctx.queryString);
+    if (rc != 0) {
+        return rc;
+    }
+    if (ep->bodySchema >= 0) {
+        restJsonBegin(&slot->json, &restJsonSchemas[ep->bodySchema], base + ep->bodyOffset, !ep->bodyRequired);
+    }
+    return 0;
+}
+
+/* Copia a URI para o slot (os spans de parâmetros apontam para esta cópia,
+ * pois o buffer da requisição do httpd não sobrevive ao httpd_post_begin) e
+ * resolve a rota. Retorna 0 ou o status HTTP de erro. */
+static int restSlotStart(restSlot_t *slot, const char *uri, httpMethod_t method)
+{
+    unsigned int length = 0;
+    const char *query;
+
+    while (uri[length] != '\0') {
+        if (length >= REST_URI_MAX_LENGTH) {
+            slot->uri[0] = '\0';
+            return 414;
+        }
+        slot->uri[length] = uri[length];
+        length++;
+    }
+    slot->uri[length] = '\0';
+
+    slot->response.buffer = slot->buffer + REST_RESPONSE_HEADER_RESERVE;
+    slot->response.size = REST_RESPONSE_BUFFER_SIZE;
+    slot->response.length = 0;
+    slot->response.contentType = "application/json";
+
+    query = strchr(slot->uri, '?');
+    slot->ctx.uri = slot->uri;
+    slot->ctx.queryString = (query != NULL) ? (query + 1) : NULL;
+    slot->ctx.method = method;
+    slot->ctx.response = &slot->response;
+
+    switch (restRouteLookup(slot->uri, length, method, &slot->match)) {
+    case REST_ROUTE_FOUND:
+        slot->ctx.params = slot->match.params;
+        slot->ctx.paramCount = slot->match.paramCount;
+#if REST_RATE_LIMIT_COUNT > 0
+        /* x-rate-limit: antes do parser de query/corpo e do handler. */
+        if (restRateLimitTake((unsigned int)slot->match.endpoint, slot->connection) != 0) {
+            return 429;
+        }
+#endif
+        return restBindRequest(slot);
+    case REST_ROUTE_METHOD_NOT_ALLOWED:
+        return 405;
+    default:
+        return 404;
+    }
+}
+
+static void restSlotRunHandler(restSlot_t *slot)
+{
+    const restEndpoint_t *ep;
+    int rc;
+    if (slot->status != 0) {
+        return;
+    }
+    ep = &restEndpoints[slot->match.endpoint];
+    if (ep->requestSchema >= 0) {
+        /* Parâmetros obrigatórios: verificados após path, query e corpo. */
+        unsigned long required = restJsonSchemas[ep->requestSchema].required;
+        if ((*(const unsigned long *)(const void *)&slot->request & required) != required) {
+            slot->status = 400;
+            return;
+        }
+    }
+#if REST_STATS
+    slot->statsStart = (u32_t)REST_STATS_NOW();
+#endif
+    rc = restEndpoints[slot->match.endpoint].handler(&slot->ctx);
+#if REST_ASYNC_COUNT > 0
+    if (slot->pending != 0u) {
+        if (rc == REST_PENDING) {
+            /* status fica 0 até restAsyncComplete (restAsyncDone), que
+             * também fecha a medição de REST_STATS. */
+            return;
+        }
+        /* Token reservado, mas o handler respondeu na hora: descarta. */
+        restPending[slot->pending - 1u].slot = NULL;
+        restPending[slot->pending - 1u].generation++;
+        slot->pending = 0u;
+    }
+#endif
+    if (rc == REST_PENDING) {
+        /* REST_PENDING sem restAsyncDefer (ou endpoint sem x-async). */
+        rc = -1;
+    }
+    /* 0 mantém compatibilidade com handlers que só retornam sucesso. */
+    slot->status = (rc == 0) ? 200 : ((rc < 0) ? 500 : rc);
+#if REST_STATS
+    restStatsRecord(slot);
+#endif
+}
+
+#if REST_CACHE_COUNT > 0
+/* Resposta 200 de um GET com x-cache-ttl: guarda os bytes já montados. */
+static void restSlotCache(restSlot_t *slot)
+{
+    if (slot->status != 200) {
+        return;
+    }
+#if REST_RESPONSE_STREAMING
+    if (slot->streaming) {
+        return;
+    }
+#endif
+    restCacheStore(&slot->match, slot->buffer + slot->headerOffset,
+                   (REST_RESPONSE_HEADER_RESERVE - slot->headerOffset) + slot->response.length);
+}
+#endif
+
+static void restSlotCompose(restSlot_t *slot)
+{
+    char header[REST_RESPONSE_HEADER_RESERVE];
+    unsigned int n = 0;
+    const unsigned int size = sizeof(header);
+
+#if REST_ASYNC_COUNT > 0
+    if (restSlotAwaiting(slot)) {
+        return;
+    }
+#endif
+    if (slot->response.length > slot->response.size) {
+        slot->response.length = slot->response.size;
+    }
+    n = restAppend(header, n, size, "HTTP/1.0 ");
+    n = restAppendUInt(header, n, size, (unsigned long)slot->status);
+    n = restAppend(header, n, size, " ");
+    n = restAppend(header, n, size, restStatusText(slot->status));
+    n = restAppend(header, n, size, "\r\n");
+    if (slot->status == 405) {
+        unsigned int m;
+        int first = 1;
+        n = restAppend(header, n, size, "Allow: ");
+        for (m = 0; m < REST_METHOD_COUNT; m++) {
+            if (slot->match.methodMask & REST_METHOD_BIT(m)) {
+                n = restAppend(header, n, size, first ? "" : ", ");
+                n = restAppend(header, n, size, restMethodNames[m]);
+                first = 0;
+            }
+        }
+        n = restAppend(header, n, size, "\r\n");
+    }
+#if REST_RESPONSE_STREAMING
+    if (slot->streaming) {
+        /* Tamanho final desconhecido: HTTP/1.0 sem Content-Length (fim = fechamento). */
+        n = restAppend(header, n, size, "Content-Type: ");
+        n = restAppend(header, n, size, slot->response.contentType);
+        n = restAppend(header, n, size, "\r\n\r\n");
+        slot->headerOffset = REST_RESPONSE_HEADER_RESERVE - n;
+        memcpy(slot->buffer + slot->headerOffset, header, n);
+        return;
+    }
+#endif
+    if ((slot->response.length > 0u) && (slot->response.contentType != NULL)) {
+        n = restAppend(header, n, size, "Content-Type: ");
+        n = restAppend(header, n, size, slot->response.contentType);
+        n = restAppend(header, n, size, "\r\n");
+    }
+    n = restAppend(header, n, size, "Content-Length: ");
+    n = restAppendUInt(header, n, size, (unsigned long)slot->response.length);
+    n = restAppend(header, n, size, "\r\n\r\n");
+
+    slot->headerOffset = REST_RESPONSE_HEADER_RESERVE - n;
+    memcpy(slot->buffer + slot->headerOffset, header, n);
+}
+
+static void restSlotResponseUri(restSlot_t *slot, char *responseUri, u16_t responseUriLength)
+{
+    unsigned int n;
+    if ((responseUri == NULL) || (responseUriLength == 0u)) {
+        return;
+    }
+    n = restAppend(responseUri, 0u, responseUriLength - 1u, REST_RESPONSE_URI_PREFIX);
+    n = restAppendUInt(responseUri, n, responseUriLength - 1u, (unsigned long)(slot - restSlots));
+    responseUri[n] = '\0';
+}
+
+static void restBusyUri(char *responseUri, u16_t responseUriLength)
+{
+    unsigned int n;
+    if ((responseUri == NULL) || (responseUriLength == 0u)) {
+        return;
+    }
+    n = restAppend(responseUri, 0u, responseUriLength - 1u, REST_RESPONSE_URI_PREFIX "busy");
+    responseUri[n] = '\0';
+}
+
+#if REST_RATE_LIMIT_COUNT > 0
+static void restRateLimitedUri(int endpoint, char *responseUri, u16_t responseUriLength)
+{
+    unsigned int n;
+    if ((responseUri == NULL) || (responseUriLength == 0u)) {
+        return;
+    }
+    n = restAppend(responseUri, 0u, responseUriLength - 1u, REST_RESPONSE_URI_PREFIX "limited");
+    n = restAppendUInt(responseUri, n, responseUriLength - 1u, (unsigned long)restRateLimitIndex[endpoint]);
+    responseUri[n] = '\0';
+}
+#endif
+
+err_t restPostBegin(void *connection, const char *uri, int contentLength,
+                    char *responseUri, u16_t responseUriLength)
+{
+    restSlot_t *slot = restSlotFind(connection);
+
+    /* Estado de conexão reaproveitado após um POST abortado: recicla o slot. */
+    if (slot != NULL) {
+        slot->state = REST_SLOT_FREE;
+    }
+    slot = restSlotAlloc();
+    if (slot == NULL) {
+        restBusyUri(responseUri, responseUriLength);
+        return ERR_MEM;
+    }
+    slot->connection = connection;
+    slot->status = restSlotStart(slot, uri, HTTP_METHOD_POST);
+    if (slot->status == 0) {
+        /* Rejeição antecipada: o limite vem do spec (x-max-body-size/maxLength). */
+        const restEndpoint_t *ep = &restEndpoints[slot->match.endpoint];
+        if ((contentLength < 0) || ((unsigned long)contentLength > ep->maxBodyLength)) {
+            slot->status = 413;
+        } else {
+            slot->expected = (unsigned long)contentLength;
+        }
+    }
+#if REST_RATE_LIMIT_COUNT > 0
+    if (slot->status == 429) {
+        /* 429 pré-montado na flash: o slot fica livre de imediato. */
+        slot->state = REST_SLOT_FREE;
+        slot->connection = NULL;
+        restRateLimitedUri(slot->match.endpoint, responseUri, responseUriLength);
+        return ERR_ARG;
+    }
+#endif
+    if (slot->status != 0) {
+        restSlotCompose(slot);
+        slot->state = REST_SLOT_RESPONDING;
+        slot->connection = NULL;
+        restSlotResponseUri(slot, responseUri, responseUriLength);
+        return ERR_ARG;
+    }
+    return ERR_OK;
+}
+
+err_t restPostReceive(void *connection, struct pbuf *p)
+{
+    restSlot_t *slot = restSlotFind(connection);
+    struct pbuf *q;
+
+    if (slot != NULL) {
+        const restEndpoint_t *ep = &restEndpoints[slot->match.endpoint];
+        /* Entrega cada segmento da cadeia de pbufs sem copiar. */
+        for (q = p; (q != NULL) && (slot->status == 0); q = q->next) {
+            if ((slot->ctx.bodyLength + q->len) > slot->expected) {
+                slot->status = 413;
+                break;
+            }
+            if (ep->bodySchema >= 0) {
+                int rc = restJsonFeed(&slot->json, q->payload, q->len);
+                if (rc != 0) {
+                    slot->status = rc;
+                    break;
+                }
+            } else if (ep->bodyHandler != NULL) {
+                int rc = ep->bodyHandler(&slot->ctx, q->payload, q->len);
+                if (rc != 0) {
+                    slot->status = (rc < 0) ? 500 : rc;
+                    break;
+                }
+            }
+            slot->ctx.bodyLength += q->len;
+        }
+    }
+    pbuf_free(p);
+    return ERR_OK;
+}
+
+void restPostFinished(void *connection, char *responseUri, u16_t responseUriLength)
+{
+    restSlot_t *slot = restSlotFind(connection);
+
+    if (slot == NULL) {
+        restBusyUri(responseUri, responseUriLength);
+        return;
+    }
+    if ((slot->status == 0) && (slot->ctx.bodyLength != slot->expected)) {
+        slot->status = 400;
+    }
+    if ((slot->status == 0) && (restEndpoints[slot->match.endpoint].bodySchema >= 0)) {
+        slot->status = restJsonEnd(&slot->json, slot->ctx.bodyLength);
+    }
+    restSlotRunHandler(slot);
+    restSlotCompose(slot);
+    slot->state = REST_SLOT_RESPONDING;
+    slot->connection = NULL;
+    restSlotResponseUri(slot, responseUri, responseUriLength);
+}
+
+static void restFileFromSlot(struct fs_file *file, restSlot_t *slot)
+{
+#if REST_CGI_DEFER
+    if (slot->deferred) {
+        /* Handler ainda não rodou: data NULL e len provisório até
+         * restCgiHandler ou a primeira leitura (restSlotRunDeferred). */
+        file->data = NULL;
+        file->len = (int)(REST_RESPONSE_HEADER_RESERVE + REST_RESPONSE_BUFFER_SIZE);
+        file->index = 0;
+        file->pextension = slot;
+        file->flags = FS_FILE_FLAGS_HEADER_INCLUDED;
+        return;
+    }
+#endif
+#if REST_ASYNC_COUNT > 0
+    if (restSlotAwaiting(slot)) {
+        /* Resposta ainda na tarefa: data NULL e fs_canread_custom = 0 até
+         * restAsyncDone; len é provisório (o máximo que cabe no slot). */
+        file->data = NULL;
+        file->len = (int)(REST_RESPONSE_HEADER_RESERVE + REST_RESPONSE_BUFFER_SIZE);
+        file->index = 0;
+        file->pextension = slot;
+        file->flags = FS_FILE_FLAGS_HEADER_INCLUDED;
+        restPending[slot->pending - 1u].file = file;
+        return;
+    }
+#endif
+#if REST_RESPONSE_STREAMING
+    if (slot->streaming) {
+        /* data NULL: o httpd lê tudo via fs_read_custom (restFsRead); len é
+         * só o limite superior, a leitura termina ao esgotar o serializador. */
+        unsigned long length = (REST_RESPONSE_HEADER_RESERVE - slot->headerOffset) + slot->streamLength;
+        file->data = NULL;
+        file->len = (length > (unsigned long)INT_MAX) ? INT_MAX : (int)length;
+        file->index = 0;
+        file->pextension = slot;
+        file->flags = FS_FILE_FLAGS_HEADER_INCLUDED;
+        return;
+    }
+#endif
+    file->data = slot->buffer + slot->headerOffset;
+    file->len = (int)((REST_RESPONSE_HEADER_RESERVE - slot->headerOffset) + slot->response.length);
+    file->index = file->len;
+    file->pextension = slot;
+    file->flags = FS_FILE_FLAGS_HEADER_INCLUDED;
+}
+
+#if (REST_ASYNC_COUNT > 0) || REST_CGI_DEFER
+/* Tamanho final de uma resposta montada depois do fs_open, que o httpd lê
+ * por restFsRead (data continua NULL). */
+static void restFileReadLength(struct fs_file *file, const restSlot_t *slot)
+{
+#if REST_RESPONSE_STREAMING
+    if (slot->streaming) {
+        unsigned long length = (REST_RESPONSE_HEADER_RESERVE - slot->headerOffset) + slot->streamLength;
+        file->len = (length > (unsigned long)INT_MAX) ? INT_MAX : (int)length;
+    } else
+#endif
+    {
+        file->len = (int)((REST_RESPONSE_HEADER_RESERVE - slot->headerOffset) + slot->response.length);
+    }
+    file->index = 0;
+}
+#endif
+
+#if REST_STATS
+static unsigned int restAppendU64(char *out, unsigned int pos, unsigned int size, unsigned long long value)
+{
+    char digits[21];
+    unsigned int n = 0;
+    do {
+        digits[n++] = (char)('0' + (int)(value % 10u));
+        value /= 10u;
+    } while (value != 0u);
+    while ((n > 0u) && (pos < size)) {
+        out[pos++] = digits[--n];
+    }
+    return pos;
+}
+
+/* GET <prefixo>/_stats[/<primeiro>]: uma linha por endpoint, na ordem de
+ * restEndpoints[], enquanto couber no buffer do slot; "next" indica a
+ * página seguinte. A query é ignorada (no modo CGI ela nem chega aqui). */
+static int restStatsResponse(restSlot_t *slot, const char *rest)
+{
+    const unsigned int count = (unsigned int)(sizeof(restStats) / sizeof(restStats[0]));
+    char *out = slot->buffer + REST_RESPONSE_HEADER_RESERVE;
+    const unsigned int size = REST_RESPONSE_BUFFER_SIZE;
+    unsigned int first = 0;
+    unsigned int i;
+    unsigned int n = 0;
 
+    slot->response.buffer = out;
+    slot->response.size = size;
+    slot->response.length = 0;
+    slot->response.contentType = "application/json";
+    if (*rest == '/') {
+        for (rest++; (*rest >= '0') && (*rest <= '9'); rest++) {
+            first = (first * 10u) + (unsigned int)(*rest - '0');
+        }
+    }
+    if (((*rest != '\0') && (*rest != '?')) || (first > count)) {
+        return 404;
+    }
+    n = restAppend(out, n, size, "{\"count\":");
+    n = restAppendUInt(out, n, size, (unsigned long)count);
+    n = restAppend(out, n, size, ",\"unit\":\"" REST_STATS_UNIT "\",\"first\":");
+    n = restAppendUInt(out, n, size, (unsigned long)first);
+    n = restAppend(out, n, size, ",\"stats\":[");
+    for (i = first; i < count; i++) {
+        /* Linha: [calls,errors,bytesIn,bytesOut,minTime,maxTime,totalTime] */
+        char row[96];
+        unsigned int r = 0;
+        const restStats_t *stats = &restStats[i];
+        r = restAppend(row, r, sizeof(row), (i > first) ? ",[" : "[");
+        r = restAppendUInt(row, r, sizeof(row), (unsigned long)stats->calls);
+        r = restAppend(row, r, sizeof(row), ",");
+        r = restAppendUInt(row, r, sizeof(row), (unsigned long)stats->errors);
+        r = restAppend(row, r, sizeof(row), ",");
+        r = restAppendUInt(row, r, sizeof(row), (unsigned long)stats->bytesIn);
+        r = restAppend(row, r, sizeof(row), ",");
+        r = restAppendUInt(row, r, sizeof(row), (unsigned long)stats->bytesOut);
+        r = restAppend(row, r, sizeof(row), ",");
+        r = restAppendUInt(row, r, sizeof(row), (unsigned long)stats->minTime);
+        r = restAppend(row, r, sizeof(row), ",");
+        r = restAppendUInt(row, r, sizeof(row), (unsigned long)stats->maxTime);
+        r = restAppend(row, r, sizeof(row), ",");
+        r = restAppendU64(row, r, sizeof(row), stats->totalTime);
+        r = restAppend(row, r, sizeof(row), "]");
+        /* Reserva para o fechamento com "next". */
+        if ((n + r + 24u) > size) {
+            break;
+        }
+        memcpy(out + n, row, r);
+        n += r;
+    }
+    if ((i == first) && (i < count)) {
+        /* Nem uma linha cabe: REST_RESPONSE_BUFFER_SIZE pequeno demais. */
+        return 500;
+    }
+    n = restAppend(out, n, size, "]");
+    if (i < count) {
+        n = restAppend(out, n, size, ",\"next\":");
+        n = restAppendUInt(out, n, size, (unsigned long)i);
+    }
+    n = restAppend(out, n, size, "}");
+    slot->response.length = n;
+    return 200;
+}
 
-def build_handler_name(method: str, path: str) -> str:
-    """Gera o nome de função C para o handler a partir de método + path."""
+const restStats_t *restStatsTable(unsigned int *count)
+{
+    if (count != NULL) {
+        *count = (unsigned int)(sizeof(restStats) / sizeof(restStats[0]));
+    }
+    return restStats;
+}
 
-    # remove prefixo inicial
-    if path.startswith("/"):
-        path = path[1:]
+void restStatsReset(void)
+{
+    memset(restStats, 0, sizeof(restStats));
+}
+#endif
 
-    # remove chaves de parâmetros {id}
-    clean = []
-    for ch in path:
-        if ch in "{}":
-            continue
-        if ch.isalnum():
-            clean.append(ch)
-        else:
-            clean.append("_")
-    base = "".join(clean).strip("_") or "root"
+int restFsOpen(struct fs_file *file, const char *name)
+{
+    restSlot_t *slot = NULL;
+    const unsigned int prefixLength = sizeof(REST_RESPONSE_URI_PREFIX) - 1u;
+    const unsigned int apiLength = sizeof(REST_API_PREFIX) - 1u;
 
-    return f"restHandle_{method.upper()}_{base}"
+    if (strncmp(name, REST_RESPONSE_URI_PREFIX, prefixLength) == 0) {
+        const char *p = name + prefixLength;
+        unsigned int index = 0;
+        if (strcmp(p, "busy") == 0) {
+            file->data = restBusyResponse;
+            file->len = (int)(sizeof(restBusyResponse) - 1u);
+            file->index = file->len;
+            file->pextension = NULL;
+            file->flags = FS_FILE_FLAGS_HEADER_INCLUDED;
+            return 1;
+        }
+#if REST_RATE_LIMIT_COUNT > 0
+        if (strncmp(p, "limited", 7) == 0) {
+            for (p += 7; (*p >= '0') && (*p <= '9'); p++) {
+                index = (index * 10u) + (unsigned int)(*p - '0');
+            }
+            return (*p == '\0') ? restRateLimitedFile(file, index) : 0;
+        }
+#endif
+        while ((*p >= '0') && (*p <= '9')) {
+            index = (index * 10u) + (unsigned int)(*p++ - '0');
+        }
+        if ((*p != '\0') || (index >= REST_MAX_CONNECTIONS) ||
+            (restSlots[index].state != REST_SLOT_RESPONDING)) {
+            return 0;
+        }
+        slot = &restSlots[index];
+    } else if ((strncmp(name, REST_API_PREFIX, apiLength) == 0) &&
+               ((name[apiLength] == '/') || (name[apiLength] == '\0') || (name[apiLength] == '?'))) {
+#if REST_STATS
+        if ((strncmp(name + apiLength, "/_stats", 7) == 0) &&
+            ((name[apiLength + 7u] == '\0') || (name[apiLength + 7u] == '/') || (name[apiLength + 7u] == '?'))) {
+            slot = restSlotAlloc();
+            if (slot == NULL) {
+                return restFsOpen(file, REST_RESPONSE_URI_PREFIX "busy");
+            }
+            slot->status = restStatsResponse(slot, name + apiLength + 7u);
+            restSlotCompose(slot);
+            slot->state = REST_SLOT_SERVING;
+            restFileFromSlot(file, slot);
+            return 1;
+        }
+#endif
+#if REST_STATIC_COUNT > 0
+        {
+            /* Escopo próprio: o bloco de REST_STATS vem antes (C90). */
+            restRouteMatch_t match;
+            /* GET x-static: a resposta pré-montada está no fsdata (makefsdata
+             * -frag); 0 faz o httpd seguir para o FS_ROOT sem ocupar um slot. */
+            if ((restRouteLookup(name, (unsigned int)strcspn(name, "?"), HTTP_METHOD_GET, &match) == REST_ROUTE_FOUND) &&
+                (restEndpoints[match.endpoint].handler == NULL)) {
+                return 0;
+            }
+        }
+#endif
+        slot = restSlotAlloc();
+        if (slot == NULL) {
+            return restFsOpen(file, REST_RESPONSE_URI_PREFIX "busy");
+        }
+        slot->status = restSlotStart(slot, name, HTTP_METHOD_GET);
+#if REST_RATE_LIMIT_COUNT > 0
+        if (slot->status == 429) {
+            slot->state = REST_SLOT_FREE;
+            return restRateLimitedFile(file, (unsigned int)restRateLimitIndex[slot->match.endpoint]);
+        }
+#endif
+#if REST_CACHE_COUNT > 0
+        /* x-cache-ttl: acerto servido do buffer do cache, sem handler. */
+        if ((slot->status == 0) && restCacheServe(file, &slot->match)) {
+            slot->state = REST_SLOT_FREE;
+            return 1;
+        }
+#endif
+#if REST_CGI_DEFER
+        if ((slot->status == 0) && restQueryEndpoints[slot->match.endpoint]) {
+            /* O httpd remove a query antes do fs_open e só a entrega, em
+             * httpd_cgi_handler, se a URI tiver '?'. */
+            slot->deferred = 1u;
+            slot->state = REST_SLOT_SERVING;
+            restFileFromSlot(file, slot);
+            return 1;
+        }
+#endif
+        restSlotRunHandler(slot);
+        restSlotCompose(slot);
+#if REST_CACHE_COUNT > 0
+        restSlotCache(slot);
+#endif
+    } else {
+        return 0;
+    }
 
+    slot->state = REST_SLOT_SERVING;
+    restFileFromSlot(file, slot);
+    return 1;
+}
 
-def extract_endpoints(swagger: Dict, api_prefix: str) -> List[Endpoint]:
-    """Extrai a lista de endpoints a partir da estrutura do Swagger/OpenAPI."""
+/* Roda o handler de um GET adiado por restFsOpen e monta a resposta. */
+static void restSlotFinishDeferred(restSlot_t *slot)
+{
+    slot->deferred = 0u;
+    restSlotRunHandler(slot);
+    restSlotCompose(slot);
+#if REST_CACHE_COUNT > 0
+    restSlotCache(slot);
+#endif
+}
 
-    paths = swagger.get("paths")
-    if not isinstance(paths, dict):
-        raise SystemExit("Swagger/OpenAPI JSON inválido: objeto 'paths' não encontrado.")
+#if REST_CGI_DEFER
+/* GET adiado sem '?' na URI: o httpd não chamou httpd_cgi_handler e já leu
+ * file->data (NULL), então o handler roda na primeira leitura, sem query, e
+ * a resposta sai por restFsRead. */
+static void restSlotRunDeferred(struct fs_file *file, restSlot_t *slot)
+{
+    restSlotFinishDeferred(slot);
+#if REST_ASYNC_COUNT > 0
+    if (restSlotAwaiting(slot)) {
+        restFileFromSlot(file, slot);
+        return;
+    }
+#endif
+    restFileReadLength(file, slot);
+}
+#endif
 
-    endpoints: List[Endpoint] = []
+/* Completa um GET adiado por restFsOpen com os parâmetros de query já
+ * separados pelo httpd (nomes e valores ainda codificados). Arquivos que não
+ * pertencem ao dispatcher são ignorados. */
+void restCgiHandler(struct fs_file *file, int count, char **names, char **values)
+{
+    restSlot_t *slot = (restSlot_t *)file->pextension;
+    int i;
 
-    for raw_path, item in paths.items():
-        if _stop_requested:
-            break
-        if not isinstance(item, dict):
-            continue
+    if ((slot < &restSlots[0]) || (slot >= &restSlots[REST_MAX_CONNECTIONS]) || !slot->deferred) {
+        return;
+    }
+    slot->deferred = 0u;
+    if ((slot->status == 0) && (restEndpoints[slot->match.endpoint].requestSchema >= 0)) {
+        const restJsonSchema_t *schema = &restJsonSchemas[restEndpoints[slot->match.endpoint].requestSchema];
+        for (i = 0; (i < count) && (slot->status == 0); i++) {
+            const char *value = (values[i] != NULL) ? values[i] : "";
+            slot->status = restBindParam(schema, (char *)&slot->request, names[i], (unsigned int)strlen(names[i]),
+                                         value, (unsigned int)strlen(value));
+        }
+    }
+    restSlotFinishDeferred(slot);
+    restFileFromSlot(file, slot);
+}
 
-        # Garante path normalizado
-        raw_path = normalize_path(str(raw_path))
+#if REST_RESPONSE_STREAMING || (REST_ASYNC_COUNT > 0)
+/* Slot dono do contexto (NULL se o contexto não for de um slot). */
+static restSlot_t *restSlotFromContext(const restRequestContext_t *ctx)
+{
+    restSlot_t *slot = (restSlot_t *)(void *)((char *)(void *)ctx - offsetof(restSlot_t, ctx));
+    if ((slot < &restSlots[0]) || (slot >= &restSlots[REST_MAX_CONNECTIONS])) {
+        return NULL;
+    }
+    return slot;
+}
+#endif
 
-        # Aplica prefixo /api/vX se ainda não estiver presente
-        full_path = raw_path
-        if not full_path.startswith(api_prefix):
-            # Evita duplicar barra
-            if raw_path.startswith("/"):
-                full_path = api_prefix + raw_path
-            else:
-                full_path = api_prefix + "/" + raw_path
+/* Serializa a resposta tipada no buffer do slot. Se não couber e
+ * REST_RESPONSE_STREAMING estiver ativo, o valor é copiado para o slot e
+ * serializado em partes por restFsRead durante o envio; senão, 500. */
+int restRespondJson(const restRequestContext_t *ctx, unsigned int schema, const void *value,
+                    unsigned int valueSize, int status)
+{
+    restResponse_t *response = ctx->response;
+    restJsonWriter_t writer;
 
-        for method, op in item.items():
-            if method.lower() not in HTTP_METHODS:
-                continue
-            if not isinstance(op, dict):
-                continue
+    restJsonWriterBegin(&writer, schema, value);
+    response->length = restJsonWriterWrite(&writer, response->buffer, response->size);
+    response->contentType = "application/json";
+    if (restJsonWriterDone(&writer)) {
+        return status;
+    }
+    response->length = 0u;
+#if REST_RESPONSE_STREAMING
+    {
+        restSlot_t *slot = restSlotFromContext(ctx);
+        if ((slot != NULL) && (valueSize <= sizeof(slot->value))) {
+            memcpy(&slot->value, value, valueSize);
+            restJsonWriterBegin(&slot->writer, schema, &slot->value);
+            slot->streaming = 1u;
+            slot->headerSent = 0u;
+            slot->streamLength = restJsonSchemas[schema].maxLength;
+            return status;
+        }
+    }
+#else
+    (void)valueSize;
+#endif
+    return -1;
+}
 
-            handler_name = build_handler_name(method, full_path)
-            endpoints.append(Endpoint(path=full_path, method=method.lower(), handler_name=handler_name))
+/* fs_read_custom: cabeçalho e depois o JSON, serializado direto no buffer
+ * de envio do httpd, ou a resposta montada no slot depois do fs_open (x-async
+ * e GETs adiados). Retorna FS_READ_EOF quando não há mais nada. */
+int restFsRead(struct fs_file *file, char *buffer, int count)
+{
+#if REST_RESPONSE_STREAMING || (REST_ASYNC_COUNT > 0) || REST_CGI_DEFER
+    restSlot_t *slot = (restSlot_t *)file->pextension;
+    unsigned int n = 0;
 
-    return endpoints
+    if ((slot < &restSlots[0]) || (slot >= &restSlots[REST_MAX_CONNECTIONS]) || (count <= 0)) {
+        return FS_READ_EOF;
+    }
+#if REST_CGI_DEFER
+    if (slot->deferred) {
+        restSlotRunDeferred(file, slot);
+    }
+#endif
+#if REST_ASYNC_COUNT > 0
+    if (restSlotAwaiting(slot)) {
+        return FS_READ_DELAYED;
+    }
+#endif
+#if REST_RESPONSE_STREAMING
+    if (slot->streaming) {
+        unsigned int headerLength = REST_RESPONSE_HEADER_RESERVE - slot->headerOffset;
+        unsigned int body;
+        while ((slot->headerSent < headerLength) && (n < (unsigned int)count)) {
+            buffer[n++] = slot->buffer[slot->headerOffset + slot->headerSent++];
+        }
+        body = restJsonWriterWrite(&slot->writer, buffer + n, (unsigned int)count - n);
+#if REST_STATS
+        restStats[slot->match.endpoint].bytesOut += body;
+#endif
+        n += body;
+        if (n == 0u) {
+            file->index = file->len;
+            return FS_READ_EOF;
+        }
+        file->index += (int)n;
+        if (restJsonWriterDone(&slot->writer) || (file->index >= file->len)) {
+            file->index = file->len;
+        }
+        return (int)n;
+    }
+#endif
+    /* Resposta já montada no buffer do slot (data NULL). */
+    if (file->data != NULL) {
+        return FS_READ_EOF;
+    }
+    if (file->index >= file->len) {
+        return FS_READ_EOF;
+    }
+    n = (unsigned int)(file->len - file->index);
+    if (n > (unsigned int)count) {
+        n = (unsigned int)count;
+    }
+    memcpy(buffer, slot->buffer + slot->headerOffset + file->index, n);
+    file->index += (int)n;
+    return (int)n;
+#else
+    LWIP_UNUSED_ARG(file);
+    LWIP_UNUSED_ARG(buffer);
+    LWIP_UNUSED_ARG(count);
+    return FS_READ_EOF;
+#endif
+}
 
+void restFsClose(struct fs_file *file)
+{
+    restSlot_t *slot = (restSlot_t *)file->pextension;
+#if REST_CACHE_COUNT > 0
+    if (restCacheRelease(file)) {
+        return;
+    }
+#endif
+    if ((slot >= &restSlots[0]) && (slot < &restSlots[REST_MAX_CONNECTIONS])) {
+#if REST_ASYNC_COUNT > 0
+        if (slot->pending != 0u) {
+            restPending_t *pending = &restPending[slot->pending - 1u];
+            file->pextension = NULL;
+            if (!pending->done) {
+                /* A tarefa ainda vai escrever no slot: restAsyncDone o libera. */
+                pending->closed = 1u;
+                pending->callback = NULL;
+                pending->file = NULL;
+                return;
+            }
+            pending->slot = NULL;
+            pending->generation++;
+            slot->pending = 0u;
+        }
+#endif
+        slot->state = REST_SLOT_FREE;
+        file->pextension = NULL;
+    }
+}
 
-def method_enum_name(method: str) -> str:
-    """Converte método HTTP textual em identificador de enum C."""
+#if REST_ASYNC_COUNT > 0
+static restPending_t *restPendingFromToken(restAsyncToken_t token)
+{
+    unsigned int index = (unsigned int)(token & 0xFFu);
+    if ((index >= REST_ASYNC_MAX_PENDING) || (restPending[index].slot == NULL) ||
+        (restPending[index].generation != (unsigned char)(token >> 8))) {
+        return NULL;
+    }
+    return &restPending[index];
+}
 
-    return f"HTTP_METHOD_{method.upper()}"
+restAsyncToken_t restAsyncDefer(const restRequestContext_t *ctx)
+{
+    restSlot_t *slot = restSlotFromContext(ctx);
+    unsigned int i;
 
+    if ((slot == NULL) || !restAsyncEndpoints[slot->match.endpoint]) {
+        return REST_ASYNC_INVALID;
+    }
+    if (slot->pending != 0u) {
+        i = slot->pending - 1u;
+        return (restAsyncToken_t)(((unsigned int)restPending[i].generation << 8) | i);
+    }
+    for (i = 0; i < REST_ASYNC_MAX_PENDING; i++) {
+        restPending_t *pending = &restPending[i];
+        if (pending->slot == NULL) {
+            pending->slot = slot;
+            pending->file = NULL;
+            pending->callback = NULL;
+            pending->callbackArg = NULL;
+            pending->result = 0;
+            pending->done = 0u;
+            pending->closed = 0u;
+            pending->posted = 0u;
+            slot->pending = (unsigned char)(i + 1u);
+            return (restAsyncToken_t)(((unsigned int)pending->generation << 8) | i);
+        }
+    }
+    return REST_ASYNC_INVALID;
+}
 
-def generate_header_content(header_path: Path, endpoints: Iterable[Endpoint]) -> str:
-    """Gera o conteúdo do arquivo header com typedefs e tabela de endpoints.
+const restRequestContext_t *restAsyncContext(restAsyncToken_t token)
+{
+    restPending_t *pending = restPendingFromToken(token);
+    return ((pending != NULL) && !pending->posted) ? &pending->slot->ctx : NULL;
+}
+
+/* Thread tcpip: monta a resposta e acorda o httpd, se ele estiver esperando. */
+static void restAsyncDone(void *arg)
+{
+    restPending_t *pending = (restPending_t *)arg;
+    restSlot_t *slot = pending->slot;
+    struct fs_file *file = pending->file;
+    fs_wait_cb callback = pending->callback;
+    int rc = pending->result;
+
+    if ((slot == NULL) || pending->done) {
+        return;
+    }
+    slot->status = (rc == 0) ? 200 : ((rc < 0) ? 500 : rc);
+    pending->done = 1u;
+#if REST_STATS
+    restStatsRecord(slot);
+#endif
+    restSlotCompose(slot);
+#if REST_CACHE_COUNT > 0
+    restSlotCache(slot);
+#endif
+    if (pending->closed || (file == NULL)) {
+        /* Conexão caiu (slot livre) ou POST ainda sem fs_open (segue o
+         * caminho normal com a resposta já montada). */
+        pending->slot = NULL;
+        pending->generation++;
+        slot->pending = 0u;
+        if (pending->closed) {
+            slot->state = REST_SLOT_FREE;
+        }
+        return;
+    }
+    restFileReadLength(file, slot);
+    pending->callback = NULL;
+    if (callback != NULL) {
+        callback(pending->callbackArg);
+    }
+}
+
+err_t restAsyncComplete(restAsyncToken_t token, int result)
+{
+    restPending_t *pending = restPendingFromToken(token);
+    err_t err;
+
+    if ((pending == NULL) || pending->posted) {
+        return ERR_ARG;
+    }
+    pending->result = result;
+    pending->posted = 1u;
+    err = tcpip_callback(restAsyncDone, pending);
+    if (err != ERR_OK) {
+        pending->posted = 0u;
+    }
+    return err;
+}
+#endif /* REST_ASYNC_COUNT > 0 */
+
+u8_t restFsCanRead(struct fs_file *file)
+{
+#if (REST_ASYNC_COUNT > 0) || REST_CGI_DEFER
+    restSlot_t *slot = (restSlot_t *)file->pextension;
+    if ((slot < &restSlots[0]) || (slot >= &restSlots[REST_MAX_CONNECTIONS])) {
+        return 1;
+    }
+#if REST_CGI_DEFER
+    if (slot->deferred) {
+        restSlotRunDeferred(file, slot);
+    }
+#endif
+#if REST_ASYNC_COUNT > 0
+    if (restSlotAwaiting(slot)) {
+        return 0;
+    }
+#endif
+#else
+    LWIP_UNUSED_ARG(file);
+#endif
+    return 1;
+}
+
+u8_t restFsWaitRead(struct fs_file *file, void (*callback)(void *arg), void *callbackArg)
+{
+#if REST_ASYNC_COUNT > 0
+    restSlot_t *slot = (restSlot_t *)file->pextension;
+    if ((slot >= &restSlots[0]) && (slot < &restSlots[REST_MAX_CONNECTIONS]) && restSlotAwaiting(slot)) {
+        restPending[slot->pending - 1u].callback = callback;
+        restPending[slot->pending - 1u].callbackArg = callbackArg;
+        return 1;
+    }
+#else
+    LWIP_UNUSED_ARG(file);
+    LWIP_UNUSED_ARG(callback);
+    LWIP_UNUSED_ARG(callbackArg);
+#endif
+    return 0;
+}
 
-    Toda a definição de `restEndpoints` e `restEndpointCount` é gerada aqui
-    como `static const`, evitando a necessidade de um .c separado e
-    prevenindo múltiplas definições ao incluir o header em mais de um módulo.
+int restFsReadAsync(struct fs_file *file, char *buffer, int count, void (*callback)(void *arg), void *callbackArg)
+{
+    if (restFsWaitRead(file, callback, callbackArg)) {
+        return FS_READ_DELAYED;
+    }
+    return restFsRead(file, buffer, count);
+}
+
+#if REST_HTTPD_POST_CALLBACKS && LWIP_HTTPD_SUPPORT_POST
+err_t httpd_post_begin(void *connection, const char *uri, const char *http_request,
+                       u16_t http_request_len, int content_len, char *response_uri,
+                       u16_t response_uri_len, u8_t *post_auto_wnd)
+{
+    LWIP_UNUSED_ARG(http_request);
+    LWIP_UNUSED_ARG(http_request_len);
+    *post_auto_wnd = 1;
+    return restPostBegin(connection, uri, content_len, response_uri, response_uri_len);
+}
+
+err_t httpd_post_receive_data(void *connection, struct pbuf *p)
+{
+    return restPostReceive(connection, p);
+}
+
+void httpd_post_finished(void *connection, char *response_uri, u16_t response_uri_len)
+{
+    restPostFinished(connection, response_uri, response_uri_len);
+}
+#endif /* REST_HTTPD_POST_CALLBACKS && LWIP_HTTPD_SUPPORT_POST */
+
+#if REST_HTTPD_CGI_HANDLER && LWIP_HTTPD_CGI_SSI
+void httpd_cgi_handler(struct fs_file *file, const char *uri, int iNumParams, char **pcParam, char **pcValue
+#if defined(LWIP_HTTPD_FILE_STATE) && LWIP_HTTPD_FILE_STATE
+                       , void *connection_state
+#endif
+                       )
+{
+    LWIP_UNUSED_ARG(uri);
+#if defined(LWIP_HTTPD_FILE_STATE) && LWIP_HTTPD_FILE_STATE
+    LWIP_UNUSED_ARG(connection_state);
+#endif
+    restCgiHandler(file, iNumParams, pcParam, pcValue);
+}
+#endif /* REST_HTTPD_CGI_HANDLER && LWIP_HTTPD_CGI_SSI */
+"""
+
+
+def generate_rate_limit_content(endpoints: List[Endpoint]) -> str:
+    """Gera as tabelas de x-rate-limit: limites (flash) e baldes de tokens (RAM).
+
+    Um balde por endpoint limitado (ou REST_RATE_LIMIT_CLIENTS baldes, se o
+    limite for por cliente), indexado a partir de restRateLimitIndex[]. O
+    balde guarda os tokens consumidos, então o estado zerado do boot é o de
+    balde cheio. O 429 de cada limite é texto fixo na flash, com Retry-After
+    calculado aqui a partir do intervalo de reposição.
     """
 
-    guard = header_path.name.replace(".", "_").upper()
+    limited = [(index, ep) for index, ep in enumerate(endpoints) if ep.rate_limit is not None]
+    lines: List[str] = []
+    lines.append("/* x-rate-limit: balde de tokens por endpoint, verificado antes do handler. */\n")
+    lines.append(f"#define REST_RATE_LIMIT_COUNT {len(limited)}\n\n")
+    if not limited:
+        return "".join(lines)
 
-    # Coleta métodos distintos
-    methods = []
-    for ep in endpoints:
-        m = method_enum_name(ep.method)
-        if m not in methods:
-            methods.append(m)
+    # Sobrescrevíveis via -D ou lwipopts.h, como os parâmetros do header.
+    defaults = [
+        ("REST_RATE_LIMIT_CLIENTS", "4", "Baldes por limite com scope client."),
+        ("REST_RATE_LIMIT_NOW()", "sys_now()", "Relógio em ms (u32_t; a volta do contador é tratada)."),
+        ("REST_RATE_LIMIT_CLIENT_ID(connection)", "0ul", "Identificador do cliente (connection é NULL no GET)."),
+    ]
+    for name, value, comment in defaults:
+        lines.append(f"/* {comment} */\n")
+        lines.append(f"#ifndef {name.split('(')[0]}\n#define {name} {value}\n#endif\n")
+    lines.append("\n")
 
-    # Garante que todos os métodos padrão existam
-    all_methods = [
-        "HTTP_METHOD_GET",
-        "HTTP_METHOD_POST",
-        "HTTP_METHOD_PUT",
-        "HTTP_METHOD_DELETE",
-        "HTTP_METHOD_PATCH",
-        "HTTP_METHOD_OPTIONS",
-        "HTTP_METHOD_HEAD",
-        "HTTP_METHOD_TRACE",
-        "HTTP_METHOD_CONNECT",
+    retries = sorted({ep.rate_limit.retry_after for _, ep in limited})
+    for retry in retries:
+        lines.append(
+            f"static const char restRateLimitedResponse{retry}[] =\n"
+            f"    \"HTTP/1.0 429 Too Many Requests\\r\\nRetry-After: {retry}\\r\\nContent-Length: 0\\r\\n\\r\\n\";\n"
+        )
+    lines.append("\n")
+
+    lines.append("typedef struct restRateLimit {\n")
+    lines.append("    const char    *response;     /* 429 pré-montado */\n")
+    lines.append("    u32_t          interval;     /* ms para repor um token */\n")
+    lines.append("    unsigned short burst;        /* requisições seguidas com o balde cheio */\n")
+    lines.append("    unsigned short firstBucket;  /* em restRateBuckets[] */\n")
+    lines.append("    unsigned char  responseLength;\n")
+    lines.append("    unsigned char  perClient;    /* 1: REST_RATE_LIMIT_CLIENTS baldes */\n")
+    lines.append("} restRateLimit_t;\n\n")
+    lines.append("typedef struct restRateBucket {\n")
+    lines.append("    unsigned long  client;\n")
+    lines.append("    u32_t          last;         /* instante da última reposição */\n")
+    lines.append("    unsigned short used;         /* tokens consumidos (0: balde cheio) */\n")
+    lines.append("} restRateBucket_t;\n\n")
+
+    globals_before = 0
+    clients_before = 0
+    lines.append(f"static const restRateLimit_t restRateLimits[{len(limited)}] = {{\n")
+    for _, ep in limited:
+        limit = ep.rate_limit
+        first = f"{globals_before}u"
+        if clients_before:
+            first += f" + {clients_before}u * REST_RATE_LIMIT_CLIENTS"
+        response = f"restRateLimitedResponse{limit.retry_after}"
+        lines.append(
+            f"    {{ {response}, {limit.interval}ul, {limit.burst}u, {first}, "
+            f"(unsigned char)(sizeof({response}) - 1u), {int(limit.per_client)}u }}, "
+            f"/* {ep.method.upper()} {ep.path.replace('*/', '* /')} */\n"
+        )
+        if limit.per_client:
+            clients_before += 1
+        else:
+            globals_before += 1
+    lines.append("};\n\n")
+
+    lines.append("/* Limite de cada endpoint em restRateLimits[] (-1: sem limite). */\n")
+    lines.append(f"static const short restRateLimitIndex[{max(len(endpoints), 1)}] = {{\n")
+    slots = {index: n for n, (index, _) in enumerate(limited)}
+    values = [slots.get(i, -1) for i in range(len(endpoints))]
+    for i in range(0, len(values), 16):
+        lines.append("    " + " ".join(f"{v}," for v in values[i:i + 16]) + "\n")
+    lines.append("};\n\n")
+
+    buckets = f"{globals_before}u"
+    if clients_before:
+        buckets += f" + {clients_before}u * REST_RATE_LIMIT_CLIENTS"
+    lines.append(f"static restRateBucket_t restRateBuckets[{buckets}];\n\n")
+    lines.append(RATE_LIMIT_C)
+    return "".join(lines)
+
+
+# Lógica dos baldes de tokens (só emitida quando o spec tem x-rate-limit).
+RATE_LIMIT_C = r"""/* Balde do cliente; sem balde livre, reaproveita o de uso mais antigo. */
+static restRateBucket_t *restRateBucketFor(const restRateLimit_t *limit, unsigned long client, u32_t now)
+{
+    restRateBucket_t *bucket = &restRateBuckets[limit->firstBucket];
+    restRateBucket_t *oldest = bucket;
+    unsigned int i;
+
+    if (!limit->perClient) {
+        return bucket;
+    }
+    for (i = 0; i < REST_RATE_LIMIT_CLIENTS; i++, bucket++) {
+        if (bucket->client == client) {
+            return bucket;
+        }
+        if ((u32_t)(now - bucket->last) > (u32_t)(now - oldest->last)) {
+            oldest = bucket;
+        }
+    }
+    oldest->client = client;
+    oldest->used = 0u;
+    oldest->last = now;
+    return oldest;
+}
+
+/* Repõe os tokens do intervalo decorrido e consome um. Retorna 0 ou 429. */
+static int restRateLimitTake(unsigned int endpoint, void *connection)
+{
+    const restRateLimit_t *limit;
+    restRateBucket_t *bucket;
+    u32_t now;
+    u32_t refill;
+
+    if (restRateLimitIndex[endpoint] < 0) {
+        return 0;
+    }
+    LWIP_UNUSED_ARG(connection);
+    limit = &restRateLimits[restRateLimitIndex[endpoint]];
+    now = (u32_t)REST_RATE_LIMIT_NOW();
+    bucket = restRateBucketFor(limit, (unsigned long)REST_RATE_LIMIT_CLIENT_ID(connection), now);
+    refill = (u32_t)(now - bucket->last) / limit->interval;
+    if (refill >= bucket->used) {
+        bucket->used = 0u;
+        bucket->last = now;
+    } else {
+        bucket->used = (unsigned short)(bucket->used - refill);
+        bucket->last += refill * limit->interval;
+    }
+    if (bucket->used >= limit->burst) {
+        return 429;
+    }
+    bucket->used++;
+    return 0;
+}
+
+static int restRateLimitedFile(struct fs_file *file, unsigned int index)
+{
+    if (index >= REST_RATE_LIMIT_COUNT) {
+        return 0;
+    }
+    file->data = restRateLimits[index].response;
+    file->len = (int)restRateLimits[index].responseLength;
+    file->index = file->len;
+    file->pextension = NULL;
+    file->flags = FS_FILE_FLAGS_HEADER_INCLUDED;
+    return 1;
+}
+
+"""
+
+
+def cache_function_suffix(ep: Endpoint) -> str:
+    """Sufixo das funções de invalidação (mesmo da operação: GET_api_v1_x)."""
+
+    return ep.handler_name[len("restHandle_"):]
+
+
+def generate_cache_content(endpoints: List[Endpoint]) -> str:
+    """Gera os buffers de x-cache-ttl e as funções de invalidação.
+
+    Cada GET em cache tem um buffer fixo com a última resposta 200 completa
+    (cabeçalho + corpo, como foi enviada), a chave (parâmetros de path) e o
+    instante em que foi guardada. Um acerto é servido direto desse buffer;
+    `readers` conta os envios em andamento, e o buffer só é regravado quando
+    nenhum envio o está usando.
+    """
+
+    cached = [(index, ep) for index, ep in enumerate(endpoints) if ep.cache is not None]
+    lines: List[str] = []
+    lines.append("/* x-cache-ttl: última resposta 200 dos GETs marcados, servida sem o handler. */\n")
+    lines.append(f"#define REST_CACHE_COUNT {len(cached)}\n\n")
+    if not cached:
+        return "".join(lines)
+
+    defaults = [
+        ("REST_CACHE_ENTRY_SIZE", "256", "Bytes por resposta em cache (cabeçalho + corpo), sem `size` no spec."),
+        ("REST_CACHE_KEY_MAX", "32", "Parâmetros de path (separados por '/') que cabem na chave."),
+        ("REST_CACHE_NOW()", "sys_now()", "Relógio em ms (u32_t; a volta do contador é tratada)."),
     ]
-    for m in all_methods:
-        if m not in methods:
-            methods.append(m)
+    for name, value, comment in defaults:
+        lines.append(f"/* {comment} */\n")
+        lines.append(f"#ifndef {name.split('(')[0]}\n#define {name} {value}\n#endif\n")
+    lines.append("\n")
+
+    lines.append("typedef struct restCache {\n")
+    lines.append("    char          *data;\n")
+    lines.append("    u32_t          ttl;         /* ms */\n")
+    lines.append("    unsigned short size;\n")
+    lines.append("} restCache_t;\n\n")
+    lines.append("typedef struct restCacheEntry {\n")
+    lines.append("    u32_t          stored;      /* instante em que a resposta foi guardada */\n")
+    lines.append("    unsigned short length;      /* 0: vazio ou invalidado */\n")
+    lines.append("    unsigned char  readers;     /* envios em andamento direto de data */\n")
+    lines.append("    unsigned char  keyLength;\n")
+    lines.append("    char           key[REST_CACHE_KEY_MAX];\n")
+    lines.append("} restCacheEntry_t;\n\n")
+
+    for n, (_, ep) in enumerate(cached):
+        size = str(ep.cache.size) if ep.cache.size is not None else "REST_CACHE_ENTRY_SIZE"
+        lines.append(f"static char restCacheData{n}[{size}]; /* {ep.path.replace('*/', '* /')} */\n")
+    lines.append(f"\nstatic restCacheEntry_t restCacheEntries[{len(cached)}];\n\n")
+
+    lines.append(f"static const restCache_t restCaches[{len(cached)}] = {{\n")
+    for n, (_, ep) in enumerate(cached):
+        lines.append(
+            f"    {{ restCacheData{n}, {ep.cache.ttl}ul, (unsigned short)sizeof(restCacheData{n}) }},\n"
+        )
+    lines.append("};\n\n")
+
+    lines.append("/* Cache de cada endpoint em restCaches[] (-1: sem cache). */\n")
+    lines.append(f"static const short restCacheIndex[{max(len(endpoints), 1)}] = {{\n")
+    slots = {index: n for n, (index, _) in enumerate(cached)}
+    values = [slots.get(i, -1) for i in range(len(endpoints))]
+    for i in range(0, len(values), 16):
+        lines.append("    " + " ".join(f"{v}," for v in values[i:i + 16]) + "\n")
+    lines.append("};\n\n")
+
+    lines.append(CACHE_C)
+    for n, (_, ep) in enumerate(cached):
+        lines.append(f"void restCacheInvalidate_{cache_function_suffix(ep)}(void)\n{{\n")
+        lines.append(f"    restCacheEntries[{n}].length = 0u;\n}}\n\n")
+    return "".join(lines)
+
+
+# Acerto, gravação e liberação do cache (só emitido quando há x-cache-ttl).
+CACHE_C = r"""/* Chave = parâmetros de path separados por '/'; REST_CACHE_KEY_MAX + 1 se
+ * não couberem (resposta não entra no cache). */
+static unsigned int restCacheKey(const restRouteMatch_t *match, char *key)
+{
+    unsigned int length = 0;
+    unsigned int i;
+
+    for (i = 0; i < match->paramCount; i++) {
+        unsigned int n = match->params[i].length;
+        if ((length + n + ((i > 0u) ? 1u : 0u)) > REST_CACHE_KEY_MAX) {
+            return REST_CACHE_KEY_MAX + 1u;
+        }
+        if (i > 0u) {
+            key[length++] = '/';
+        }
+        memcpy(key + length, match->params[i].ptr, n);
+        length += n;
+    }
+    return length;
+}
+
+/* Serve a resposta guardada se a chave bater e o TTL não tiver expirado. */
+static int restCacheServe(struct fs_file *file, const restRouteMatch_t *match)
+{
+    char key[REST_CACHE_KEY_MAX];
+    const restCache_t *cache;
+    restCacheEntry_t *entry;
+    unsigned int keyLength;
+    short index = restCacheIndex[match->endpoint];
+
+    if (index < 0) {
+        return 0;
+    }
+    cache = &restCaches[index];
+    entry = &restCacheEntries[index];
+    if (entry->length == 0u) {
+        return 0;
+    }
+    if ((u32_t)((u32_t)REST_CACHE_NOW() - entry->stored) >= cache->ttl) {
+        entry->length = 0u;
+        return 0;
+    }
+    keyLength = restCacheKey(match, key);
+    if ((keyLength != entry->keyLength) || (memcmp(key, entry->key, keyLength) != 0)) {
+        return 0;
+    }
+    entry->readers++;
+    file->data = cache->data;
+    file->len = (int)entry->length;
+    file->index = file->len;
+    file->pextension = entry;
+    file->flags = FS_FILE_FLAGS_HEADER_INCLUDED;
+    return 1;
+}
+
+/* Guarda uma resposta 200 completa; não grava sobre um envio em andamento. */
+static void restCacheStore(const restRouteMatch_t *match, const char *response, unsigned int length)
+{
+    const restCache_t *cache;
+    restCacheEntry_t *entry;
+    unsigned int keyLength;
+    short index = restCacheIndex[match->endpoint];
+
+    if (index < 0) {
+        return;
+    }
+    cache = &restCaches[index];
+    entry = &restCacheEntries[index];
+    if ((entry->readers != 0u) || (length > cache->size)) {
+        return;
+    }
+    keyLength = restCacheKey(match, entry->key);
+    if (keyLength > REST_CACHE_KEY_MAX) {
+        entry->length = 0u;
+        return;
+    }
+    memcpy(cache->data, response, length);
+    entry->keyLength = (unsigned char)keyLength;
+    entry->length = (unsigned short)length;
+    entry->stored = (u32_t)REST_CACHE_NOW();
+}
+
+/* fs_close de um acerto: libera o buffer para a próxima gravação. */
+static int restCacheRelease(struct fs_file *file)
+{
+    restCacheEntry_t *entry = (restCacheEntry_t *)file->pextension;
+
+    if ((entry < &restCacheEntries[0]) || (entry >= &restCacheEntries[REST_CACHE_COUNT])) {
+        return 0;
+    }
+    if (entry->readers > 0u) {
+        entry->readers--;
+    }
+    file->pextension = NULL;
+    return 1;
+}
+
+void restCacheInvalidateAll(void)
+{
+    unsigned int i;
+    for (i = 0; i < REST_CACHE_COUNT; i++) {
+        restCacheEntries[i].length = 0u;
+    }
+}
+
+"""
+
+
+def generate_async_content(endpoints: List[Endpoint]) -> str:
+    """Gera a marcação de x-async por endpoint (o motor fica no dispatcher)."""
+
+    deferred = [ep for ep in endpoints if ep.deferred]
+    lines: List[str] = []
+    lines.append("/* x-async: handlers que podem concluir a resposta fora da thread tcpip. */\n")
+    lines.append(f"#define REST_ASYNC_COUNT {len(deferred)}\n\n")
+    if not deferred:
+        return "".join(lines)
+    lines.append("/* Requisições adiadas ao mesmo tempo (cada uma retém o seu slot). */\n")
+    lines.append("#ifndef REST_ASYNC_MAX_PENDING\n#define REST_ASYNC_MAX_PENDING 2\n#endif\n\n")
+    lines.append("#if NO_SYS\n#error \"x-async requer um RTOS (tcpip_callback)\"\n#endif\n")
+    lines.append("#if !LWIP_HTTPD_FS_ASYNC_READ || !LWIP_HTTPD_DYNAMIC_FILE_READ\n")
+    lines.append(
+        "#error \"x-async requer LWIP_HTTPD_FS_ASYNC_READ e LWIP_HTTPD_DYNAMIC_FILE_READ (fs_*_custom -> restFs*)\"\n"
+    )
+    lines.append("#endif\n\n")
+    lines.append(f"static const unsigned char restAsyncEndpoints[{len(endpoints)}] = {{\n")
+    values = [int(ep.deferred) for ep in endpoints]
+    for i in range(0, len(values), 16):
+        lines.append("    " + " ".join(f"{v}u," for v in values[i:i + 16]) + "\n")
+    lines.append("};\n\n")
+    return "".join(lines)
+
+
+def generate_query_content(endpoints: List[Endpoint]) -> str:
+    """Gera a marcação dos GETs com parâmetros de query (adiados no modo CGI)."""
+
+    values = [int(ep.query and ep.method == "get" and ep.static is None) for ep in endpoints]
+    lines: List[str] = []
+    lines.append("/* GETs com parâmetros de query. Com LWIP_HTTPD_CGI_SSI o httpd tira a query\n")
+    lines.append(" * da URI antes do fs_open e só a entrega, em httpd_cgi_handler, se houver\n")
+    lines.append(" * '?': o handler desses GETs roda em restCgiHandler ou, sem '?', na primeira\n")
+    lines.append(" * leitura (restFsCanRead/restFsRead); os demais GETs rodam no fs_open. */\n")
+    lines.append(f"#define REST_QUERY_COUNT {sum(values)}\n")
+    lines.append("#define REST_CGI_DEFER (REST_HTTPD_CGI_HANDLER && LWIP_HTTPD_CGI_SSI && (REST_QUERY_COUNT > 0))\n\n")
+    if not any(values):
+        return "".join(lines)
+    lines.append("#if REST_CGI_DEFER\n")
+    lines.append("#if !LWIP_HTTPD_DYNAMIC_FILE_READ\n")
+    lines.append(
+        "#error \"GETs com query e LWIP_HTTPD_CGI_SSI requerem LWIP_HTTPD_DYNAMIC_FILE_READ (fs_read_custom -> restFsRead)\"\n"
+    )
+    lines.append("#endif\n\n")
+    lines.append(f"static const unsigned char restQueryEndpoints[{len(endpoints)}] = {{\n")
+    for i in range(0, len(values), 16):
+        lines.append("    " + " ".join(f"{v}u," for v in values[i:i + 16]) + "\n")
+    lines.append("};\n")
+    lines.append("#endif\n\n")
+    return "".join(lines)
+
+
+def generate_dispatcher_content(endpoints: List[Endpoint]) -> str:
+    """Gera o dispatcher ligado aos callbacks httpd_post_* e ao fs_open_custom.
+
+    O corpo de um POST não é montado em RAM: cada pbuf recebido é repassado
+    ao callback restBody_* do endpoint e liberado em seguida. O limite de
+    corpo de cada endpoint (spec) é verificado já em httpd_post_begin, com
+    base no Content-Length, respondendo 413 sem receber o corpo.
+    """
+
+    lines: List[str] = []
+    lines.append("/* ---- Dispatcher REST (httpd lwIP: POST em streaming, GET via fs_open_custom) ---- */\n\n")
+    lines.append("/* Nomes na ordem de httpMethod_t (cabeçalho Allow das respostas 405). */\n")
+    lines.append("static const char *const restMethodNames[REST_METHOD_COUNT] = {\n")
+    for m in collect_methods(endpoints):
+        lines.append(f"    \"{m[len('HTTP_METHOD_'):]}\",\n")
+    lines.append("};\n\n")
+    lines.append("/* GETs x-static: servidos pelo fsdata (fragmento gerado junto do header). */\n")
+    lines.append(f"#define REST_STATIC_COUNT {sum(1 for ep in endpoints if ep.static is not None)}\n\n")
+    lines.append(generate_rate_limit_content(endpoints))
+    lines.append(generate_cache_content(endpoints))
+    lines.append(generate_async_content(endpoints))
+    lines.append(generate_query_content(endpoints))
+    lines.append(DISPATCHER_ENGINE_C)
+    return "".join(lines)
+
+
+def generate_source_content(header_path: Path, endpoints: List[Endpoint],
+                            schemas: Optional[List[JsonStruct]] = None) -> str:
+    """Gera o arquivo .c companheiro do header (lógica gerada em C)."""
 
     lines: List[str] = []
     lines.append("/**\n")
     lines.append(" * Arquivo gerado automaticamente por swagger2rest.py.\n")
     lines.append(" * NÃO EDITE MANUALMENTE: alterações serão sobrescritas.\n")
     lines.append(" */\n\n")
-    lines.append(f"#ifndef {guard}\n")
-    lines.append(f"#define {guard}\n\n")
-    lines.append("#ifdef __cplusplus\nextern \"C\" {\n#endif\n\n")
+    lines.append("#include <limits.h>\n")
+    lines.append("#include <stddef.h>\n")
+    lines.append("#include <string.h>\n")
+    lines.append("#include \"lwip/def.h\"\n")
+    lines.append("#include \"lwip/pbuf.h\"\n")
+    lines.append("#include \"lwip/apps/fs.h\"\n")
+    lines.append("#include \"lwip/apps/httpd.h\"\n")
+    if any((ep.rate_limit is not None) or (ep.cache is not None) for ep in endpoints):
+        lines.append("#include \"lwip/sys.h\"\n")
+    if any(ep.deferred for ep in endpoints):
+        lines.append("#include \"lwip/tcpip.h\"\n")
+    lines.append(f"#include \"{header_path.name}\"\n\n")
+    lines.append(generate_router_content(endpoints))
+
+    schemas = schemas or []
+    key_max = max((len(f.name.encode("utf-8")) for st in schemas if st.request for f in st.fields), default=1)
+    lines.append(f"#define REST_JSON_KEY_MAX {key_max}\n")
+    lines.append(f"#define REST_JSON_MAX_DEPTH {json_max_depth(schemas)}\n")
+    lines.append(f"#define REST_JSON_SCHEMA_COUNT {max(len(schemas), 1)}\n\n")
+    lines.append(JSON_RUNTIME_C)
+    lines.append("\n")
+    lines.append(JSON_WRITER_C)
+    lines.append("\n")
+    lines.append(generate_json_tables(schemas))
+    lines.append(generate_dispatcher_content(endpoints))
+    return "".join(lines)
+
+
+STATIC_FSDATA_MARKER = "fsdata-fragment:"
+
+
+def static_fsdata_path(header_path: Path) -> Path:
+    """Caminho do fragmento fsdata das respostas x-static (ao lado do header)."""
+
+    return header_path.with_name(header_path.stem + "_fsdata.h")
+
+
+def _static_http_header(response: StaticResponse, body_length: int, compressed: bool) -> bytes:
+    try:
+        reason = HTTPStatus(response.status).phrase
+    except ValueError:
+        reason = "Unknown"
+    lines = [f"HTTP/1.0 {response.status} {reason}", f"Content-Length: {body_length}"]
+    if compressed:
+        lines.append("Content-Encoding: deflate")
+    if response.cache_control:
+        lines.append(f"Cache-Control: {response.cache_control}")
+    lines.append("Content-Type: application/json")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("ascii", errors="ignore")
+
+
+def _fsdata_hex(data: bytes, start: int) -> Tuple[str, int]:
+    """Bytes como 0xNN, 16 por linha (mesmo layout do makefsdata)."""
+
+    out: List[str] = []
+    index = start
+    for b in data:
+        out.append(f"0x{b:02x},")
+        index += 1
+        if index % 16 == 0:
+            out.append("\n")
+    return "".join(out), index
+
+
+def generate_static_fsdata(endpoints: Iterable[Endpoint], swagger_name: str) -> Tuple[str, int]:
+    """Gera o fragmento fsdata (data_* + fsdata_file) dos GETs x-static.
+
+    O layout é o do makefsdata (nome com NUL alinhado a 4 bytes, cabeçalho
+    HTTP incluído e corpo), encadeado a partir de file_NULL. As linhas
+    `fsdata-fragment:` descrevem cada arquivo (nome, variável e tamanho do
+    corpo) para o makefsdata -frag ligá-los ao FS_ROOT e aos contadores.
+    Retorna o texto e a economia total de bytes com deflate.
+    """
+
+    # Paths que diferem só na pontuação (ex.: /a-b e /a_b) geram o mesmo
+    # nome C: o segundo recebe sufixo numérico, como os handlers.
+    statics: List[Tuple[Endpoint, str]] = []
+    var_paths: Dict[str, str] = {}
+    for ep in endpoints:
+        if ep.static is None:
+            continue
+        var = "rest" + _NON_WORD_RE.sub("_", ep.path)
+        if var in var_paths:
+            n = 2
+            while f"{var}_{n}" in var_paths:
+                n += 1
+            unique = f"{var}_{n}"
+            sys.stderr.write(
+                f"Aviso: x-static {ep.path} gera o mesmo nome que {var_paths[var]} ({var}); usando {unique}.\n"
+            )
+            var = unique
+        var_paths[var] = ep.path
+        statics.append((ep, var))
+    saved = 0
+    lines: List[str] = []
+    lines.append("/**\n")
+    lines.append(f" * Respostas estáticas (x-static) geradas por swagger2rest.py a partir de {swagger_name}.\n")
+    lines.append(" * Fragmento no formato do fsdata: incluir com makefsdata -frag:<este arquivo>.\n")
+    lines.append(" * NÃO EDITE MANUALMENTE: alterações serão sobrescritas.\n")
+    lines.append(" */\n\n")
+    for ep, var in statics:
+        lines.append(f"/* {STATIC_FSDATA_MARKER} {ep.path} {var} {len(ep.static.body)} */\n")
+    lines.append("\n")
+
+    last_var = "NULL"
+    for ep, var in statics:
+        response = ep.static
+        body = response.body
+        compressed = False
+        if response.deflate and body:
+            deflated = zlib.compress(body, 9)
+            if len(deflated) < len(body):
+                saved += len(body) - len(deflated)
+                body = deflated
+                compressed = True
+        name_bytes = (ep.path + "\0").encode("ascii", errors="ignore")
+        name_bytes += b"\0" * (-len(name_bytes) % 4)
+        header = _static_http_header(response, len(body), compressed)
+
+        lines.append(f"static const unsigned char data_{var}[] = {{\n")
+        lines.append(
+            f"/* file: {ep.path} | status: {response.status} | size: {len(body)} bytes | "
+            f"compressed: {'yes' if compressed else 'no'} */\n"
+        )
+        text, index = _fsdata_hex(name_bytes + header, 0)
+        lines.append(text)
+        lines.append("\n/* raw file data */\n")
+        text, index = _fsdata_hex(body, index)
+        lines.append(text)
+        if index % 16 != 0:
+            lines.append("\n")
+        lines.append("};\n\n")
+
+        lines.append(f"static const struct fsdata_file file_{var}[] = {{ {{\n")
+        lines.append(f"file_{last_var},\n")
+        lines.append(f"data_{var},\n")
+        lines.append(f"data_{var} + {len(name_bytes)},\n")
+        lines.append(f"sizeof(data_{var}) - {len(name_bytes)},\n")
+        lines.append("FS_FILE_FLAGS_HEADER_INCLUDED | FS_FILE_FLAGS_HEADER_PERSISTENT,\n")
+        lines.append("}};\n\n")
+        last_var = var
+
+    return "".join(lines), saved
+
+
+def generate_response_api(endpoints: Iterable[Endpoint], schemas: List[JsonStruct]) -> str:
+    """Gera (header) o serializador, os tamanhos máximos e os restRespond_*.
+
+    O tamanho máximo de cada resposta é calculado aqui, na geração, como
+    expressão dos macros de dimensionamento (strings, arrays, casas
+    decimais): o buffer de resposta pode ser dimensionado exatamente.
+    """
+
+    lines: List[str] = []
+    lines.append("/* Serializador JSON das respostas tipadas: sem alocação, retomável em\n")
+    lines.append(" * partes (buffer do chamador ou cadeia de pbufs). */\n")
+    lines.append(f"#define REST_JSON_WRITER_DEPTH {json_writer_depth(schemas)}\n\n")
+    lines.append("typedef struct restJsonWriterFrame {\n")
+    lines.append("    const char    *base;\n")
+    lines.append("    unsigned short schema;\n")
+    lines.append("    unsigned short index;  /* próximo campo (objeto) ou item (array) */\n")
+    lines.append("    unsigned char  field;  /* array: campo no schema dono */\n")
+    lines.append("    unsigned char  kind;\n")
+    lines.append("    unsigned char  first;\n")
+    lines.append("} restJsonWriterFrame_t;\n\n")
+    lines.append("typedef struct restJsonWriter {\n")
+    lines.append("    const char    *piece;        /* texto em saída (NULL: avança a estrutura) */\n")
+    lines.append("    unsigned short pieceLength;\n")
+    lines.append("    unsigned short pieceOffset;\n")
+    lines.append("    unsigned char  pieceString;  /* piece é conteúdo de string (com escape) */\n")
+    lines.append("    unsigned char  stringPhase;\n")
+    lines.append("    unsigned char  escapeLength;\n")
+    lines.append("    unsigned char  escapeOffset;\n")
+    lines.append("    unsigned char  depth;\n")
+    lines.append("    unsigned char  valuePending;\n")
+    lines.append("    char           escape[6];\n")
+    lines.append("    char           scratch[24 + REST_JSON_FRACTION_DIGITS]; /* números formatados */\n")
+    lines.append("    restJsonWriterFrame_t frames[REST_JSON_WRITER_DEPTH];\n")
+    lines.append("} restJsonWriter_t;\n\n")
+    lines.append("#define restJsonWriterDone(w) (((w)->depth == 0u) && ((w)->piece == NULL))\n\n")
+    lines.append("void restJsonWriterBegin(restJsonWriter_t *writer, unsigned int schema, const void *value);\n")
+    lines.append("/* Escreve até size bytes; retorna quantos. Chamadas seguintes continuam\n")
+    lines.append(" * de onde parou, até restJsonWriterDone(). */\n")
+    lines.append("unsigned int restJsonWriterWrite(restJsonWriter_t *writer, char *out, unsigned int size);\n")
+    lines.append("/* Preenche a cadeia de pbufs (PBUF_RAM) e encolhe-a ao tamanho escrito. */\n")
+    lines.append("unsigned int restJsonWriterWritePbuf(restJsonWriter_t *writer, struct pbuf *p);\n")
+    lines.append("/* Serializa value como corpo da resposta; retorna status (ou < 0 se não couber). */\n")
+    lines.append(
+        "int restRespondJson(const restRequestContext_t *ctx, unsigned int schema, const void *value,\n"
+        "                    unsigned int valueSize, int status);\n\n"
+    )
+
+    memo: Dict[int, SizeExpr] = {}
+    sized = [st for st in schemas if st.response]
+    if sized:
+        lines.append("/* Maior saída serializada de cada struct (bytes), calculada na geração. */\n")
+        for struct in sized:
+            lines.append(f"#define {struct.base}_MAX_LENGTH ({struct_max_length(struct, memo).c_expr()})\n")
+        lines.append("\n")
+
+    for ep in endpoints:
+        for res in ep.responses:
+            struct = res.struct
+            lines.append(f"/* {ep.method.upper()} {ep.path} -> {res.status} */\n")
+            if struct.base != res.name:
+                lines.append(f"typedef {struct.type_name} {res.name}_t;\n")
+                lines.append(f"#define {res.name}_MAX_LENGTH {struct.base}_MAX_LENGTH\n")
+            suffix = res.name[len("restRes_"):]
+            lines.append(
+                f"static inline void restWriterBegin_{suffix}(restJsonWriter_t *writer, const {res.name}_t *value)\n"
+                f"{{\n    restJsonWriterBegin(writer, {struct.index}u, value);\n}}\n"
+            )
+            if res.status.isdigit():
+                lines.append(
+                    f"static inline int restRespond_{suffix}(const restRequestContext_t *ctx, "
+                    f"const {res.name}_t *value)\n"
+                    f"{{\n    return restRespondJson(ctx, {struct.index}u, value, sizeof(*value), {res.status});\n}}\n"
+                )
+            else:
+                lines.append(
+                    f"static inline int restRespond_{suffix}(const restRequestContext_t *ctx, "
+                    f"const {res.name}_t *value, int status)\n"
+                    f"{{\n    return restRespondJson(ctx, {struct.index}u, value, sizeof(*value), status);\n}}\n"
+                )
+            lines.append("\n")
+    return "".join(lines)
+
 
+def generate_router_types(endpoints: List[Endpoint]) -> str:
+    """Gera httpMethod_t e os tipos usados por restRouteLookup() (parte do header)."""
+
+    methods = collect_methods(endpoints)
+    lines: List[str] = []
     lines.append("typedef enum {\n")
     for m in methods:
         lines.append(f"    {m},\n")
     lines.append("} httpMethod_t;\n\n")
+    lines.append(f"#define REST_METHOD_COUNT {len(methods)}\n\n")
+
+    max_params = max((len(endpoint_param_names(ep.path)) for ep in endpoints), default=0)
+    lines.append("#define REST_METHOD_BIT(m) ((unsigned short)(1u << (m)))\n")
+    lines.append(f"#define REST_MAX_PATH_PARAMS {max(max_params, 1)}\n\n")
+    lines.append("typedef struct restParamSpan {\n")
+    lines.append("    const char     *ptr;\n")
+    lines.append("    unsigned short  length;\n")
+    lines.append("} restParamSpan_t;\n\n")
+    lines.append("typedef enum {\n")
+    lines.append("    REST_ROUTE_FOUND = 0,\n")
+    lines.append("    REST_ROUTE_NOT_FOUND,\n")
+    lines.append("    REST_ROUTE_METHOD_NOT_ALLOWED,\n")
+    lines.append("} restRouteResult_t;\n\n")
+    lines.append("typedef struct restRouteMatch {\n")
+    lines.append("    int             endpoint;   /* índice em restEndpoints[] ou -1 */\n")
+    lines.append("    unsigned short  methodMask; /* métodos aceitos no path (Allow) */\n")
+    lines.append("    unsigned char   paramCount;\n")
+    lines.append("    restParamSpan_t params[REST_MAX_PATH_PARAMS];\n")
+    lines.append("} restRouteMatch_t;\n\n")
+    return "".join(lines)
+
+
+def generate_header_content(header_path: Path, endpoints: Iterable[Endpoint], api_prefix: str = "/api",
+                            schemas: Optional[List[JsonStruct]] = None) -> str:
+    """Gera o conteúdo do arquivo header com typedefs e tabela de endpoints.
+
+    `restEndpoints` e `restEndpointCount` são gerados aqui como `static
+    const`, visíveis aos handlers sem múltiplas definições ao incluir o header
+    em mais de um módulo; roteador, parser e dispatcher ficam no .c
+    companheiro (generate_source_content).
+    """
+
+    guard = header_path.name.replace(".", "_").upper()
+
+    lines: List[str] = []
+    lines.append("/**\n")
+    lines.append(" * Arquivo gerado automaticamente por swagger2rest.py.\n")
+    lines.append(" * NÃO EDITE MANUALMENTE: alterações serão sobrescritas.\n")
+    lines.append(" */\n\n")
+    lines.append(f"#ifndef {guard}\n")
+    lines.append(f"#define {guard}\n\n")
+    lines.append("#include <stddef.h>\n")
+    lines.append("#include \"lwip/err.h\"\n\n")
+    lines.append("#ifdef __cplusplus\nextern \"C\" {\n#endif\n\n")
+
+    # Parâmetros do dispatcher (sobrescrevíveis via -D ou lwipopts.h)
+    dispatcher_defaults = [
+        ("REST_API_PREFIX", c_string_literal(api_prefix)),
+        ("REST_MAX_CONNECTIONS", "2"),
+        ("REST_URI_MAX_LENGTH", "128"),
+        ("REST_RESPONSE_BUFFER_SIZE", "1024"),
+        ("REST_RESPONSE_HEADER_RESERVE", "192"),
+        ("REST_DEFAULT_MAX_BODY_LENGTH", "1024ul"),
+        ("REST_RESPONSE_URI_PREFIX", c_string_literal("/.rest/")),
+        ("REST_HTTPD_POST_CALLBACKS", "1"),
+        ("REST_HTTPD_CGI_HANDLER", "1"),
+        ("REST_JSON_STRING_DEFAULT", "32"),
+        ("REST_JSON_ARRAY_DEFAULT", "4"),
+        ("REST_JSON_TOKEN_MAX", "32"),
+        ("REST_JSON_FRACTION_DIGITS", "6"),
+        ("REST_RESPONSE_STREAMING", "0"),
+        ("REST_STATS", "0"),
+    ]
+    for name, value in dispatcher_defaults:
+        lines.append(f"#ifndef {name}\n#define {name} {value}\n#endif\n")
+    lines.append("\n")
+
+    # Métodos e tipos do roteador compilado (implementação no .c companheiro)
+    lines.append(generate_router_types(endpoints))
+
+    if schemas:
+        lines.append("/* Requisições decodificadas (parâmetros de path/query tipados e corpo\n")
+        lines.append(" * JSON, preenchidos pelo parser gerado antes da chamada do handler) e\n")
+        lines.append(" * respostas tipadas (serializadas pelos restRespond_*). */\n")
+        lines.append(generate_schema_types(schemas))
+        lines.append("#define REST_REQUEST(ctx, op) ((const restReq_##op##_t *)(ctx)->request)\n\n")
+
+    lines.append("/* Resposta montada pelo handler: o corpo é escrito em buffer (até size\n")
+    lines.append(" * bytes); o dispatcher acrescenta o cabeçalho HTTP sem copiar o corpo. */\n")
+    lines.append("typedef struct restResponse {\n")
+    lines.append("    char         *buffer;\n")
+    lines.append("    unsigned int  size;\n")
+    lines.append("    unsigned int  length;\n")
+    lines.append("    const char   *contentType;\n")
+    lines.append("} restResponse_t;\n\n")
 
     lines.append("typedef struct restRequestContext {\n")
     lines.append("    const char   *uri;\n")
     lines.append("    const char   *queryString;\n")
-    lines.append("    const char   *body;\n")
-    lines.append("    unsigned int  bodyLength;\n")
+    lines.append("    const char   *body;        /* NULL no POST em streaming (ver restBodyFn) */\n")
+    lines.append("    unsigned int  bodyLength;  /* bytes de corpo já entregues ao restBodyFn */\n")
     lines.append("    httpMethod_t  method;\n")
+    lines.append("    const restParamSpan_t *params;\n")
+    lines.append("    unsigned char paramCount;\n")
+    lines.append("    restResponse_t *response;\n")
+    lines.append("    void         *state;       /* livre para o endpoint entre chunks */\n")
+    lines.append("    const void   *request;     /* restReq_<op>_t decodificado (REST_REQUEST) */\n")
     lines.append("} restRequestContext_t;\n\n")
 
-    lines.append("typedef int (*restHandlerFn)(const restRequestContext_t *ctx);\n\n")
+    lines.append("/* Retorno: 0 = 200, > 0 = status HTTP, < 0 = 500, REST_PENDING = resposta\n")
+    lines.append(" * adiada (x-async, após restAsyncDefer; ver restAsyncComplete). */\n")
+    lines.append("typedef int (*restHandlerFn)(const restRequestContext_t *ctx);\n")
+    lines.append("#define REST_PENDING 1\n")
+    lines.append("/* Recebe o corpo em partes, na ordem de chegada (um pbuf por chamada).\n")
+    lines.append(" * Retorno: 0 = continua, > 0 = status HTTP, < 0 = 500 (corpo descartado). */\n")
+    lines.append(
+        "typedef int (*restBodyFn)(restRequestContext_t *ctx, const void *chunk, unsigned int chunkLength);\n\n"
+    )
 
+    # Patterns em pool único (prefixos comuns uma só vez); a tabela guarda
+    # offset + tamanho no lugar de um ponteiro por endpoint.
+    pool, pool_offsets = build_route_pool(ep.path for ep in endpoints)
+    lines.append("/* Patterns das rotas, sem terminador, em um pool compartilhado com os\n")
+    lines.append(" * rótulos do roteador; use restEndpointPath() para obtê-los. */\n")
+    lines.append(f"typedef {route_pool_offset_type(pool)} restPoolOffset_t;\n")
+    lines.append(f"extern const char restRoutePool[{len(pool) + 1}];\n\n")
     lines.append("typedef struct restEndpoint {\n")
-    lines.append("    const char   *pathPattern;\n")
-    lines.append("    httpMethod_t  method;\n")
-    lines.append("    restHandlerFn handler;\n")
+    lines.append("    restHandlerFn handler;       /* NULL: GET x-static, servido pelo fsdata */\n")
+    lines.append("    restBodyFn    bodyHandler;   /* NULL: operação sem requestBody */\n")
+    lines.append("    unsigned long maxBodyLength; /* acima disso: 413 antes de receber o corpo */\n")
+    ep_types = endpoint_table_types(endpoints)
+    lines.append(f"    {ep_types['schema']:<13} requestSchema; /* struct restReq_* (-1: sem parâmetros/corpo) */\n")
+    lines.append(f"    {ep_types['schema']:<13} bodySchema;    /* corpo JSON decodificado pelo parser (-1: não) */\n")
+    lines.append("    unsigned short bodyOffset;\n")
+    lines.append("    restPoolOffset_t path;       /* pattern em restRoutePool */\n")
+    lines.append(f"    {ep_types['pathLength']} pathLength;\n")
+    lines.append("    unsigned char method;        /* httpMethod_t */\n")
+    lines.append("    unsigned char bodyRequired;\n")
     lines.append("} restEndpoint_t;\n\n")
 
     # Protótipos das funções handler (o firmware deve implementá-las)
-    handler_names: List[str] = []
-    for ep in endpoints:
-        if ep.handler_name not in handler_names:
-            handler_names.append(ep.handler_name)
+    handler_names = list(dict.fromkeys(ep.handler_name for ep in endpoints if ep.static is None))
     for name in handler_names:
         lines.append(f"int {name}(const restRequestContext_t *ctx);\n")
     if handler_names:
         lines.append("\n")
+    body_names = list(dict.fromkeys(ep.body_handler_name for ep in endpoints if ep.body_handler_name))
+    for name in body_names:
+        lines.append(f"int {name}(restRequestContext_t *ctx, const void *chunk, unsigned int chunkLength);\n")
+    if body_names:
+        lines.append("\n")
 
     # Definição da tabela de endpoints e contagem, como static const
     lines.append("static const restEndpoint_t restEndpoints[] = {\n")
     for ep in endpoints:
+        handler_fn = "NULL" if ep.static is not None else ep.handler_name
+        body_fn = ep.body_handler_name or "NULL"
+        if ep.max_body_length is None:
+            max_body = "REST_DEFAULT_MAX_BODY_LENGTH"
+        else:
+            max_body = f"{ep.max_body_length}ul"
+        request = ep.request
+        body_required = 0
+        if request is None:
+            binding = "-1, -1, 0u"
+        elif request.body is None:
+            binding = f"{request.index}, -1, 0u"
+        else:
+            binding = f"{request.index}, {request.body.index}, offsetof({request.type_name}, body)"
+            body_required = int(ep.body_required)
         lines.append(
-            f"    {{ \"{ep.path}\", {method_enum_name(ep.method)}, {ep.handler_name} }},\n"
+            f"    {{ {handler_fn}, {body_fn}, {max_body}, {binding}, "
+            f"{pool_offsets[ep.path]}u, {len(ep.path.encode('utf-8'))}u, "
+            f"{method_enum_name(ep.method)}, {body_required}u }}, /* {ep.path.replace('*/', '* /')} */\n"
         )
     lines.append("};\n\n")
     lines.append(
         "static const unsigned int restEndpointCount = sizeof(restEndpoints) / sizeof(restEndpoints[0]);\n\n"
     )
 
+    lines.append("/* Roteador compilado: busca path + método sem varrer restEndpoints[]. */\n")
+    lines.append(
+        "int restRouteLookup(const char *uri, unsigned int uriLength, httpMethod_t method, "
+        "restRouteMatch_t *match);\n"
+    )
+    lines.append(
+        "const char *restRouteParam(const restRouteMatch_t *match, const char *name, "
+        "unsigned int *length);\n"
+    )
+    lines.append("/* Pattern do endpoint (não terminado em NUL: usar *length). */\n")
+    lines.append("const char *restEndpointPath(unsigned int endpoint, unsigned int *length);\n\n")
+
+    lines.append("/* Dispatcher (implementação no .c companheiro). */\n")
+    lines.append("struct fs_file;\n")
+    lines.append("struct pbuf;\n")
+    lines.append("int restFsOpen(struct fs_file *file, const char *name);\n")
+    lines.append("void restFsClose(struct fs_file *file);\n")
+    lines.append("void restCgiHandler(struct fs_file *file, int count, char **names, char **values);\n")
+    lines.append(
+        "err_t restPostBegin(void *connection, const char *uri, int contentLength, "
+        "char *responseUri, u16_t responseUriLength);\n"
+    )
+    lines.append("err_t restPostReceive(void *connection, struct pbuf *p);\n")
+    lines.append("void restPostFinished(void *connection, char *responseUri, u16_t responseUriLength);\n")
+    lines.append("/* fs_read_custom das respostas em streaming (REST_RESPONSE_STREAMING). */\n")
+    lines.append("int restFsRead(struct fs_file *file, char *buffer, int count);\n")
+    lines.append("/* fs_canread/fs_wait_read/fs_read_async_custom (LWIP_HTTPD_FS_ASYNC_READ). */\n")
+    lines.append("u8_t restFsCanRead(struct fs_file *file);\n")
+    lines.append("u8_t restFsWaitRead(struct fs_file *file, void (*callback)(void *arg), void *callbackArg);\n")
+    lines.append(
+        "int restFsReadAsync(struct fs_file *file, char *buffer, int count, "
+        "void (*callback)(void *arg), void *callbackArg);\n\n"
+    )
+    lines.append("#if REST_STATS\n")
+    lines.append("/* Instrumentação por endpoint, na ordem de restEndpoints[]. Tempos em unidades\n")
+    lines.append(" * de REST_STATS_NOW() (padrão sys_now(), ms; ex.: DWT->CYCCNT para ciclos). */\n")
+    lines.append("typedef struct restStats {\n")
+    lines.append("    u32_t calls;     /* handlers executados */\n")
+    lines.append("    u32_t errors;    /* status >= 400 ao final do handler */\n")
+    lines.append("    u32_t bytesIn;   /* corpo recebido */\n")
+    lines.append("    u32_t bytesOut;  /* corpo enviado, sem o cabeçalho HTTP */\n")
+    lines.append("    u32_t minTime;\n")
+    lines.append("    u32_t maxTime;\n")
+    lines.append("    unsigned long long totalTime;\n")
+    lines.append("} restStats_t;\n\n")
+    lines.append("const restStats_t *restStatsTable(unsigned int *count);\n")
+    lines.append("void restStatsReset(void);\n")
+    lines.append("#endif\n\n")
+    if any(ep.deferred for ep in endpoints):
+        lines.append("/* x-async: o handler chama restAsyncDefer() e retorna REST_PENDING; a tarefa\n")
+        lines.append(" * preenche a resposta via restAsyncContext() e conclui com restAsyncComplete()\n")
+        lines.append(" * (qualquer thread; status como no retorno do handler). Todo token deve ser\n")
+        lines.append(" * concluído: o slot fica reservado até lá. */\n")
+        lines.append("typedef unsigned short restAsyncToken_t;\n")
+        lines.append("#define REST_ASYNC_INVALID ((restAsyncToken_t)0xFFFFu)\n")
+        lines.append("restAsyncToken_t restAsyncDefer(const restRequestContext_t *ctx);\n")
+        lines.append("const restRequestContext_t *restAsyncContext(restAsyncToken_t token);\n")
+        lines.append("err_t restAsyncComplete(restAsyncToken_t token, int result);\n\n")
+    cached = [ep for ep in endpoints if ep.cache is not None]
+    if cached:
+        lines.append("/* x-cache-ttl: descarta a resposta guardada (ex.: após mudar a configuração). */\n")
+        lines.append("void restCacheInvalidateAll(void);\n")
+        for ep in cached:
+            lines.append(f"void restCacheInvalidate_{cache_function_suffix(ep)}(void);\n")
+        lines.append("\n")
+
+    lines.append(generate_response_api(endpoints, schemas or []))
+
     lines.append("#ifdef __cplusplus\n}\n#endif\n\n")
     lines.append(f"#endif /* {guard} */\n")
 
     return "".join(lines)
 
 
+def write_if_changed(path: Path, content: str) -> bool:
+    """Grava `content` (UTF-8) de forma atômica, apenas se o arquivo mudou.
+
+    Arquivos idênticos não são tocados, preservando a data de modificação
+    (o make não recompila o firmware sem necessidade).
+    """
+
+    data = content.encode("utf-8")
+    try:
+        if path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return True
+
+
 def ensure_dispatcher_files(header_path: Path) -> None:
     """Cria arquivos rest_dispatcher.[ch] básicos, se ainda não existirem."""
 
@@ -270,14 +4977,14 @@ def ensure_dispatcher_files(header_path: Path) -> None:
 
     if not hdr.exists():
         hdr_guard = "REST_DISPATCHER_H"
-        hdr_content = """/**\n * Dispatcher REST gerado inicialmente por swagger2rest.py.\n * Pode ser editado manualmente para implementar lógica de roteamento.\n */\n\n#ifndef {guard}\n#define {guard}\n\n#ifdef __cplusplus\nextern \"C\" {{\n#endif\n\n#include \"lwip/apps/fs.h\"\n#include \"{endpoints_header}\"\n\nint restDispatch(const char *uri, const char *method, const char *body, unsigned int bodyLength, struct fs_file *fileOut);\n\n#ifdef __cplusplus\n}}\n#endif\n\n#endif /* {guard} */\n""".format(
+        hdr_content = """/**\n * Dispatcher REST gerado inicialmente por swagger2rest.py.\n * Pode ser editado manualmente para integrar outras fontes de arquivos.\n */\n\n#ifndef {guard}\n#define {guard}\n\n#ifdef __cplusplus\nextern \"C\" {{\n#endif\n\n#include \"lwip/apps/fs.h\"\n#include \"{endpoints_header}\"\n\n/* O roteamento, os callbacks httpd_post_* e a montagem das respostas\n * estão no .c gerado junto com {endpoints_header}; aqui ficam apenas\n * os ganchos fs_open_custom/fs_close_custom (LWIP_HTTPD_CUSTOM_FILES). */\n\n#ifdef __cplusplus\n}}\n#endif\n\n#endif /* {guard} */\n""".format(
             guard=hdr_guard,
             endpoints_header=header_path.name,
         )
         hdr.write_text(hdr_content, encoding="utf-8")
 
     if not src.exists():
-        src_content = """/**\n * Implementação básica do dispatcher REST.\n * Este arquivo foi criado automaticamente por swagger2rest.py\n * e pode ser editado para integrar com a aplicação.\n */\n\n#include \"string.h\"\n#include \"lwip/apps/fs.h\"\n#include \"rest_dispatcher.h\"\n\nint restDispatch(const char *uri, const char *method, const char *body, unsigned int bodyLength, struct fs_file *fileOut)\n{{\n    (void)uri;\n    (void)method;\n    (void)body;\n    (void)bodyLength;\n    (void)fileOut;\n\n    /* TODO: implementar integração com restEndpoints[] e gerar resposta HTTP. */\n    return 0;\n}}\n"""
+        src_content = """/**\n * Integração do dispatcher REST com o sistema de arquivos do httpd.\n * Este arquivo foi criado automaticamente por swagger2rest.py\n * e pode ser editado para integrar com a aplicação.\n */\n\n#include \"lwip/apps/fs.h\"\n#include \"rest_dispatcher.h\"\n\n#if LWIP_HTTPD_CUSTOM_FILES\nint fs_open_custom(struct fs_file *file, const char *name)\n{\n    /* GET em REST_API_PREFIX e respostas de POST (REST_RESPONSE_URI_PREFIX). */\n    if (restFsOpen(file, name) != 0) {\n        return 1;\n    }\n\n    /* Outras fontes de arquivos da aplicação entram aqui; 0 = segue para o fsdata. */\n    return 0;\n}\n\nvoid fs_close_custom(struct fs_file *file)\n{\n    restFsClose(file);\n}\n\n#if LWIP_HTTPD_DYNAMIC_FILE_READ\nint fs_read_custom(struct fs_file *file, char *buffer, int count)\n{\n    /* Respostas lidas em partes: REST_RESPONSE_STREAMING, x-async e GETs com query no modo CGI. */\n    return restFsRead(file, buffer, count);\n}\n#endif\n\n#if LWIP_HTTPD_FS_ASYNC_READ\n/* Respostas adiadas (x-async): o httpd espera até restAsyncComplete. */\nu8_t fs_canread_custom(struct fs_file *file)\n{\n    return restFsCanRead(file);\n}\n\nu8_t fs_wait_read_custom(struct fs_file *file, fs_wait_cb callback_fn, void *callback_arg)\n{\n    return restFsWaitRead(file, callback_fn, callback_arg);\n}\n\nint fs_read_async_custom(struct fs_file *file, char *buffer, int count, fs_wait_cb callback_fn, void *callback_arg)\n{\n    return restFsReadAsync(file, buffer, count, callback_fn, callback_arg);\n}\n#endif\n#endif /* LWIP_HTTPD_CUSTOM_FILES */\n"""
         src.write_text(src_content, encoding="utf-8")
 
 
@@ -317,19 +5024,83 @@ def main(argv: List[str]) -> int:
         return 1
 
     endpoints = extract_endpoints(data, api_prefix)
+    resolver = SchemaResolver(data)
+    build_static_responses(endpoints, resolver)
+    build_rate_limits(endpoints)
+    build_response_caches(endpoints, resolver)
+    build_async_endpoints(endpoints)
+    build_request_models(endpoints, resolver)
+    build_response_models(endpoints, resolver)
 
     if not endpoints:
         sys.stderr.write("Aviso: nenhum endpoint REST encontrado em 'paths'.\n")
+    stats_path = f"{api_prefix}/_stats"
+    for ep in endpoints:
+        if (ep.method == "get") and ((ep.path == stats_path) or ep.path.startswith(stats_path + "/")):
+            sys.stderr.write(f"Aviso: GET {ep.path} fica encoberto pelo GET _stats embutido com REST_STATS 1.\n")
 
     header_path.parent.mkdir(parents=True, exist_ok=True)
 
-    header_content = generate_header_content(header_path, endpoints)
+    header_content = generate_header_content(header_path, endpoints, api_prefix, resolver.structs)
+    header_changed = write_if_changed(header_path, header_content)
+
+    source_path = header_path.with_suffix(".c")
+    source_changed = write_if_changed(
+        source_path, generate_source_content(header_path, endpoints, resolver.structs)
+    )
 
-    header_path.write_text(header_content, encoding="utf-8")
+    static_count = sum(1 for ep in endpoints if ep.static is not None)
+    static_path = static_fsdata_path(header_path)
+    static_removed = False
+    if static_count:
+        static_content, static_saved = generate_static_fsdata(endpoints, swagger_file.name)
+        write_if_changed(static_path, static_content)
+    elif static_path.is_file():
+        # Sem GETs x-static: um fragmento antigo seria embutido pelo
+        # makefsdata -frag (mkbuild o passa sempre que o arquivo existe).
+        try:
+            stale = static_path.read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            stale = ""
+        if STATIC_FSDATA_MARKER in stale:
+            static_path.unlink()
+            static_removed = True
 
     ensure_dispatcher_files(header_path)
 
-    sys.stdout.write(f"Header gerado: {header_path}\n")
+    sys.stdout.write(f"Header {'gerado' if header_changed else 'inalterado'}: {header_path}\n")
+    sys.stdout.write(f"Fonte {'gerado ' if source_changed else 'inalterado'}: {source_path}\n")
+    if static_count:
+        sys.stdout.write(
+            f"Fragmento fsdata: {static_path} ({static_count} GETs x-static, "
+            f"deflate economizou {static_saved} bytes; usar makefsdata -frag:{static_path.name})\n"
+        )
+    elif static_removed:
+        sys.stdout.write(f"Fragmento fsdata removido (sem GETs x-static): {static_path}\n")
+    largest = max(
+        ((struct_max_length(res.struct).default(), res.name) for ep in endpoints for res in ep.responses),
+        default=None,
+    )
+    limited = sum(1 for ep in endpoints if ep.rate_limit is not None)
+    if limited:
+        sys.stdout.write(f"Limites x-rate-limit: {limited} endpoint(s), 429 pré-montado no .c\n")
+    cached = sum(1 for ep in endpoints if ep.cache is not None)
+    if cached:
+        sys.stdout.write(f"Cache x-cache-ttl: {cached} GET(s), um buffer de RAM por endpoint\n")
+    deferred = sum(1 for ep in endpoints if ep.deferred)
+    if deferred:
+        sys.stdout.write(f"x-async: {deferred} operação(ões), até REST_ASYNC_MAX_PENDING pendentes\n")
+    if endpoints:
+        pool, _ = build_route_pool(ep.path for ep in endpoints)
+        before, after = route_table_sizes(endpoints, build_route_trie(endpoints, quiet=True), pool)
+        sys.stdout.write(
+            f"Tabelas de rotas: {after} bytes de flash (antes: {before}; "
+            f"-{100 * (before - after) // before}%, estimativa 32 bits)\n"
+        )
+    if largest is not None:
+        sys.stdout.write(
+            f"Maior resposta tipada: {largest[0]} bytes ({largest[1]}, macros nos valores padrão)\n"
+        )
 
     if _stop_requested:
         return 1
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""Benchmark de escala do swagger2rest.py com specs OpenAPI sintéticos.
+
+Uso básico:
+    python swagger2rest_bench.py [--sizes 100,1000,10000,50000] [-o resultado.json]
+    python swagger2rest_bench.py --write-spec <dir> --sizes 5000
+
+Para cada tamanho (número de operações), gera um spec OpenAPI 3 sintético e
+determinístico (paths com parâmetros, query tipada, corpos e respostas com
+`$ref` compartilhados) e mede, em separado, cada etapa do gerador:
+
+- parse: json.loads do texto do spec;
+- extract: extract_endpoints();
+- models: resolução de schemas e structs de requisição/resposta;
+- header / source: emissão do rest_endpoints.h e do .c companheiro.
+
+O resultado (JSON, campo `schema` estável) traz o tempo por etapa, o custo
+por operação e a razão entre o custo por operação do maior e do menor
+tamanho: em uma geração linear ela fica próxima de 1 (o benchmark avisa
+acima de --max-ratio).
+
+Com --check-router, o roteador gerado para o maior tamanho (tabelas da
+árvore, restRouteLookup() e restEndpointPath()) é compilado com o compilador
+do host (--cc) e cada rota é buscada de volta: o endpoint encontrado e o
+pattern devolvido precisam bater com os do spec. Isso pega campos das
+tabelas que estouram o tipo escolhido com specs grandes.
+
+Com --write-spec, apenas grava o spec sintético (openapi.json) no diretório
+indicado, para uso direto com swagger2rest.py.
+
+O script trata SIGINT/SIGTERM para encerramento gracioso.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import shlex
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import swagger2rest  # noqa: E402
+
+SCHEMA_VERSION = 1
+
+DEFAULT_SIZES = [100, 1000, 10000, 50000]
+
+_stop_requested = False
+
+
+def _signal_handler(signum, _frame) -> None:
+    """Sinaliza encerramento gracioso do script."""
+
+    global _stop_requested
+    _stop_requested = True
+    swagger2rest._stop_requested = True
+    sys.stderr.write(f"\nInterrupção solicitada (signal {signum}). Encerrando...\n")
+    sys.stderr.flush()
+
+
+def synthetic_spec(operations: int, seed: int = 1) -> Dict:
+    """Spec OpenAPI 3 com `operations` operações (GET/POST/PUT/DELETE alternados).
+
+    Os paths simulam um spec agregado de vários dispositivos
+    (/dev<N>/<recurso>/{id}/...), com schemas compartilhados via `$ref` para
+    exercitar a memoização do resolvedor.
+    """
+
+    rng = random.Random(seed)
+    model_count = max(4, operations // 50)
+    schemas: Dict[str, Dict] = {
+        "Point": {
+            "type": "object",
+            "required": ["x"],
+            "properties": {"x": {"type": "number"}, "y": {"type": "number"}},
+        },
+        "Error": {
+            "type": "object",
+            "required": ["error"],
+            "properties": {"error": {"type": "string", "maxLength": 32}, "code": {"type": "integer"}},
+        },
+    }
+    for k in range(model_count):
+        schemas[f"Model{k}"] = {
+            "type": "object",
+            "required": ["name"],
+            "properties": {
+                "name": {"type": "string", "maxLength": rng.choice([8, 16, 32])},
+                "enabled": {"type": "boolean"},
+                "level": {"type": "integer"},
+                "gain": {"type": "number", "format": "float"},
+                "pos": {"$ref": "#/components/schemas/Point"},
+                "tags": {"type": "array", "maxItems": 4, "items": {"type": "string", "maxLength": 8}},
+            },
+        }
+
+    methods = ["get", "post", "put", "delete"]
+    paths: Dict[str, Dict] = {}
+    for i in range(operations):
+        resource = i // len(methods)
+        device = resource % 64
+        path = f"/dev{device}/res{resource}"
+        if resource % 2:
+            path += "/{id}"
+        if resource % 5 == 0:
+            path += "/config"
+        item = paths.setdefault(path, {})
+        if "{id}" in path and "parameters" not in item:
+            item["parameters"] = [{"name": "id", "in": "path", "required": True, "schema": {"type": "integer"}}]
+        method = methods[i % len(methods)]
+        model = {"$ref": f"#/components/schemas/Model{rng.randrange(model_count)}"}
+        op: Dict = {
+            "responses": {
+                "200": {"description": "ok", "content": {"application/json": {"schema": model}}},
+                "404": {
+                    "description": "erro",
+                    "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}},
+                },
+            }
+        }
+        if method == "get":
+            op["parameters"] = [
+                {"name": "limit", "in": "query", "schema": {"type": "integer"}},
+                {"name": "verbose", "in": "query", "schema": {"type": "boolean"}},
+            ]
+        elif method in ("post", "put"):
+            op["requestBody"] = {"required": True, "content": {"application/json": {"schema": model}}}
+        item[method] = op
+
+    return {
+        "openapi": "3.0.0",
+        "info": {"title": f"Sintético ({operations} operações)", "version": "1.0.0"},
+        "paths": paths,
+        "components": {"schemas": schemas},
+    }
+
+
+def router_check_source(endpoints: List[swagger2rest.Endpoint]) -> str:
+    """Programa C com o roteador gerado que busca cada rota e confere o resultado.
+
+    Cada `{param}` vira "0" na URI. Rotas duplicadas esperam o primeiro
+    endpoint (o roteador mantém a primeira definição).
+    """
+
+    pool, offsets = swagger2rest.build_route_pool(ep.path for ep in endpoints)
+    types = swagger2rest.endpoint_table_types(endpoints)
+    expected: Dict[tuple, int] = {}
+    for index, ep in enumerate(endpoints):
+        expected.setdefault((ep.method, ep.path), index)
+
+    lines: List[str] = [
+        "/* Gerado por swagger2rest_bench.py --check-router. */\n",
+        "#include <stdio.h>\n",
+        "#include <string.h>\n\n",
+        swagger2rest.generate_router_types(endpoints),
+        f"typedef {swagger2rest.route_pool_offset_type(pool)} restPoolOffset_t;\n\n",
+        "typedef struct restEndpoint {\n",
+        "    restPoolOffset_t path;\n",
+        f"    {types['pathLength']} pathLength;\n",
+        "} restEndpoint_t;\n\n",
+        f"static const restEndpoint_t restEndpoints[{max(len(endpoints), 1)}] = {{\n",
+    ]
+    for ep in endpoints:
+        lines.append(f"    {{ {offsets[ep.path]}u, {len(ep.path.encode('utf-8'))}u }},\n")
+    lines.append("};\n")
+    lines.append(f"static const unsigned int restEndpointCount = {len(endpoints)}u;\n\n")
+    lines.append(swagger2rest.generate_router_content(endpoints))
+
+    lines.append("static const struct {\n    const char *uri;\n    const char *path;\n")
+    lines.append("    httpMethod_t method;\n    int endpoint;\n")
+    lines.append(f"}} restChecks[{max(len(endpoints), 1)}] = {{\n")
+    for index, ep in enumerate(endpoints):
+        uri = "/".join("0" if swagger2rest.is_param_segment(seg) else seg for seg in ep.path.split("/"))
+        lines.append(
+            f"    {{ {swagger2rest.c_string_literal(uri)}, {swagger2rest.c_string_literal(ep.path)}, "
+            f"{swagger2rest.method_enum_name(ep.method)}, {expected[(ep.method, ep.path)]} }},\n"
+        )
+    lines.append("};\n\n")
+    lines.append(
+        "int main(void)\n"
+        "{\n"
+        "    unsigned int i;\n"
+        "    unsigned int failures = 0;\n"
+        "\n"
+        "    for (i = 0; i < restEndpointCount; i++) {\n"
+        "        restRouteMatch_t match;\n"
+        "        unsigned int length = 0;\n"
+        "        const char *path = restEndpointPath(i, &length);\n"
+        "        int rc = restRouteLookup(restChecks[i].uri, (unsigned int)strlen(restChecks[i].uri),\n"
+        "                                 restChecks[i].method, &match);\n"
+        "        if ((rc != REST_ROUTE_FOUND) || (match.endpoint != restChecks[i].endpoint) ||\n"
+        "            (path == NULL) || (length != strlen(restChecks[i].path)) ||\n"
+        "            (memcmp(path, restChecks[i].path, length) != 0)) {\n"
+        "            if (failures < 5u) {\n"
+        "                printf(\"falha: %s -> %d (esperado %d)\\n\", restChecks[i].uri, match.endpoint,\n"
+        "                       restChecks[i].endpoint);\n"
+        "            }\n"
+        "            failures++;\n"
+        "        }\n"
+        "    }\n"
+        "    printf(\"%u %u\\n\", restEndpointCount, failures);\n"
+        "    return (failures == 0u) ? 0 : 1;\n"
+        "}\n"
+    )
+    return "".join(lines)
+
+
+def check_router(endpoints: List[swagger2rest.Endpoint], cc: str, cflags: str) -> Dict:
+    """Compila router_check_source() com o compilador do host e executa."""
+
+    result: Dict = {"cc": cc, "cflags": cflags, "routes": len(endpoints), "ok": False}
+    with tempfile.TemporaryDirectory(prefix="swagger2rest_bench_") as tmp:
+        work = Path(tmp)
+        source = work / "router_check.c"
+        exe = work / "router_check"
+        source.write_text(router_check_source(endpoints), encoding="utf-8")
+        start = time.perf_counter()
+        try:
+            build = subprocess.run(
+                [cc, *shlex.split(cflags), "-std=c99", str(source), "-o", str(exe)],
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+            )
+        except OSError as exc:
+            result["errors"] = [f"compilador indisponível: {exc}"]
+            return result
+        result["compile_s"] = round(time.perf_counter() - start, 3)
+        if build.returncode != 0:
+            result["errors"] = build.stdout.strip().splitlines()[-10:]
+            return result
+        run = subprocess.run([str(exe)], stdout=subprocess.PIPE, text=True)
+    output = run.stdout.strip().splitlines()
+    result["failures"] = int(output[-1].split()[1]) if output else None
+    result["errors"] = output[:-1]
+    result["ok"] = (run.returncode == 0)
+    return result
+
+
+def _timed(stages: Dict[str, float], name: str, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    stages[name] = time.perf_counter() - start
+    return result
+
+
+def run_size(operations: int, seed: int, router_cc: Optional[str] = None, router_cflags: str = "") -> Dict:
+    """Mede cada etapa da geração para um spec sintético de `operations` operações.
+
+    Com `router_cc`, também compila e confere o roteador gerado (check_router).
+    """
+
+    text = json.dumps(synthetic_spec(operations, seed))
+    header_path = Path("rest_endpoints.h")
+    stages: Dict[str, float] = {}
+
+    data = _timed(stages, "parse", json.loads, text)
+    endpoints = _timed(stages, "extract", swagger2rest.extract_endpoints, data, "/api/v1")
+
+    def models():
+        resolver = swagger2rest.SchemaResolver(data)
+        swagger2rest.build_static_responses(endpoints, resolver)
+        swagger2rest.build_rate_limits(endpoints)
+        swagger2rest.build_response_caches(endpoints, resolver)
+        swagger2rest.build_async_endpoints(endpoints)
+        swagger2rest.build_request_models(endpoints, resolver)
+        swagger2rest.build_response_models(endpoints, resolver)
+        return resolver
+
+    resolver = _timed(stages, "models", models)
+    header = _timed(
+        stages, "header", swagger2rest.generate_header_content, header_path, endpoints, "/api/v1", resolver.structs
+    )
+    source = _timed(
+        stages, "source", swagger2rest.generate_source_content, header_path, endpoints, resolver.structs
+    )
+
+    total = sum(stages.values())
+    run: Dict = {
+        "operations": operations,
+        "endpoints": len(endpoints),
+        "structs": len(resolver.structs),
+        "spec_bytes": len(text),
+        "header_bytes": len(header),
+        "source_bytes": len(source),
+        "stages_s": {k: round(v, 6) for k, v in stages.items()},
+        "total_s": round(total, 6),
+        "us_per_operation": round(total * 1e6 / max(operations, 1), 3),
+    }
+    if router_cc is not None and not _stop_requested:
+        run["router_check"] = check_router(endpoints, router_cc, router_cflags)
+    return run
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    """Interpreta parâmetros de linha de comando."""
+
+    parser = argparse.ArgumentParser(description="Benchmark de escala do swagger2rest.py.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Números de operações separados por vírgula (padrão: 100,1000,10000,50000)")
+    parser.add_argument("--seed", type=int, default=1, help="Semente do gerador sintético (padrão: 1)")
+    parser.add_argument("--max-ratio", type=float, default=3.0,
+                        help="Razão máxima aceitável do custo por operação maior/menor (padrão: 3.0)")
+    parser.add_argument("--label", default="", help="Rótulo livre gravado no resultado")
+    parser.add_argument("--check-router", action="store_true",
+                        help="Compila o roteador do maior tamanho e confere a busca de cada rota")
+    parser.add_argument("--cc", default="gcc", help="Compilador do host para --check-router (padrão: gcc)")
+    parser.add_argument("--cflags", default="-O1", help="Flags do compilador para --check-router (padrão: -O1)")
+    parser.add_argument("--write-spec", metavar="DIR",
+                        help="Apenas grava o spec sintético (maior tamanho) em DIR/openapi.json")
+    parser.add_argument("-o", "--output", help="Arquivo JSON de saída (padrão: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    signal.signal(signal.SIGINT, _signal_handler)
+    try:
+        signal.signal(signal.SIGTERM, _signal_handler)
+    except AttributeError:
+        pass
+
+    args = parse_args(argv)
+    try:
+        sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    except ValueError:
+        sys.stderr.write(f"--sizes inválido: {args.sizes}\n")
+        return 1
+    if not sizes or min(sizes) <= 0:
+        sys.stderr.write("--sizes deve conter apenas inteiros positivos.\n")
+        return 1
+
+    if args.write_spec:
+        out_dir = Path(args.write_spec)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        spec_path = out_dir / "openapi.json"
+        spec_path.write_text(json.dumps(synthetic_spec(max(sizes), args.seed), indent=1), encoding="utf-8")
+        sys.stdout.write(f"Spec sintético gravado em: {spec_path}\n")
+        return 0
+
+    runs: List[Dict] = []
+    for operations in sorted(sizes):
+        if _stop_requested:
+            break
+        check = args.check_router and operations == max(sizes)
+        run = run_size(operations, args.seed, args.cc if check else None, args.cflags)
+        runs.append(run)
+        sys.stderr.write(
+            f"{operations:>7} operações: {run['total_s']:.3f} s ({run['us_per_operation']:.1f} µs/operação)\n"
+        )
+        if "router_check" in run:
+            router = run["router_check"]
+            for line in router.get("errors", []):
+                sys.stderr.write(f"  {line}\n")
+            sys.stderr.write(
+                f"{'':>7} roteador: {'ok' if router['ok'] else 'FALHOU'} "
+                f"({router['routes']} rotas, {router.get('failures')} falha(s))\n"
+            )
+
+    ratio = None
+    if len(runs) >= 2 and runs[0]["us_per_operation"] > 0:
+        ratio = round(runs[-1]["us_per_operation"] / runs[0]["us_per_operation"], 3)
+    result = {
+        "schema": SCHEMA_VERSION,
+        "label": args.label,
+        "python": platform.python_version(),
+        "runs": runs,
+        "scaling_ratio": ratio,
+    }
+
+    text = json.dumps(result, indent=2, ensure_ascii=False) + "\n"
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+        sys.stdout.write(f"Resultado gravado em: {args.output}\n")
+    else:
+        sys.stdout.write(text)
+
+    if _stop_requested:
+        return 1
+    if any(not run["router_check"]["ok"] for run in runs if "router_check" in run):
+        return 1
+    if ratio is not None and ratio > args.max_ratio:
+        sys.stderr.write(
+            f"Aviso: custo por operação cresceu {ratio:.2f}x entre {runs[0]['operations']} e "
+            f"{runs[-1]['operations']} operações (limite {args.max_ratio:.2f}x): geração não linear.\n"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""Verificação de host do dispatcher gerado no modo CGI (LWIP_HTTPD_CGI_SSI 1).
+
+Uso básico:
+    python swagger2rest_cgi_check.py [--cc gcc] [--cflags "-O1"] [--keep DIR]
+
+Gera o dispatcher de um spec de teste embutido, compila-o com o compilador
+do host contra stubs mínimos dos headers do lwIP e executa um programa que
+reproduz a ordem de chamadas do httpd (src/apps/http/httpd.c):
+
+- a query é cortada da URI antes do fs_open;
+- httpd_cgi_handler só é chamado quando a URI tem '?';
+- com file->data NULL, a resposta é lida por fs_canread/fs_read_async
+  (fs_*_custom -> restFs*), esperando restAsyncComplete quando preciso.
+
+Cada requisição (GETs com e sem query, query obrigatória ausente, x-cache-ttl
+e x-async com e sem query) tem a linha de status e o corpo conferidos com o
+esperado, com e sem REST_RESPONSE_STREAMING/REST_STATS. O código de saída é
+1 quando alguma resposta diverge.
+
+O script trata SIGINT/SIGTERM para encerramento gracioso.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import shlex
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import swagger2rest  # noqa: E402
+
+_stop_requested = False
+
+
+def _signal_handler(signum, _frame) -> None:
+    """Sinaliza encerramento gracioso do script."""
+
+    global _stop_requested
+    _stop_requested = True
+    swagger2rest._stop_requested = True
+    sys.stderr.write(f"\nInterrupção solicitada (signal {signum}). Encerrando...\n")
+    sys.stderr.flush()
+
+
+def _path_id() -> Dict:
+    return {"name": "id", "in": "path", "required": True, "schema": {"type": "integer"}}
+
+
+# GETs com query (opcional e obrigatória), sem query com x-cache-ttl e x-async
+# com e sem query: cada combinação segue um caminho diferente no modo CGI.
+CHECK_SPEC: Dict = {
+    "openapi": "3.0.0",
+    "info": {"title": "cgi-check", "version": "1"},
+    "paths": {
+        "/items/{id}": {"get": {
+            "parameters": [_path_id(), {"name": "limit", "in": "query", "schema": {"type": "integer"}}],
+            "responses": {"200": {"description": "ok"}},
+        }},
+        "/need": {"get": {
+            "parameters": [{"name": "k", "in": "query", "required": True, "schema": {"type": "integer"}}],
+            "responses": {"200": {"description": "ok"}},
+        }},
+        "/plain": {"get": {"x-cache-ttl": 1000, "responses": {"200": {"description": "ok"}}}},
+        "/job/{id}": {"get": {"x-async": True, "parameters": [_path_id()],
+                              "responses": {"200": {"description": "ok"}}}},
+        "/ajob": {"get": {
+            "x-async": True,
+            "parameters": [{"name": "n", "in": "query", "schema": {"type": "integer"}}],
+            "responses": {"200": {"description": "ok"}},
+        }},
+    },
+}
+
+# Requisição -> resposta esperada ("<linha de status> | <corpo>", " (async)"
+# quando o envio esperou restAsyncComplete).
+EXPECTED = [
+    ("/api/v1/items/5?limit=3", "HTTP/1.0 200 OK | id=5 limit=3 present=3"),
+    ("/api/v1/items/5", "HTTP/1.0 200 OK | id=5 limit=0 present=1"),
+    ("/api/v1/need", "HTTP/1.0 400 Bad Request | "),
+    ("/api/v1/need?k=2", "HTTP/1.0 200 OK | k=2"),
+    ("/api/v1/plain", "HTTP/1.0 200 OK | plain calls=1"),
+    ("/api/v1/plain", "HTTP/1.0 200 OK | plain calls=1"),
+    ("/api/v1/plain?x=1", "HTTP/1.0 200 OK | plain calls=1"),
+    ("/api/v1/job/9", "HTTP/1.0 200 OK | async present=1 (async)"),
+    ("/api/v1/ajob", "HTTP/1.0 200 OK | async present=0 (async)"),
+    ("/api/v1/ajob?n=4", "HTTP/1.0 200 OK | async present=1 (async)"),
+    ("/api/v1/nope", "HTTP/1.0 404 Not Found | "),
+    ("/api/v1/items/5?limit=7", "HTTP/1.0 200 OK | id=5 limit=7 present=3"),
+]
+
+# Combinações de opções compiladas (além das exigidas pelo modo CGI).
+VARIANTS = [
+    [],
+    ["-DREST_RESPONSE_STREAMING=1", "-DREST_STATS=1"],
+]
+
+BASE_DEFINES = [
+    "-DLWIP_HTTPD_CGI_SSI=1",
+    "-DLWIP_HTTPD_DYNAMIC_FILE_READ=1",
+    "-DLWIP_HTTPD_FS_ASYNC_READ=1",
+    "-DREST_MAX_CONNECTIONS=4",
+]
+
+# Stubs mínimos dos headers do lwIP usados pelo .c gerado.
+STUB_HEADERS = {
+    "lwip/err.h": """\
+#ifndef LWIP_HDR_ERR_H
+#define LWIP_HDR_ERR_H
+#include <stdint.h>
+typedef int8_t err_t;
+typedef uint8_t u8_t;
+typedef uint16_t u16_t;
+typedef uint32_t u32_t;
+#define ERR_OK 0
+#define ERR_MEM -1
+#define ERR_ARG -16
+#endif
+""",
+    "lwip/def.h": """\
+#ifndef LWIP_HDR_DEF_H
+#define LWIP_HDR_DEF_H
+#include "lwip/err.h"
+#define LWIP_UNUSED_ARG(x) (void)(x)
+#endif
+""",
+    "lwip/pbuf.h": """\
+#ifndef LWIP_HDR_PBUF_H
+#define LWIP_HDR_PBUF_H
+#include "lwip/err.h"
+struct pbuf { struct pbuf *next; void *payload; u16_t tot_len; u16_t len; };
+u8_t pbuf_free(struct pbuf *p);
+void pbuf_realloc(struct pbuf *p, u16_t size);
+#endif
+""",
+    "lwip/sys.h": """\
+#ifndef LWIP_HDR_SYS_H
+#define LWIP_HDR_SYS_H
+#include "lwip/def.h"
+u32_t sys_now(void);
+#endif
+""",
+    "lwip/tcpip.h": """\
+#ifndef LWIP_HDR_TCPIP_H
+#define LWIP_HDR_TCPIP_H
+#include "lwip/err.h"
+typedef void (*tcpip_callback_fn)(void *ctx);
+err_t tcpip_callback(tcpip_callback_fn function, void *ctx);
+#endif
+""",
+    "lwip/apps/fs.h": """\
+#ifndef LWIP_HDR_APPS_FS_H
+#define LWIP_HDR_APPS_FS_H
+#include "lwip/err.h"
+#define FS_FILE_FLAGS_HEADER_INCLUDED 0x01
+struct fs_file { const char *data; int len; int index; void *pextension; u8_t flags; };
+#define FS_READ_EOF -1
+#define FS_READ_DELAYED -2
+typedef void (*fs_wait_cb)(void *arg);
+#endif
+""",
+    "lwip/apps/httpd.h": """\
+#ifndef LWIP_HDR_APPS_HTTPD_H
+#define LWIP_HDR_APPS_HTTPD_H
+#include "lwip/err.h"
+#include "lwip/pbuf.h"
+#include "lwip/apps/fs.h"
+void httpd_cgi_handler(struct fs_file *file, const char *uri, int iNumParams, char **pcParam, char **pcValue);
+#endif
+""",
+}
+
+# Handlers do spec de teste e um httpd mínimo com a ordem de chamadas do
+# lwIP: corta a query, fs_open, httpd_cgi_handler só com '?', e então envia
+# file->data ou lê por fs_canread/fs_read_async.
+DRIVER_C = r"""
+#include <stdio.h>
+#include <string.h>
+#include "lwip/apps/fs.h"
+#include "lwip/apps/httpd.h"
+#include "lwip/sys.h"
+#include "lwip/tcpip.h"
+#include "rest_endpoints.h"
+
+u8_t pbuf_free(struct pbuf *p) { (void)p; return 1; }
+void pbuf_realloc(struct pbuf *p, u16_t size) { (void)p; (void)size; }
+u32_t sys_now(void) { return 0; }
+
+static tcpip_callback_fn queued[8];
+static void *queuedArg[8];
+static int queuedCount;
+
+err_t tcpip_callback(tcpip_callback_fn function, void *ctx)
+{
+    queued[queuedCount] = function;
+    queuedArg[queuedCount++] = ctx;
+    return ERR_OK;
+}
+
+static restAsyncToken_t token;
+static int plainCalls;
+
+int restHandle_GET_api_v1_items_id(const restRequestContext_t *ctx)
+{
+    const restReq_GET_api_v1_items_id_t *r = REST_REQUEST(ctx, GET_api_v1_items_id);
+    ctx->response->length = (unsigned int)sprintf(ctx->response->buffer, "id=%ld limit=%ld present=%lu",
+                                                  r->id, r->limit, r->present);
+    return 0;
+}
+
+int restHandle_GET_api_v1_need(const restRequestContext_t *ctx)
+{
+    ctx->response->length = (unsigned int)sprintf(ctx->response->buffer, "k=%ld",
+                                                  REST_REQUEST(ctx, GET_api_v1_need)->k);
+    return 0;
+}
+
+int restHandle_GET_api_v1_plain(const restRequestContext_t *ctx)
+{
+    ctx->response->length = (unsigned int)sprintf(ctx->response->buffer, "plain calls=%d", ++plainCalls);
+    return 0;
+}
+
+int restHandle_GET_api_v1_job_id(const restRequestContext_t *ctx)
+{
+    token = restAsyncDefer(ctx);
+    return REST_PENDING;
+}
+
+int restHandle_GET_api_v1_ajob(const restRequestContext_t *ctx)
+{
+    token = restAsyncDefer(ctx);
+    return REST_PENDING;
+}
+
+static void wake(void *arg)
+{
+    (void)arg;
+}
+
+/* A tarefa conclui a requisição adiada e a thread tcpip roda o callback. */
+static void completeAsync(void)
+{
+    const restRequestContext_t *ctx = restAsyncContext(token);
+    int i;
+
+    ctx->response->length = (unsigned int)sprintf(ctx->response->buffer, "async present=%lu",
+        (ctx->request != NULL) ? *(const unsigned long *)ctx->request : 0ul);
+    restAsyncComplete(token, 0);
+    for (i = 0; i < queuedCount; i++) {
+        queued[i](queuedArg[i]);
+    }
+    queuedCount = 0;
+}
+
+static void serve(const char *request)
+{
+    char uri[128];
+    char out[1024];
+    char *names[4];
+    char *values[4];
+    char *params;
+    char *body;
+    struct fs_file file;
+    int count = 0;
+    int n = 0;
+    int waits = 0;
+
+    strcpy(uri, request);
+    params = strchr(uri, '?');
+    if (params != NULL) {
+        *params++ = '\0';
+    }
+    memset(&file, 0, sizeof(file));
+    if (!restFsOpen(&file, uri)) {
+        printf("%s -> fsdata\n", request);
+        return;
+    }
+    if (params != NULL) {
+        char *p = params;
+        while ((p != NULL) && (*p != '\0') && (count < 4)) {
+            names[count] = p;
+            p = strchr(p, '&');
+            if (p != NULL) {
+                *p++ = '\0';
+            }
+            values[count] = strchr(names[count], '=');
+            if (values[count] != NULL) {
+                *values[count]++ = '\0';
+            }
+            count++;
+        }
+        httpd_cgi_handler(&file, uri, count, names, values);
+    }
+    if (file.data != NULL) {
+        memcpy(out, file.data, (size_t)file.len);
+        n = file.len;
+    } else {
+        for (;;) {
+            int k;
+            if (!restFsCanRead(&file)) {
+                if (restFsWaitRead(&file, wake, NULL)) {
+                    waits++;
+                    completeAsync();
+                }
+                continue;
+            }
+            if ((file.len - file.index) <= 0) {
+                break;
+            }
+            k = restFsReadAsync(&file, out + n, 16, wake, NULL);
+            if (k == FS_READ_DELAYED) {
+                waits++;
+                completeAsync();
+                continue;
+            }
+            if (k < 0) {
+                break;
+            }
+            n += k;
+        }
+    }
+    restFsClose(&file);
+    out[n] = '\0';
+    body = strstr(out, "\r\n\r\n");
+    if (strchr(out, '\r') != NULL) {
+        *strchr(out, '\r') = '\0';
+    }
+    printf("%s -> %s | %s%s\n", request, out, (body != NULL) ? body + 4 : "", waits ? " (async)" : "");
+}
+
+int main(int argc, char **argv)
+{
+    int i;
+    for (i = 1; i < argc; i++) {
+        serve(argv[i]);
+    }
+    return 0;
+}
+"""
+
+
+def generate(work: Path) -> None:
+    """Grava o spec de teste e gera rest_endpoints.h/.c em `work`."""
+
+    spec_dir = work / "spec"
+    spec_dir.mkdir(parents=True, exist_ok=True)
+    (spec_dir / "openapi.json").write_text(json.dumps(CHECK_SPEC, indent=1), encoding="utf-8")
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        rc = swagger2rest.main([str(spec_dir), "-o", str(work / "rest_endpoints.h"), "-v", "1"])
+    if rc != 0:
+        raise RuntimeError(f"swagger2rest falhou:\n{log.getvalue()}")
+
+
+def write_stubs(include_dir: Path) -> None:
+    """Cria os headers stub do lwIP em `include_dir`."""
+
+    for name, text in STUB_HEADERS.items():
+        path = include_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="ascii")
+
+
+def run_variant(work: Path, cc: str, cflags: str, defines: List[str]) -> List[str]:
+    """Compila o driver com `defines` e devolve os erros encontrados."""
+
+    exe = work / "cgi_check"
+    build = subprocess.run(
+        [cc, *shlex.split(cflags), "-std=c99", "-I", str(work / "include"), "-I", str(work),
+         *BASE_DEFINES, *defines, str(work / "driver.c"), str(work / "rest_endpoints.c"), "-o", str(exe)],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    if build.returncode != 0:
+        return ["falha na compilação:"] + build.stdout.strip().splitlines()[-10:]
+    run = subprocess.run([str(exe), *[uri for uri, _ in EXPECTED]], stdout=subprocess.PIPE, text=True)
+    lines = run.stdout.splitlines()
+    errors: List[str] = []
+    if run.returncode != 0:
+        errors.append(f"driver terminou com código {run.returncode}")
+    for i, (uri, expected) in enumerate(EXPECTED):
+        got = lines[i] if i < len(lines) else "(sem saída)"
+        if got != f"{uri} -> {expected}":
+            errors.append(f"GET {uri}: esperado '{expected}', obtido '{got}'")
+    return errors
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    """Interpreta parâmetros de linha de comando."""
+
+    parser = argparse.ArgumentParser(description="Verifica o dispatcher gerado no modo CGI (LWIP_HTTPD_CGI_SSI).")
+    parser.add_argument("--cc", default="gcc", help="Compilador do host (padrão: gcc)")
+    parser.add_argument("--cflags", default="-O1 -Wall -Wextra", help="Flags do compilador (padrão: -O1 -Wall -Wextra)")
+    parser.add_argument("--keep", metavar="DIR", help="Mantém os arquivos gerados e o driver em DIR")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    signal.signal(signal.SIGINT, _signal_handler)
+    try:
+        signal.signal(signal.SIGTERM, _signal_handler)
+    except AttributeError:
+        pass
+
+    args = parse_args(argv)
+    if shutil.which(args.cc) is None:
+        sys.stderr.write(f"Erro: compilador não encontrado: {args.cc}\n")
+        return 1
+
+    with tempfile.TemporaryDirectory(prefix="swagger2rest_cgi_") as tmp:
+        work = Path(args.keep).resolve() if args.keep else Path(tmp)
+        work.mkdir(parents=True, exist_ok=True)
+        try:
+            generate(work)
+        except RuntimeError as exc:
+            sys.stderr.write(f"Erro: {exc}\n")
+            return 1
+        write_stubs(work / "include")
+        (work / "driver.c").write_text(DRIVER_C, encoding="utf-8")
+
+        failed = False
+        for defines in VARIANTS:
+            if _stop_requested:
+                return 1
+            label = " ".join(defines) or "padrão"
+            errors = run_variant(work, args.cc, args.cflags, defines)
+            if errors:
+                failed = True
+                sys.stdout.write(f"FALHOU ({label}):\n")
+                for line in errors:
+                    sys.stdout.write(f"  {line}\n")
+            else:
+                sys.stdout.write(f"ok ({label}): {len(EXPECTED)} requisições\n")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""Decodifica o dump de GET <prefixo>/_stats (REST_STATS 1) do dispatcher gerado.
+
+Uso básico:
+    python swagger2rest_stats.py <swagger_dir> -v 1 --url http://192.168.0.10/api/v1/_stats
+    python swagger2rest_stats.py <swagger_dir> -v 1 dump.json [--sort max] [--json]
+
+O firmware responde só com números, uma linha por endpoint na ordem de
+restEndpoints[] ([calls, errors, bytesIn, bytesOut, minTime, maxTime,
+totalTime]), em páginas que cabem no buffer do slot (campo "next"). Este
+script relê o mesmo spec usado na geração para mapear cada índice de volta
+para operationId, método e path, junta as páginas e imprime uma tabela
+ordenada (ou JSON, com --json).
+
+O dump pode vir de um arquivo (ou "-" para stdin) com uma ou mais páginas
+concatenadas, ou ser buscado direto do dispositivo com --url, seguindo as
+páginas. O spec e a versão (-v) devem ser os mesmos da geração: o total de
+endpoints do dump é conferido com o do spec.
+
+O script trata SIGINT/SIGTERM para encerramento gracioso.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import signal
+import sys
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import swagger2rest  # noqa: E402
+
+STAT_FIELDS = ["calls", "errors", "bytes_in", "bytes_out", "min", "max", "total"]
+
+SORT_KEYS = ["total", "max", "avg", "calls", "errors", "index"]
+
+_stop_requested = False
+
+
+def _signal_handler(signum, _frame) -> None:
+    """Sinaliza encerramento gracioso do script."""
+
+    global _stop_requested
+    _stop_requested = True
+    swagger2rest._stop_requested = True
+    sys.stderr.write(f"\nInterrupção solicitada (signal {signum}). Encerrando...\n")
+    sys.stderr.flush()
+
+
+def read_pages(text: str) -> List[Dict]:
+    """Lê uma ou mais páginas JSON concatenadas (ou uma lista de páginas)."""
+
+    decoder = json.JSONDecoder()
+    pages: List[Dict] = []
+    pos = 0
+    while not _stop_requested:
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+        if pos >= len(text):
+            break
+        value, pos = decoder.raw_decode(text, pos)
+        pages.extend(value if isinstance(value, list) else [value])
+    return pages
+
+
+def fetch_pages(url: str, timeout: float) -> List[Dict]:
+    """Busca todas as páginas de _stats no dispositivo, seguindo "next"."""
+
+    base = url.split("?", 1)[0].rstrip("/")
+    pages: List[Dict] = []
+    target = base
+    while not _stop_requested:
+        with urllib.request.urlopen(target, timeout=timeout) as response:
+            page = json.loads(response.read().decode("utf-8"))
+        pages.append(page)
+        if "next" not in page:
+            break
+        target = f"{base}/{int(page['next'])}"
+    return pages
+
+
+def merge_pages(pages: List[Dict]) -> Tuple[str, int, Dict[int, List[int]]]:
+    """Junta as páginas em {índice: linha}; retorna (unidade, total, linhas)."""
+
+    if not pages:
+        raise ValueError("nenhuma página de _stats no dump")
+    unit = str(pages[0].get("unit", ""))
+    count = int(pages[0]["count"])
+    rows: Dict[int, List[int]] = {}
+    for page in pages:
+        if int(page["count"]) != count:
+            raise ValueError("páginas de dumps diferentes (count divergente)")
+        first = int(page.get("first", 0))
+        for offset, row in enumerate(page.get("stats", [])):
+            if len(row) != len(STAT_FIELDS):
+                raise ValueError(f"linha {first + offset} com {len(row)} campos (esperado {len(STAT_FIELDS)})")
+            rows[first + offset] = [int(v) for v in row]
+    return unit, count, rows
+
+
+def decode(rows: Dict[int, List[int]], endpoints: List[swagger2rest.Endpoint]) -> List[Dict]:
+    """Associa cada linha ao endpoint de mesmo índice em restEndpoints[]."""
+
+    decoded: List[Dict] = []
+    for index in sorted(rows):
+        if index >= len(endpoints):
+            raise ValueError(f"índice {index} fora do spec ({len(endpoints)} endpoints)")
+        ep = endpoints[index]
+        item: Dict = {
+            "index": index,
+            "operationId": ep.operation.get("operationId") or ep.handler_name,
+            "method": ep.method.upper(),
+            "path": ep.path,
+        }
+        item.update(zip(STAT_FIELDS, rows[index]))
+        item["avg"] = (item["total"] / item["calls"]) if item["calls"] else 0.0
+        decoded.append(item)
+    return decoded
+
+
+def format_table(decoded: List[Dict], unit: str) -> str:
+    """Tabela de texto, uma linha por endpoint."""
+
+    headers = ["#", "operationId", "rota", "calls", "erros", "in", "out",
+               f"min ({unit})", f"média ({unit})", f"max ({unit})", f"total ({unit})"]
+    table = [headers]
+    for item in decoded:
+        table.append([
+            str(item["index"]), item["operationId"], f"{item['method']} {item['path']}",
+            str(item["calls"]), str(item["errors"]), str(item["bytes_in"]), str(item["bytes_out"]),
+            str(item["min"]) if item["calls"] else "-", f"{item['avg']:.1f}" if item["calls"] else "-",
+            str(item["max"]) if item["calls"] else "-", str(item["total"]),
+        ])
+    widths = [max(len(row[col]) for row in table) for col in range(len(headers))]
+    lines = []
+    for row in table:
+        cells = [cell.ljust(widths[col]) if col in (1, 2) else cell.rjust(widths[col]) for col, cell in enumerate(row)]
+        lines.append("  ".join(cells).rstrip())
+    return "\n".join(lines) + "\n"
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    """Interpreta parâmetros de linha de comando."""
+
+    parser = argparse.ArgumentParser(description="Decodifica o dump de GET /api/vN/_stats (REST_STATS).")
+    parser.add_argument("swagger_dir", help="Diretório com o swagger.json / openapi.json usado na geração")
+    parser.add_argument("-v", "--version", required=True, type=int, help="Versão da API usada na geração (/api/vX)")
+    parser.add_argument("dump", nargs="?", help="Arquivo com as páginas de _stats ('-' para stdin)")
+    parser.add_argument("--url", help="URL de _stats no dispositivo (busca todas as páginas)")
+    parser.add_argument("--timeout", type=float, default=5.0, help="Timeout de cada requisição com --url (s)")
+    parser.add_argument("--sort", choices=SORT_KEYS, default="total", help="Ordenação da tabela (padrão: total)")
+    parser.add_argument("--all", action="store_true", help="Inclui endpoints sem chamadas")
+    parser.add_argument("--json", action="store_true", help="Saída em JSON em vez de tabela")
+
+    # intermixed: o dump pode vir depois de -v (swagger_dir -v 1 dump.json).
+    args = parser.parse_intermixed_args(argv)
+    if (args.dump is None) == (args.url is None):
+        parser.error("informe um arquivo de dump ou --url (apenas um)")
+    return args
+
+
+def main(argv: List[str]) -> int:
+    signal.signal(signal.SIGINT, _signal_handler)
+    try:
+        signal.signal(signal.SIGTERM, _signal_handler)
+    except AttributeError:
+        pass
+
+    args = parse_args(argv)
+
+    swagger_file = swagger2rest.find_swagger_file(Path(args.swagger_dir).resolve())
+    try:
+        spec = json.loads(swagger_file.read_text(encoding="utf-8"))
+    except Exception as exc:
+        sys.stderr.write(f"Erro ao ler/parsear JSON: {exc}\n")
+        return 1
+    endpoints = swagger2rest.extract_endpoints(spec, f"/api/v{int(args.version)}")
+
+    try:
+        if args.url:
+            pages = fetch_pages(args.url, args.timeout)
+        elif args.dump == "-":
+            pages = read_pages(sys.stdin.read())
+        else:
+            pages = read_pages(Path(args.dump).read_text(encoding="utf-8"))
+        unit, count, rows = merge_pages(pages)
+    except (OSError, ValueError, KeyError) as exc:
+        sys.stderr.write(f"Erro ao ler o dump de _stats: {exc}\n")
+        return 1
+    if _stop_requested:
+        return 130
+
+    if count != len(endpoints):
+        sys.stderr.write(
+            f"Erro: dump com {count} endpoints, spec {swagger_file.name} com {len(endpoints)}; "
+            "o firmware foi gerado de outro spec/versão.\n"
+        )
+        return 1
+    missing = count - len(rows)
+    if missing:
+        sys.stderr.write(f"Aviso: {missing} endpoint(s) sem linha no dump (páginas faltando?).\n")
+
+    try:
+        decoded = decode(rows, endpoints)
+    except ValueError as exc:
+        sys.stderr.write(f"Erro: {exc}\n")
+        return 1
+    if not args.all:
+        decoded = [item for item in decoded if item["calls"] or item["errors"]]
+    if args.sort != "index":
+        decoded.sort(key=lambda item: item[args.sort], reverse=True)
+
+    if args.json:
+        sys.stdout.write(json.dumps({"unit": unit, "count": count, "endpoints": decoded}, indent=2) + "\n")
+    else:
+        sys.stdout.write(format_table(decoded, unit))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))